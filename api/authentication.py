@@ -0,0 +1,100 @@
+"""
+Authentification JWT sans requête en base.
+
+Le token d'accès porte l'identifiant et le rôle de l'utilisateur: les
+permissions sont évaluées à partir de ces claims, sans charger la ligne
+``User``. Les vues qui ont besoin de l'utilisateur complet passent par
+``utilisateur_complet``, adossé à un petit cache en mémoire à durée de vie
+courte.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+DUREE_CACHE_UTILISATEURS = 30
+TAILLE_CACHE_UTILISATEURS = 10_000
+
+
+class CacheUtilisateurs:
+    """
+    Cache en mémoire du processus: id -> (expiration, utilisateur). Les
+    entrées sont rangées par expiration: les expirées sont retirées à chaque
+    ajout, puis les plus anciennes au-delà de TAILLE_CACHE_UTILISATEURS
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.entrees = OrderedDict()
+
+    @property
+    def duree(self):
+        return getattr(settings, "DUREE_CACHE_UTILISATEURS", DUREE_CACHE_UTILISATEURS)
+
+    def obtenir(self, identifiant):
+        maintenant = time.monotonic()
+        with self.verrou:
+            entree = self.entrees.get(str(identifiant))
+            if entree is not None and entree[0] > maintenant:
+                # copie: une instance partagée ne doit pas être modifiée en place
+                return copy.copy(entree[1])
+        utilisateur = get_user_model().objects.get(pk=identifiant)
+        taille = getattr(
+            settings, "TAILLE_CACHE_UTILISATEURS", TAILLE_CACHE_UTILISATEURS
+        )
+        with self.verrou:
+            self.entrees.pop(str(identifiant), None)
+            self.entrees[str(identifiant)] = (maintenant + self.duree, utilisateur)
+            while self.entrees:
+                expiration, _ = next(iter(self.entrees.values()))
+                if expiration > maintenant and len(self.entrees) <= taille:
+                    break
+                self.entrees.popitem(last=False)
+        return copy.copy(utilisateur)
+
+    def invalider(self, identifiant):
+        with self.verrou:
+            self.entrees.pop(str(identifiant), None)
+
+    def vider(self):
+        with self.verrou:
+            self.entrees.clear()
+
+
+cache_utilisateurs = CacheUtilisateurs()
+
+
+def utilisateur_complet(utilisateur):
+    """Instance ``User`` correspondant à ``request.user``"""
+    if isinstance(utilisateur, TokenUser):
+        return cache_utilisateurs.obtenir(utilisateur.id)
+    return utilisateur
+
+
+class UtilisateurToken(TokenUser):
+    """Utilisateur reconstruit à partir des claims du token d'accès"""
+
+    @cached_property
+    def id(self):
+        # le claim est sérialisé en chaîne: on le ramène au type de la clé primaire
+        return get_user_model()._meta.pk.to_python(
+            self.token[api_settings.USER_ID_CLAIM]
+        )
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @property
+    def role(self):
+        if "role" in self.token:
+            return self.token["role"]
+        # token émis avant l'ajout du claim: repli sur la base
+        return utilisateur_complet(self).role
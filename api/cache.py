@@ -0,0 +1,220 @@
+"""
+Cache HTTP des réponses en lecture.
+
+``ReponseConditionnelleMixin`` répond 304 aux GET conditionnels à partir d'une
+clé de version peu coûteuse (dates de modification maximales et nombre de
+lignes), calculée avant toute sérialisation.
+
+Les listes et détails d'offres publiques sont en plus mis en cache.
+
+Les représentations sérialisées sont conservées dans le cache Django (locmem
+par défaut, configurable via CACHES) avec leur ETag et leur date de dernière
+modification (détail seulement). Au commit d'une écriture, les signaux des
+offres invalident le détail concerné et font changer de génération toutes les
+pages de liste. Un client qui présente un ETag ou une date encore valides
+reçoit un 304 sans travail de sérialisation.
+"""
+
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+DUREE_CACHE = 300
+
+CLE_GENERATION_LISTE = "offres:liste:generation"
+
+
+def cle_detail_offre(pk):
+    return f"offres:detail:{pk}"
+
+
+def generation_liste():
+    # initialisée à l'horodatage: une génération évincée du cache ne peut
+    # pas revenir à une valeur déjà utilisée par des pages encore en cache
+    cache.add(CLE_GENERATION_LISTE, time.time_ns(), timeout=None)
+    return cache.get(CLE_GENERATION_LISTE)
+
+
+def invalider_liste_offres():
+    try:
+        cache.incr(CLE_GENERATION_LISTE)
+    except ValueError:
+        generation_liste()
+
+
+def invalider_offre(pk):
+    cache.delete(cle_detail_offre(pk))
+    invalider_liste_offres()
+
+
+def invalider_offre_au_commit(pk):
+    """
+    Invalide après le commit: une invalidation immédiate laisserait une
+    lecture concurrente remettre en cache les données d'avant le commit
+    """
+    transaction.on_commit(partial(invalider_offre, pk))
+
+
+def invalider_liste_offres_au_commit():
+    transaction.on_commit(invalider_liste_offres)
+
+
+def calculer_etag(donnees):
+    empreinte = hashlib.md5(
+        json.dumps(donnees, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8"),
+        usedforsecurity=False,
+    )
+    return quote_etag(empreinte.hexdigest())
+
+
+def horodatage(valeur):
+    date = parse_datetime(valeur) if isinstance(valeur, str) else valeur
+    return int(date.timestamp()) if date else None
+
+
+class ReponseEnCacheMixin(ABC):
+    """
+    Sert les GET depuis le cache et répond 304 aux requêtes conditionnelles
+    (If-None-Match / If-Modified-Since) encore valides
+    """
+
+    duree_cache = DUREE_CACHE
+
+    @abstractmethod
+    def get_cle_cache(self):
+        """
+        Clé de cache de la réponse à la requête courante. Elle doit porter tout
+        ce qui fait varier la réponse (ressource, page...) et être connue de
+        l'invalidation, qui la supprime ou en change la génération
+        """
+
+    def get_derniere_modification(self, donnees):
+        """Horodatage de la modification la plus récente des données, ou None"""
+        return None
+
+    def get(self, request, *args, **kwargs):
+        cle = self.get_cle_cache()
+        entree = cache.get(cle)
+        if entree is None:
+            reponse = super().get(request, *args, **kwargs)
+            if reponse.status_code != status.HTTP_200_OK:
+                return reponse
+            entree = {
+                "donnees": reponse.data,
+                "etag": calculer_etag(reponse.data),
+                "derniere_modification": self.get_derniere_modification(reponse.data),
+            }
+            cache.set(cle, entree, self.duree_cache)
+
+        non_modifiee = get_conditional_response(
+            request._request,
+            etag=entree["etag"],
+            last_modified=entree["derniere_modification"],
+        )
+        if non_modifiee is not None:
+            reponse = Response(status=non_modifiee.status_code)
+        else:
+            reponse = Response(entree["donnees"])
+        reponse["ETag"] = entree["etag"]
+        if entree["derniere_modification"] is not None:
+            reponse["Last-Modified"] = http_date(entree["derniere_modification"])
+        return reponse
+
+
+class DetailOffreEnCacheMixin(ReponseEnCacheMixin):
+    def get_cle_cache(self):
+        return cle_detail_offre(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+
+    def get_derniere_modification(self, donnees):
+        return horodatage(donnees.get("date_modification"))
+
+
+class ListeOffresEnCacheMixin(ReponseEnCacheMixin):
+    # pas de Last-Modified: une suppression ne fait pas avancer la date la
+    # plus récente, seul l'ETag détecte tous les changements d'une page
+
+    def get_cle_cache(self):
+        # l'URL absolue porte la page (curseur, taille) et l'hôte des liens
+        url = hashlib.md5(
+            self.request.build_absolute_uri().encode("utf-8"), usedforsecurity=False
+        ).hexdigest()
+        return f"offres:liste:{generation_liste()}:{url}"
+
+
+class ReponseConditionnelleMixin:
+    """
+    GET conditionnel pour les vues génériques: l'ETag est dérivé d'une seule
+    requête d'agrégat (max des champs de date et nombre de lignes) sur le
+    queryset de la vue, de sorte qu'un client à jour reçoit un 304 sans que
+    les lignes soient chargées ni sérialisées
+    """
+
+    champs_version = ("date_modification",)
+
+    def est_detail(self):
+        lookup_url_kwarg = getattr(self, "lookup_url_kwarg", None) or getattr(
+            self, "lookup_field", None
+        )
+        return lookup_url_kwarg in self.kwargs
+
+    def get_queryset_version(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.est_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset.order_by()
+
+    def get_version(self):
+        return self.get_queryset_version().aggregate(
+            nombre=Count("pk"),
+            **{f"max_{champ}": Max(champ) for champ in self.champs_version},
+        )
+
+    def get(self, request, *args, **kwargs):
+        version = self.get_version()
+        detail = self.est_detail()
+        if detail and not version["nombre"]:
+            # laisse la vue répondre 404
+            return super().get(request, *args, **kwargs)
+
+        # l'URL (page, filtres) et l'utilisateur font partie de la version
+        empreinte = hashlib.md5(
+            json.dumps(
+                [request.build_absolute_uri(), request.user.pk, version],
+                default=str,
+            ).encode("utf-8"),
+            usedforsecurity=False,
+        )
+        etag = quote_etag(empreinte.hexdigest())
+        # Last-Modified seulement pour un détail: sur une liste, une suppression
+        # ne fait pas avancer la date maximale
+        derniere_modification = None
+        if detail:
+            dates = [version[f"max_{champ}"] for champ in self.champs_version]
+            derniere_modification = int(max(filter(None, dates)).timestamp())
+
+        non_modifiee = get_conditional_response(
+            request._request, etag=etag, last_modified=derniere_modification
+        )
+        if non_modifiee is not None:
+            reponse = Response(status=non_modifiee.status_code)
+        else:
+            reponse = super().get(request, *args, **kwargs)
+        reponse["ETag"] = etag
+        if derniere_modification is not None:
+            reponse["Last-Modified"] = http_date(derniere_modification)
+        return reponse
@@ -0,0 +1,210 @@
+"""
+Correspondance entre les compétences des candidats et celles requises par les
+offres.
+
+Les listes de compétences en texte libre sont normalisées puis associées à un
+vocabulaire (table ``Competence``) dont chaque entrée a un identifiant entier.
+Un profil ou une offre est alors stocké sous forme de liste creuse: les
+identifiants triés, sur 4 octets chacun. La taille suit le nombre de
+compétences, pas celle du vocabulaire, et un score se calcule par
+intersection d'ensembles, sans manipulation de chaînes.
+
+Les compétences des candidats sont aussi indexées dans ``CompetenceCandidat``:
+seuls les candidats partageant au moins une compétence avec l'offre sont lus
+et notés.
+"""
+
+import heapq
+import re
+import struct
+import threading
+import unicodedata
+
+from django.db import transaction
+
+from .models import Competence, CompetenceCandidat, Offre, User
+
+SEPARATEURS = re.compile(r"[,;/\n|]+")
+
+
+def normaliser_competences(texte):
+    """Découpe une liste libre en noms normalisés, dans l'ordre, sans doublon"""
+    noms = []
+    for morceau in SEPARATEURS.split(texte or ""):
+        nom = unicodedata.normalize("NFKD", morceau.strip().lower())
+        nom = "".join(c for c in nom if not unicodedata.combining(c))
+        nom = " ".join(nom.split())[: Competence._meta.get_field("nom").max_length]
+        if nom and nom not in noms:
+            noms.append(nom)
+    return noms
+
+
+class Vocabulaire:
+    """Cache en mémoire du vocabulaire nom -> identifiant"""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.identifiants = {}
+
+    def identifiants_pour(self, noms, creer=True):
+        correspondances = self.correspondances(noms, creer=creer)
+        return [correspondances[nom] for nom in noms if nom in correspondances]
+
+    def correspondances(self, noms, creer=True):
+        """Retourne {nom: identifiant}, en créant les compétences inconnues"""
+        with self.verrou:
+            manquants = [nom for nom in noms if nom not in self.identifiants]
+        if manquants:
+            connus = dict(
+                Competence.objects.filter(nom__in=manquants).values_list("nom", "id")
+            )
+            nouveaux = [nom for nom in manquants if nom not in connus]
+            if nouveaux and creer:
+                Competence.objects.bulk_create(
+                    [Competence(nom=nom) for nom in nouveaux], ignore_conflicts=True
+                )
+                connus.update(
+                    Competence.objects.filter(nom__in=nouveaux).values_list("nom", "id")
+                )
+            # mis en cache une fois validés: un rollback ne doit pas laisser
+            # d'identifiants fantômes
+            transaction.on_commit(lambda: self.memoriser(connus))
+        else:
+            connus = {}
+        with self.verrou:
+            return {
+                nom: self.identifiants.get(nom, connus.get(nom))
+                for nom in noms
+                if nom in self.identifiants or nom in connus
+            }
+
+    def memoriser(self, connus):
+        with self.verrou:
+            self.identifiants.update(connus)
+
+    def vider(self):
+        with self.verrou:
+            self.identifiants.clear()
+
+
+vocabulaire = Vocabulaire()
+
+
+def encoder(identifiants):
+    """Encode des identifiants de compétences en entiers 32 bits triés"""
+    identifiants = sorted(set(identifiants))
+    return struct.pack(f"<{len(identifiants)}I", *identifiants)
+
+
+def decoder(vecteur):
+    """Ensemble des identifiants d'un vecteur encodé"""
+    vecteur = bytes(vecteur or b"")
+    return frozenset(struct.unpack(f"<{len(vecteur) // 4}I", vecteur))
+
+
+def vecteur_pour(texte, creer=True):
+    """Vecteur des compétences d'un texte libre"""
+    return encoder(
+        vocabulaire.identifiants_pour(normaliser_competences(texte), creer=creer)
+    )
+
+
+def vecteurs_pour(textes, creer=True):
+    """Vecteurs de plusieurs textes, avec une seule résolution du vocabulaire"""
+    listes = [normaliser_competences(texte) for texte in textes]
+    noms = list(dict.fromkeys(nom for liste in listes for nom in liste))
+    identifiants = vocabulaire.correspondances(noms, creer=creer)
+    return [
+        encoder(identifiants[nom] for nom in liste if nom in identifiants)
+        for liste in listes
+    ]
+
+
+def lignes_competences(candidat_id, vecteur):
+    """Lignes de l'index CompetenceCandidat d'un profil"""
+    return [
+        CompetenceCandidat(competence_id=identifiant, candidat_id=candidat_id)
+        for identifiant in sorted(decoder(vecteur))
+    ]
+
+
+def score(requis, disponibles):
+    """
+    Part des compétences requises couvertes, départagée par la similarité de
+    Jaccard pour favoriser les profils les plus ciblés
+    """
+    if not requis or not disponibles:
+        return 0.0
+    communes = len(requis & disponibles)
+    if not communes:
+        return 0.0
+    couverture = communes / len(requis)
+    jaccard = communes / (len(requis) + len(disponibles) - communes)
+    return round(couverture + jaccard / 1000, 6)
+
+
+def meilleures_correspondances(requis, lignes, nombre, cle_score=score):
+    """Retourne les ``nombre`` meilleurs (id, score) parmi des lignes (id, vecteur)"""
+    if not requis:
+        return []
+    scores = (
+        (cle_score(requis, decoder(vecteur)), identifiant)
+        for identifiant, vecteur in lignes
+    )
+    return [
+        (identifiant, valeur)
+        for valeur, identifiant in heapq.nlargest(
+            nombre, (paire for paire in scores if paire[0] > 0)
+        )
+    ]
+
+
+def meilleurs_candidats(offre, nombre=10):
+    """
+    Les candidats dont le profil couvre le mieux les compétences de l'offre,
+    notés parmi ceux qui en partagent au moins une (index CompetenceCandidat)
+    """
+    requis = decoder(offre.vecteur_competences)
+    if not requis:
+        return []
+    lignes = (
+        User.objects.filter(
+            role="candidat",
+            id__in=CompetenceCandidat.objects.filter(competence_id__in=requis).values(
+                "candidat_id"
+            ),
+        )
+        .values_list("id", "vecteur_competences")
+        .iterator(chunk_size=2000)
+    )
+    resultats = meilleures_correspondances(requis, lignes, nombre)
+    return _instances(User.objects.all(), resultats)
+
+
+def meilleures_offres(utilisateur, nombre=10):
+    """Les offres dont les compétences requises sont les mieux couvertes"""
+    disponibles = decoder(utilisateur.vecteur_competences)
+    lignes = (
+        Offre.objects.exclude(vecteur_competences=b"")
+        .values_list("id", "vecteur_competences")
+        .iterator(chunk_size=2000)
+    )
+    resultats = meilleures_correspondances(
+        disponibles,
+        lignes,
+        nombre,
+        cle_score=lambda disponibles, requis: score(requis, disponibles),
+    )
+    return _instances(Offre.objects.all(), resultats)
+
+
+def _instances(queryset, resultats):
+    """Charge les instances classées et leur attache leur score"""
+    instances = queryset.in_bulk([identifiant for identifiant, _ in resultats])
+    classees = []
+    for identifiant, valeur in resultats:
+        instance = instances.get(identifiant)
+        if instance is not None:
+            instance.score = valeur
+            classees.append(instance)
+    return classees
@@ -0,0 +1,104 @@
+"""
+Publication/abonnement en mémoire du processus pour les flux SSE.
+
+Les signaux publient après validation de la transaction (depuis un thread
+quelconque), les vues asynchrones s'abonnent à un canal et reçoivent les
+messages dans une file asyncio, sans thread ni connexion à la base par
+abonné. Le diffuseur est choisi par le réglage DIFFUSEUR_EVENEMENTS: un
+courtier (Redis, PostgreSQL LISTEN/NOTIFY...) peut remplacer DiffuseurLocal
+en exposant les mêmes méthodes publier() et abonner(), et l'attribut
+inter_processus à True. Sans lui, les flux sondent aussi l'outbox
+périodiquement pour recevoir les événements validés par les autres processus.
+"""
+
+import asyncio
+import functools
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TAILLE_FILE = 100
+
+
+class Abonnement:
+    """File d'un abonné. debordee: des messages ont été perdus, à rattraper"""
+
+    def __init__(self, diffuseur, canal):
+        self.diffuseur = diffuseur
+        self.canal = canal
+        self.boucle = asyncio.get_running_loop()
+        self.file = asyncio.Queue(maxsize=TAILLE_FILE)
+        self.debordee = False
+
+    def deposer(self, message):
+        # exécuté dans la boucle de l'abonné
+        try:
+            self.file.put_nowait(message)
+        except asyncio.QueueFull:
+            self.debordee = True
+
+    async def recevoir(self, delai):
+        """Prochain message, ou None au bout de delai secondes"""
+        try:
+            return await asyncio.wait_for(self.file.get(), delai)
+        except asyncio.TimeoutError:
+            return None
+
+    def fermer(self):
+        self.diffuseur.desabonner(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class DiffuseurLocal:
+    """Diffuseur en mémoire: ne relie que les requêtes d'un même processus"""
+
+    inter_processus = False
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.abonnes = defaultdict(set)
+
+    def abonner(self, canal):
+        abonnement = Abonnement(self, canal)
+        with self.verrou:
+            self.abonnes[canal].add(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement):
+        with self.verrou:
+            abonnes = self.abonnes.get(abonnement.canal)
+            if abonnes is not None:
+                abonnes.discard(abonnement)
+                if not abonnes:
+                    del self.abonnes[abonnement.canal]
+
+    def publier(self, canal, message):
+        with self.verrou:
+            abonnes = list(self.abonnes.get(canal, ()))
+        for abonnement in abonnes:
+            try:
+                abonnement.boucle.call_soon_threadsafe(abonnement.deposer, message)
+            except RuntimeError:
+                # boucle fermée: l'abonné est parti
+                self.desabonner(abonnement)
+
+    def nombre_abonnes(self):
+        with self.verrou:
+            return sum(len(abonnes) for abonnes in self.abonnes.values())
+
+
+@functools.cache
+def diffuseur():
+    chemin = getattr(settings, "DIFFUSEUR_EVENEMENTS", "api.diffusion.DiffuseurLocal")
+    return import_string(chemin)()
+
+
+def canal_candidat(candidat_id):
+    return f"candidat:{candidat_id}"
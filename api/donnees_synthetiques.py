@@ -0,0 +1,354 @@
+"""
+Jeux de données synthétiques (commande seed_data): recruteurs, candidats,
+offres et candidatures aux distributions réalistes. Quelques compétences
+très demandées et une longue traîne, et des offres plus ou moins populaires
+qui concentrent les candidatures.
+
+Les lignes sont insérées par lots, avec COPY sous PostgreSQL et bulk_create
+ailleurs. Seuls les ids sont gardés en mémoire, dans des tableaux compacts.
+À graine égale, le contenu généré est identique.
+
+Ni COPY ni bulk_create n'émettent de signaux. Les vecteurs de compétences
+et leur index par candidat sont calculés ici, et les statistiques par offre
+recalculées à la fin.
+"""
+
+import bisect
+import csv
+import io
+import random
+from array import array
+from dataclasses import dataclass
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models, transaction
+
+from .cache import invalider_liste_offres
+from .competences import lignes_competences, vecteurs_pour
+from .models import Candidature, Offre, StatistiqueOffre, User
+from .recherche import index_offres, utilise_postgresql
+
+PREFIXE = "bench"
+MOT_DE_PASSE = "bench-mot-de-passe"
+
+
+@dataclass(frozen=True)
+class Volumes:
+    recruteurs: int
+    candidats: int
+    offres: int
+    candidatures: int
+
+
+PROFILS = {
+    "petit": Volumes(recruteurs=20, candidats=500, offres=2_000, candidatures=10_000),
+    "moyen": Volumes(
+        recruteurs=1_000, candidats=20_000, offres=100_000, candidatures=500_000
+    ),
+    "production": Volumes(
+        recruteurs=10_000,
+        candidats=200_000,
+        offres=1_000_000,
+        candidatures=5_000_000,
+    ),
+}
+
+COMPETENCES = (
+    "python django postgresql javascript react typescript docker kubernetes "
+    "linux git sql java spring kotlin go rust c++ aws azure gcp terraform "
+    "ansible redis kafka rabbitmq elasticsearch graphql rest vue angular node "
+    "php symfony laravel figma scrum agile jira excel sap salesforce anglais "
+    "allemand espagnol comptabilité gestion de projet management vente "
+    "marketing digital seo communication rédaction"
+).split()
+
+POSTES = (
+    "Développeur",
+    "Ingénieur",
+    "Architecte",
+    "Chef de projet",
+    "Analyste",
+    "Consultant",
+    "Administrateur",
+    "Responsable",
+    "Technicien",
+    "Designer",
+)
+DOMAINES = (
+    "backend",
+    "frontend",
+    "full stack",
+    "données",
+    "cloud",
+    "sécurité",
+    "mobile",
+    "réseau",
+    "produit",
+    "commercial",
+)
+NIVEAUX = ("junior", "confirmé", "senior", "principal")
+PHRASES = (
+    "Vous rejoindrez une équipe de {n} personnes sur un produit utilisé au quotidien.",
+    "Le poste est basé à {ville}, avec deux jours de télétravail par semaine.",
+    "Vous participerez à la conception, au développement et à la maintenance.",
+    "Une première expérience en {competence} est un plus.",
+    "Nous travaillons en méthode agile, avec des livraisons fréquentes.",
+    "Vous serez accompagné par un référent technique dès votre arrivée.",
+    "La maîtrise de {competence} est indispensable pour ce poste.",
+    "Vous interviendrez auprès de clients des secteurs banque et assurance.",
+)
+VILLES = ("Paris", "Lyon", "Nantes", "Lille", "Bordeaux", "Toulouse", "Rennes")
+STATUTS = ("en attente",) * 6 + ("acceptée", "refusée", "refusée")
+
+# loi de Zipf: poids 1/rang, la première compétence est la plus demandée
+POIDS_COMPETENCES = [1 / rang for rang in range(1, len(COMPETENCES) + 1)]
+# popularité des offres (loi de Pareto): une minorité reçoit la plupart des
+# candidatures
+FORME_POPULARITE = 1.2
+
+
+def lots(elements, taille):
+    elements = iter(elements)
+    while lot := list(islice(elements, taille)):
+        yield lot
+
+
+class Fabrique:
+    """Générateur déterministe des valeurs des champs"""
+
+    def __init__(self, graine):
+        self.aleatoire = random.Random(graine)
+
+    def competences(self, minimum=2, maximum=8):
+        nombre = self.aleatoire.randint(minimum, maximum)
+        choisies = self.aleatoire.choices(COMPETENCES, POIDS_COMPETENCES, k=nombre)
+        return ", ".join(dict.fromkeys(choisies))
+
+    def titre(self):
+        return " ".join(
+            (
+                self.aleatoire.choice(POSTES),
+                self.aleatoire.choice(DOMAINES),
+                self.aleatoire.choice(NIVEAUX),
+            )
+        )
+
+    def description(self, minimum=3, maximum=8):
+        phrases = self.aleatoire.choices(
+            PHRASES, k=self.aleatoire.randint(minimum, maximum)
+        )
+        return " ".join(
+            phrase.format(
+                n=self.aleatoire.randint(3, 40),
+                ville=self.aleatoire.choice(VILLES),
+                competence=self.aleatoire.choice(COMPETENCES),
+            )
+            for phrase in phrases
+        )
+
+    def salaire(self):
+        return self.aleatoire.randrange(28_000, 95_000, 500)
+
+    def popularites(self, nombre):
+        """Poids cumulés de nombre offres, pour un tirage par bisection"""
+        return array(
+            "d",
+            accumulate(
+                self.aleatoire.paretovariate(FORME_POPULARITE) for _ in range(nombre)
+            ),
+        )
+
+    def offres_distinctes(self, cumul, quantite):
+        """quantite indices distincts tirés selon les poids cumulés"""
+        choisis = set()
+        total = cumul[-1]
+        while len(choisis) < quantite:
+            choisis.add(bisect.bisect(cumul, self.aleatoire.random() * total))
+        return sorted(choisis)
+
+
+class Insertion:
+    """
+    Insère des lots d'instances et leur attribue leur clé primaire: COPY sous
+    PostgreSQL (ids réservés dans la séquence), bulk_create sinon
+    """
+
+    def __init__(self, copie=None):
+        self.copie = utilise_postgresql() if copie is None else copie
+
+    def inserer(self, objets):
+        if not objets:
+            return objets
+        if not self.copie:
+            return type(objets[0]).objects.bulk_create(objets)
+        modele = type(objets[0])
+        table = modele._meta.db_table
+        # les colonnes tsvector sont remplies par les triggers
+        champs = [
+            champ
+            for champ in modele._meta.concrete_fields
+            if not isinstance(champ, SearchVectorField)
+        ]
+        with connection.cursor() as curseur:
+            curseur.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s))"
+                " FROM generate_series(1, %s)",
+                [table, modele._meta.pk.column, len(objets)],
+            )
+            for objet, (identifiant,) in zip(objets, curseur.fetchall()):
+                objet.pk = identifiant
+
+            tampon = io.StringIO()
+            ecrivain = csv.writer(tampon)
+            for objet in objets:
+                ecrivain.writerow(valeur_copie(champ, objet) for champ in champs)
+            tampon.seek(0)
+            colonnes = ", ".join(
+                connection.ops.quote_name(champ.column) for champ in champs
+            )
+            requete = (
+                f"COPY {connection.ops.quote_name(table)} ({colonnes})"
+                " FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            )
+            brut = curseur.cursor
+            if hasattr(brut, "copy_expert"):  # psycopg2
+                brut.copy_expert(requete, tampon)
+            else:  # psycopg 3
+                with brut.copy(requete) as copie:
+                    copie.write(tampon.read())
+        return objets
+
+
+def valeur_copie(champ, objet):
+    """Valeur d'un champ au format CSV de COPY, \\N pour NULL"""
+    valeur = champ.pre_save(objet, add=True)
+    if valeur is None:
+        return "\\N"
+    if isinstance(champ, models.BinaryField):
+        return "\\x" + bytes(valeur).hex()
+    return champ.get_prep_value(valeur)
+
+
+def creer_utilisateurs(insertion, fabrique, role, nombre, mot_de_passe, taille_lot):
+    """Insère nombre utilisateurs du rôle donné, retourne leurs ids"""
+    identifiants = array("q")
+    for lot in lots(range(nombre), taille_lot):
+        utilisateurs = [
+            User(
+                username=f"{PREFIXE}-{role}-{numero}",
+                email=f"{PREFIXE}-{role}-{numero}@example.com",
+                password=mot_de_passe,
+                role=role,
+                bio=fabrique.description(1, 2) if role == "candidat" else None,
+                competences=fabrique.competences() if role == "candidat" else None,
+                experience=f"{fabrique.aleatoire.randint(0, 20)} ans",
+            )
+            for numero in lot
+        ]
+        vecteurs = vecteurs_pour(
+            utilisateur.competences for utilisateur in utilisateurs
+        )
+        for utilisateur, vecteur in zip(utilisateurs, vecteurs):
+            utilisateur.vecteur_competences = vecteur
+        with transaction.atomic():
+            utilisateurs = insertion.inserer(utilisateurs)
+            insertion.inserer(
+                [
+                    ligne
+                    for utilisateur in utilisateurs
+                    for ligne in lignes_competences(
+                        utilisateur.pk, utilisateur.vecteur_competences
+                    )
+                ]
+            )
+        identifiants.extend(utilisateur.pk for utilisateur in utilisateurs)
+    return identifiants
+
+
+def creer_offres(insertion, fabrique, recruteurs, nombre, taille_lot):
+    identifiants = array("q")
+    for lot in lots(range(nombre), taille_lot):
+        offres = [
+            Offre(
+                titre=fabrique.titre(),
+                description=fabrique.description(),
+                salaire=fabrique.salaire(),
+                competences_requises=fabrique.competences(),
+                recruteur_id=fabrique.aleatoire.choice(recruteurs),
+            )
+            for _ in lot
+        ]
+        vecteurs = vecteurs_pour(offre.competences_requises for offre in offres)
+        for offre, vecteur in zip(offres, vecteurs):
+            offre.vecteur_competences = vecteur
+        with transaction.atomic():
+            offres = insertion.inserer(offres)
+        identifiants.extend(offre.pk for offre in offres)
+    return identifiants
+
+
+def paires_candidatures(fabrique, candidats, offres, nombre):
+    """(candidat, offre) distincts, les offres populaires étant plus demandées"""
+    cumul = fabrique.popularites(len(offres))
+    par_candidat, reste = divmod(nombre, len(candidats))
+    for rang, candidat in enumerate(candidats):
+        quantite = min(par_candidat + (rang < reste), len(offres))
+        for indice in fabrique.offres_distinctes(cumul, quantite):
+            yield candidat, offres[indice]
+
+
+def creer_candidatures(insertion, fabrique, candidats, offres, nombre, taille_lot):
+    total = 0
+    for lot in lots(
+        paires_candidatures(fabrique, candidats, offres, nombre), taille_lot
+    ):
+        with transaction.atomic():
+            insertion.inserer(
+                [
+                    Candidature(
+                        candidat_id=candidat,
+                        offre_id=offre,
+                        statut=fabrique.aleatoire.choice(STATUTS),
+                        lettre_motivation=fabrique.description(1, 3),
+                    )
+                    for candidat, offre in lot
+                ]
+            )
+        total += len(lot)
+    return total
+
+
+def deja_peuplee():
+    return User.objects.filter(username__startswith=f"{PREFIXE}-").exists()
+
+
+def peupler(volumes, graine=0, taille_lot=5_000, copie=None, journal=print):
+    """Insère les volumes demandés; les comptes ont le mot de passe MOT_DE_PASSE"""
+    insertion = Insertion(copie)
+    fabrique = Fabrique(graine)
+    # un seul hachage, le même pour tous les comptes
+    mot_de_passe = make_password(MOT_DE_PASSE, salt=f"{PREFIXE}{graine}")
+
+    recruteurs = creer_utilisateurs(
+        insertion, fabrique, "recruteur", volumes.recruteurs, mot_de_passe, taille_lot
+    )
+    journal(f"{len(recruteurs)} recruteurs")
+    candidats = creer_utilisateurs(
+        insertion, fabrique, "candidat", volumes.candidats, mot_de_passe, taille_lot
+    )
+    journal(f"{len(candidats)} candidats")
+    offres = creer_offres(insertion, fabrique, recruteurs, volumes.offres, taille_lot)
+    journal(f"{len(offres)} offres")
+    if candidats and offres:
+        nombre = creer_candidatures(
+            insertion, fabrique, candidats, offres, volumes.candidatures, taille_lot
+        )
+        journal(f"{nombre} candidatures")
+
+    StatistiqueOffre.objects.reconstruire(taille_lot=taille_lot)
+    journal("statistiques recalculées")
+    # l'index de recherche en mémoire se reconstruira à la prochaine recherche
+    index_offres.vider()
+    invalider_liste_offres()
@@ -0,0 +1,197 @@
+"""
+Boîte d'envoi (outbox) des événements de candidature.
+
+Les événements sont écrits dans la transaction de la création ou du changement
+de statut (voir api/signals.py): un changement annulé n'émet rien, un
+changement validé n'est jamais perdu. La commande ``diffuser_evenements`` les
+transmet par lots, et les clients les suivent depuis un curseur, en long
+polling (vue synchrone) ou en Server-Sent Events (vue asynchrone, sous ASGI).
+Une fois la transaction validée, les événements sont aussi publiés aux flux
+asynchrones des candidats (voir api/diffusion.py).
+
+Le curseur est l'id de l'événement, propre à un recruteur ou à un candidat:
+parmi les événements d'un même utilisateur, les ids doivent suivre l'ordre de
+validation des transactions, sans quoi un client qui a lu l'id 11 ne verrait
+jamais l'id 10 validé après lui. Sous PostgreSQL, chaque transaction prend,
+avant d'écrire ses événements, un verrou consultatif par recruteur et par
+candidat concernés, gardé jusqu'à sa validation: seules les écritures d'un
+même utilisateur sont sérialisées, et tout id de cet utilisateur encore
+invisible est supérieur à ceux déjà visibles. SQLite n'admet qu'une
+transaction d'écriture à la fois, qui a déjà écrit la candidature.
+"""
+
+import asyncio
+import json
+import time
+import urllib.request
+from functools import partial
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .diffusion import canal_candidat, diffuseur
+from .models import Evenement
+
+ATTENTE_MAX = 25
+INTERVALLE_SONDAGE = 1.0
+DUREE_FLUX = 60
+TAILLE_LOT = 100
+ENCODEUR = DjangoJSONEncoder(ensure_ascii=False)
+SSE_RECONNEXION = "retry: 3000\n\n"
+SSE_ATTENTE = ": attente\n\n"
+
+
+def evenement(
+    type_evenement, candidature_id, offre_id, candidat_id, recruteur_id, **donnees
+):
+    return Evenement(
+        type=type_evenement,
+        candidature_id=candidature_id,
+        offre_id=offre_id,
+        candidat_id=candidat_id,
+        recruteur_id=recruteur_id,
+        donnees=donnees,
+    )
+
+
+def representation(evenement):
+    return {
+        "id": evenement.id,
+        "type": evenement.type,
+        "candidature": evenement.candidature_id,
+        "offre": evenement.offre_id,
+        "candidat": evenement.candidat_id,
+        "recruteur": evenement.recruteur_id,
+        "date": evenement.date_creation,
+        **evenement.donnees,
+    }
+
+
+def cles_verrous(evenements):
+    """
+    Clés des verrous consultatifs (pg_advisory_xact_lock) des recruteurs
+    (paires) et des candidats (impaires) des événements, triées: deux
+    transactions les prennent dans le même ordre
+    """
+    cles = set()
+    for evenement in evenements:
+        cles.add(evenement.recruteur_id * 2)
+        cles.add(evenement.candidat_id * 2 + 1)
+    return sorted(cles)
+
+
+def enregistrer(evenements):
+    """
+    Écrit les événements dans l'outbox, dans la transaction courante, et les
+    publie une fois celle-ci validée. Retourne les événements avec leurs ids
+    """
+    with transaction.atomic(savepoint=False):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as curseur:
+                curseur.execute(
+                    "SELECT pg_advisory_xact_lock(cle)"
+                    " FROM unnest(%s::bigint[]) WITH ORDINALITY AS c(cle, rang)"
+                    " ORDER BY rang",
+                    [cles_verrous(evenements)],
+                )
+        evenements = Evenement.objects.bulk_create(evenements)
+    transaction.on_commit(partial(publier, evenements))
+    return evenements
+
+
+def publier(evenements):
+    """Pousse les événements validés aux flux SSE des candidats concernés"""
+    for evenement in evenements:
+        diffuseur().publier(
+            canal_candidat(evenement.candidat_id), representation(evenement)
+        )
+
+
+def evenements_de(role, utilisateur_id):
+    """Événements des candidatures reçues (recruteur) ou envoyées (candidat)"""
+    if role == "recruteur":
+        return Evenement.objects.filter(recruteur_id=utilisateur_id)
+    return Evenement.objects.filter(candidat_id=utilisateur_id)
+
+
+def evenements_pour(utilisateur, curseur, limite=TAILLE_LOT):
+    """Événements concernant l'utilisateur, postérieurs au curseur"""
+    queryset = evenements_de(utilisateur.role, utilisateur.id)
+    return list(queryset.filter(id__gt=curseur).order_by("id")[:limite])
+
+
+def attendre_evenements(utilisateur, curseur, attente):
+    """Long polling: sonde la boîte d'envoi jusqu'à un événement ou l'échéance"""
+    echeance = time.monotonic() + attente
+    while True:
+        evenements = evenements_pour(utilisateur, curseur)
+        if evenements or time.monotonic() >= echeance:
+            return evenements
+        time.sleep(INTERVALLE_SONDAGE)
+
+
+async def flux_sse(role, utilisateur_id, curseur, duree=DUREE_FLUX):
+    """
+    Flux Server-Sent Events borné dans le temps, qui sonde l'outbox sans
+    occuper de thread entre deux lectures: le client se reconnecte avec
+    l'en-tête Last-Event-ID pour reprendre au dernier événement reçu
+    """
+    echeance = time.monotonic() + duree
+    yield SSE_RECONNEXION
+    while time.monotonic() < echeance:
+        evenements = evenements_de(role, utilisateur_id).filter(id__gt=curseur)
+        recus = False
+        async for evenement in evenements.order_by("id")[:TAILLE_LOT].aiterator():
+            recus = True
+            curseur = evenement.id
+            yield message_sse(representation(evenement))
+        if not recus:
+            yield SSE_ATTENTE
+            await asyncio.sleep(INTERVALLE_SONDAGE)
+
+
+def message_sse(donnees):
+    """Message SSE dont l'id est celui de l'événement, repris par Last-Event-ID"""
+    return (
+        f"id: {donnees['id']}\nevent: {donnees['type']}\n"
+        f"data: {ENCODEUR.encode(donnees)}\n\n"
+    )
+
+
+def diffuser(envoyer, taille_lot=TAILLE_LOT):
+    """
+    Transmet le plus ancien lot d'événements non diffusés et le marque comme
+    envoyé. Sous PostgreSQL, SKIP LOCKED permet plusieurs diffuseurs en
+    parallèle. Retourne le nombre d'événements diffusés
+    """
+    with transaction.atomic():
+        lot = list(
+            Evenement.objects.filter(date_envoi__isnull=True)
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:taille_lot]
+        )
+        if not lot:
+            return 0
+        # une erreur d'envoi annule la transaction: le lot sera retenté
+        envoyer([representation(evenement) for evenement in lot])
+        Evenement.objects.filter(id__in=[evenement.id for evenement in lot]).update(
+            date_envoi=timezone.now()
+        )
+    return len(lot)
+
+
+def webhook(url, delai=10):
+    """Envoi d'un lot en JSON par POST, une erreur HTTP lève une exception"""
+
+    def envoyer(evenements):
+        requete = urllib.request.Request(
+            url,
+            data=json.dumps({"evenements": evenements}, cls=DjangoJSONEncoder).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(requete, timeout=delai):
+            pass
+
+    return envoyer
@@ -0,0 +1,218 @@
+"""
+Extraction du texte des CV (PDF, DOCX, TXT) en Python pur, sans dépendance.
+
+L'extraction PDF lit les flux de contenu (décompressés s'ils sont en
+FlateDecode) et en retient les chaînes affichées par les opérateurs de texte.
+Les polices à encodage personnalisé (CMap) et les PDF scannés ne donnent pas
+de texte exploitable: la candidature reste alors simplement absente des
+résultats de recherche.
+"""
+
+import io
+import logging
+import os
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+TAILLE_MAX_FICHIER = 20 * 1024 * 1024
+TAILLE_MAX_TEXTE = 100_000
+# total des flux d'un PDF lus (après décompression): l'analyse des opérateurs
+# de texte, en Python, coûte de l'ordre d'une seconde par mégaoctet
+BUDGET_FLUX_PDF = 2 * 1024 * 1024
+
+ESPACE_WORD = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DEBUT_FLUX = re.compile(rb"\bobj\b(.{0,2048}?)\bstream\r?\n", re.S)
+# flux sans texte qui ne doivent pas entamer le budget: polices embarquées,
+# profils ICC, métadonnées XMP, flux d'objets et tables de références
+SANS_TEXTE = re.compile(
+    rb"/Length[123]\b|/Subtype\s*/(?:Type1C|CIDFontType0C|OpenType)"
+    rb"|/Alternate\b|/Type\s*/(?:Metadata|ObjStm|XRef)\b"
+)
+ECHAPPEMENTS = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+}
+# un décalage négatif important dans un tableau TJ sépare deux mots
+ESPACEMENT_MOT = -200
+
+
+def extraire_texte(chemin):
+    """Texte brut d'un CV selon son extension, ou None si le format est inconnu"""
+    extracteur = EXTRACTEURS.get(os.path.splitext(chemin)[1].lower())
+    if extracteur is None or os.path.getsize(chemin) > TAILLE_MAX_FICHIER:
+        return None
+    with open(chemin, "rb") as fichier:
+        texte = extracteur(fichier.read())
+    texte = re.sub(r"[ \t\r\f\v]+", " ", texte or "")
+    texte = re.sub(r"\s*\n\s*", "\n", texte).strip()
+    return texte[:TAILLE_MAX_TEXTE] or None
+
+
+def texte_txt(donnees):
+    try:
+        return donnees.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return donnees.decode("cp1252", errors="replace")
+
+
+def texte_docx(donnees):
+    with zipfile.ZipFile(io.BytesIO(donnees)) as archive:
+        info = archive.getinfo("word/document.xml")
+        if info.file_size > TAILLE_MAX_FICHIER:
+            return None
+        with archive.open(info) as document:
+            morceaux = []
+            for _, element in ElementTree.iterparse(document):
+                if element.tag == f"{ESPACE_WORD}t":
+                    morceaux.append(element.text or "")
+                elif element.tag in (f"{ESPACE_WORD}tab", f"{ESPACE_WORD}br"):
+                    morceaux.append(" ")
+                elif element.tag == f"{ESPACE_WORD}p":
+                    morceaux.append("\n")
+                    element.clear()
+    return "".join(morceaux)
+
+
+def texte_pdf(donnees):
+    morceaux, longueur = [], 0
+    for flux in flux_pdf(donnees):
+        if b"BT" in flux:
+            morceaux.append(texte_flux(flux))
+            longueur += len(morceaux[-1])
+            if longueur >= TAILLE_MAX_TEXTE:
+                break
+    return "\n".join(morceaux)
+
+
+def flux_pdf(donnees, budget=BUDGET_FLUX_PDF):
+    """
+    Flux de contenu d'un PDF, décompressés si nécessaire, jusqu'à budget
+    octets au total: une bombe de décompression s'arrête au premier flux qui
+    épuise le budget
+    """
+    for correspondance in DEBUT_FLUX.finditer(donnees):
+        if budget <= 0:
+            return
+        dictionnaire = correspondance.group(1)
+        debut = correspondance.end()
+        fin = donnees.find(b"endstream", debut)
+        if fin < 0 or b"/Image" in dictionnaire or SANS_TEXTE.search(dictionnaire):
+            continue
+        flux = donnees[debut:fin]
+        if b"/FlateDecode" in dictionnaire:
+            try:
+                flux = zlib.decompressobj().decompress(flux, budget)
+            except zlib.error:
+                continue
+        elif b"/Filter" in dictionnaire:
+            # autres filtres (DCT, LZW...): pas de texte exploitable
+            continue
+        else:
+            flux = flux[:budget]
+        budget -= len(flux)
+        yield flux
+
+
+def texte_flux(flux):
+    """Chaînes affichées par les opérateurs Tj, TJ, ' et " d'un flux de contenu"""
+    lignes, ligne, operandes = [], [], []
+    position, taille = 0, len(flux)
+    while position < taille:
+        caractere = flux[position]
+        if caractere == ord("("):
+            chaine, position = chaine_litterale(flux, position + 1)
+            operandes.append(chaine)
+        elif caractere == ord("<") and flux[position + 1 : position + 2] != b"<":
+            fin = flux.find(b">", position)
+            if fin < 0:
+                break
+            chiffres = re.sub(rb"\s", b"", flux[position + 1 : fin])
+            try:
+                operandes.append(
+                    bytes.fromhex((chiffres + b"0" * (len(chiffres) % 2)).decode())
+                )
+            except ValueError:
+                pass
+            position = fin + 1
+        elif caractere == ord("/"):
+            # nom (police, ressource): ignoré jusqu'au prochain délimiteur
+            position += 1
+            while position < taille and flux[position] not in b" \t\r\n/[]()<>":
+                position += 1
+        elif caractere == ord("%"):
+            fin = flux.find(b"\n", position)
+            position = taille if fin < 0 else fin + 1
+        elif chr(caractere).isalpha() or caractere in b"'\"*":
+            fin = position
+            while fin < taille and (chr(flux[fin]).isalpha() or flux[fin] in b"'\"*"):
+                fin += 1
+            operateur = flux[position:fin]
+            if operateur in (b"'", b'"', b"T*", b"Td", b"TD", b"ET"):
+                lignes.append("".join(ligne))
+                ligne = []
+            if operateur in (b"Tj", b"TJ", b"'", b'"'):
+                ligne.extend(
+                    decoder_chaine(o) if isinstance(o, bytes) else o for o in operandes
+                )
+            operandes = []
+            position = fin
+        elif caractere in b"-+.0123456789":
+            fin = position + 1
+            while fin < taille and flux[fin] in b".0123456789":
+                fin += 1
+            try:
+                if float(flux[position:fin]) <= ESPACEMENT_MOT:
+                    operandes.append(" ")
+            except ValueError:
+                pass
+            position = fin
+        else:
+            position += 1
+    lignes.append("".join(ligne))
+    return "\n".join(lignes)
+
+
+def chaine_litterale(flux, position):
+    """Lit une chaîne (…) avec parenthèses imbriquées et échappements"""
+    resultat = bytearray()
+    profondeur = 1
+    while position < len(flux):
+        caractere = flux[position]
+        if caractere == ord("\\"):
+            suivant = flux[position + 1 : position + 2]
+            octal = re.match(rb"[0-7]{1,3}", flux[position + 1 : position + 4])
+            if octal:
+                resultat.append(int(octal.group(), 8) & 0xFF)
+                position += 1 + len(octal.group())
+                continue
+            if suivant in (b"\n", b"\r"):
+                position += 2
+                continue
+            resultat += ECHAPPEMENTS.get(suivant[0], suivant) if suivant else b""
+            position += 2
+            continue
+        if caractere == ord("("):
+            profondeur += 1
+        elif caractere == ord(")"):
+            profondeur -= 1
+            if not profondeur:
+                return bytes(resultat), position + 1
+        resultat.append(caractere)
+        position += 1
+    return bytes(resultat), position
+
+
+def decoder_chaine(chaine):
+    if chaine.startswith(b"\xfe\xff"):
+        return chaine[2:].decode("utf-16-be", errors="ignore")
+    return chaine.decode("cp1252", errors="replace")
+
+
+EXTRACTEURS = {".pdf": texte_pdf, ".docx": texte_docx, ".txt": texte_txt}
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.evenements import TAILLE_LOT, diffuser, webhook
+
+
+class Command(BaseCommand):
+    help = "Transmet par lots au webhook les événements de candidature de l'outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default=getattr(settings, "EVENEMENTS_WEBHOOK_URL", ""),
+            help="Adresse qui reçoit les lots en POST (EVENEMENTS_WEBHOOK_URL)",
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=TAILLE_LOT,
+            help="Nombre d'événements par envoi",
+        )
+        parser.add_argument(
+            "--continu",
+            action="store_true",
+            help="Continue à diffuser les nouveaux événements au lieu de s'arrêter",
+        )
+        parser.add_argument(
+            "--intervalle",
+            type=float,
+            default=1.0,
+            help="Pause en secondes quand l'outbox est vide (avec --continu)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["url"]:
+            raise CommandError("Aucune adresse: --url ou EVENEMENTS_WEBHOOK_URL.")
+        envoyer = webhook(options["url"])
+
+        total = 0
+        while True:
+            try:
+                diffuses = diffuser(envoyer, options["taille_lot"])
+            except Exception as erreur:
+                if not options["continu"]:
+                    raise CommandError(f"Échec de l'envoi: {erreur}") from erreur
+                # le lot reste dans l'outbox et sera retenté
+                self.stderr.write(f"Échec de l'envoi: {erreur}")
+                diffuses = 0
+            total += diffuses
+            if diffuses:
+                continue
+            if not options["continu"]:
+                break
+            time.sleep(options["intervalle"])
+        self.stdout.write(self.style.SUCCESS(f"{total} événements diffusés"))
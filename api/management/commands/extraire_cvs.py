@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Candidature
+from api.taches import extraire_cv
+
+
+class Command(BaseCommand):
+    help = "Extrait le texte des CV qui n'ont pas encore été indexés pour la recherche"
+
+    def handle(self, *args, **options):
+        candidatures = (
+            Candidature.objects.filter(texte_cv__isnull=True, cv__startswith="cvs/")
+            .exclude(cv__startswith="cvs/spool/")
+            .values_list("id", "cv")
+        )
+        total = 0
+        for candidature_id, nom in candidatures.iterator():
+            extraire_cv(candidature_id, nom)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"{total} CV traités"))
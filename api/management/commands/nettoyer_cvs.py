@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import Candidature, FichierCV
+from api.stockage import DOSSIER_CVS, empreinte_depuis_nom, stockage_cv
+from api.taches import DOSSIER_SPOOL
+
+
+class Command(BaseCommand):
+    help = "Supprime les fichiers CV qui ne sont plus référencés par aucune candidature"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delai",
+            type=int,
+            default=24,
+            help="Délai en heures entre la perte de la dernière référence"
+            " d'un fichier et sa suppression",
+        )
+        parser.add_argument(
+            "--recompter",
+            action="store_true",
+            help="Recalcule les références depuis les candidatures avant le nettoyage",
+        )
+        parser.add_argument(
+            "--simulation",
+            action="store_true",
+            help="Affiche les fichiers à supprimer sans les supprimer",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options["delai"])
+        simulation = options["simulation"]
+
+        if options["recompter"] and not simulation:
+            self.recompter()
+
+        # un fichier encore nommé par une candidature n'est jamais supprimé
+        utilises = set(
+            Candidature.objects.exclude(cv="")
+            .exclude(cv__isnull=True)
+            .values_list("cv", flat=True)
+            .distinct()
+        )
+        references = set(
+            FichierCV.objects.filter(
+                references__lte=0, dereference_le__lt=limite
+            ).values_list("nom", flat=True)
+        )
+        connus = set(FichierCV.objects.values_list("nom", flat=True))
+        # fichiers présents sur disque sans ligne FichierCV (rangés puis
+        # abandonnés par le traitement en arrière-plan, restes du spool)
+        orphelins = set()
+        for dossier, filtre in (
+            (DOSSIER_CVS, lambda nom: empreinte_depuis_nom(nom) and nom not in connus),
+            (DOSSIER_SPOOL, lambda nom: True),
+        ):
+            if not stockage_cv.exists(dossier):
+                continue
+            for fichier in stockage_cv.listdir(dossier)[1]:
+                nom = f"{dossier}/{fichier}"
+                if filtre(nom) and stockage_cv.get_modified_time(nom) < limite:
+                    orphelins.add(nom)
+        orphelins -= utilises
+        references -= utilises
+
+        total = 0
+        for nom in sorted(orphelins | references):
+            if simulation or self.supprimer(nom, limite, ligne=nom in references):
+                self.stdout.write(nom)
+                total += 1
+
+        verbe = "à supprimer" if simulation else "supprimés"
+        self.stdout.write(self.style.SUCCESS(f"{total} fichiers CV {verbe}"))
+
+    @transaction.atomic
+    def supprimer(self, nom, limite, ligne):
+        """
+        Supprime le fichier et, s'il en a une, sa ligne FichierCV après avoir
+        vérifié sous verrou qu'il est toujours orphelin. Le verrou est tenu
+        jusqu'à la suppression du fichier: un dépôt dédupliqué sur ce contenu
+        (FichierCV.objects.reutiliser) l'attend, puis écrit de nouveau le fichier
+        """
+        if not ligne:
+            stockage_cv.delete(nom)
+            return True
+        fichier = (
+            FichierCV.objects.select_for_update()
+            .filter(nom=nom, references__lte=0, dereference_le__lt=limite)
+            .first()
+        )
+        if fichier is None:
+            return False
+        stockage_cv.delete(nom)
+        fichier.delete()
+        return True
+
+    def recompter(self):
+        comptes = dict(
+            Candidature.objects.exclude(cv="")
+            .exclude(cv__isnull=True)
+            .values_list("cv")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for fichier in FichierCV.objects.only(
+            "nom", "references", "dereference_le"
+        ).iterator():
+            total = comptes.pop(fichier.nom, 0)
+            if fichier.references != total:
+                FichierCV.objects.filter(nom=fichier.nom).update(
+                    references=total,
+                    dereference_le=(
+                        None if total > 0 else fichier.dereference_le or timezone.now()
+                    ),
+                )
+        for nom in comptes:
+            FichierCV.objects.ajuster(nom, comptes[nom])
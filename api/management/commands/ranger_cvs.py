@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Candidature, FichierCV
+from api.stockage import DOSSIER_CVS, empreinte_depuis_nom, stockage_cv
+from api.taches import DOSSIER_SPOOL
+
+
+class Command(BaseCommand):
+    help = (
+        "Range par empreinte les CV enregistrés avant le stockage adressé par"
+        " contenu et les recense dans FichierCV"
+    )
+
+    def handle(self, *args, **options):
+        noms = (
+            Candidature.objects.filter(cv__startswith=f"{DOSSIER_CVS}/")
+            .exclude(cv__startswith=f"{DOSSIER_SPOOL}/")
+            .values_list("cv", flat=True)
+            .distinct()
+            .order_by()
+        )
+        total = 0
+        for nom in noms.iterator():
+            if empreinte_depuis_nom(nom):
+                continue
+            if not stockage_cv.exists(nom):
+                self.stderr.write(f"{nom} introuvable")
+                continue
+            nom_final = stockage_cv.ranger(nom)
+            with transaction.atomic():
+                # update() n'émet pas post_save: les références sont comptées ici
+                mises_a_jour = Candidature.objects.filter(cv=nom).update(
+                    cv=nom_final,
+                    empreinte_cv=empreinte_depuis_nom(nom_final),
+                    date_modification=timezone.now(),
+                )
+                FichierCV.objects.ajuster(nom_final, mises_a_jour)
+            self.stdout.write(f"{nom} -> {nom_final}")
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"{total} CV rangés"))
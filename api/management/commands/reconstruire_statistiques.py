@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.models import StatistiqueOffre
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement la table des statistiques de candidatures par offre"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=1000,
+            help="Nombre de lignes insérées par requête",
+        )
+
+    def handle(self, *args, **options):
+        total = StatistiqueOffre.objects.reconstruire(taille_lot=options["taille_lot"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} lignes de statistiques reconstruites")
+        )
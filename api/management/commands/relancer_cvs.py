@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Candidature
+from api.taches import DOSSIER_SPOOL, traiter_cv
+
+
+class Command(BaseCommand):
+    help = (
+        "Reprend le traitement des CV restés en attente dans le spool"
+        " (tâches perdues lors d'un redémarrage)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delai",
+            type=int,
+            default=15,
+            help="Ancienneté minimale en minutes d'un traitement à reprendre",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options["delai"])
+        candidatures = Candidature.objects.filter(
+            statut_cv="en traitement",
+            cv__startswith=f"{DOSSIER_SPOOL}/",
+            date_modification__lt=limite,
+        ).values_list("id", "cv")
+        total = 0
+        for candidature_id, nom_spool in candidatures.iterator():
+            traiter_cv(candidature_id, nom_spool)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"{total} CV repris"))
@@ -0,0 +1,76 @@
+import time
+from dataclasses import replace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.donnees_synthetiques import (
+    MOT_DE_PASSE,
+    PREFIXE,
+    PROFILS,
+    deja_peuplee,
+    peupler,
+)
+from api.recherche import utilise_postgresql
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données synthétique (recruteurs, candidats, offres et"
+        " candidatures), identique à graine égale"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profil",
+            choices=sorted(PROFILS),
+            default="petit",
+            help="Volumes prédéfinis, que les options suivantes remplacent",
+        )
+        for nom in ("recruteurs", "candidats", "offres", "candidatures"):
+            parser.add_argument(f"--{nom}", type=int, help=f"Nombre de {nom}")
+        parser.add_argument("--graine", type=int, default=0)
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=5000,
+            help="Nombre de lignes insérées par requête",
+        )
+        parser.add_argument(
+            "--sans-copy",
+            action="store_true",
+            help="Insère par bulk_create même sous PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        if deja_peuplee():
+            raise CommandError(
+                f"La base contient déjà des comptes {PREFIXE}-*: supprimez-les"
+                " ou utilisez une autre base."
+            )
+        volumes = replace(
+            PROFILS[options["profil"]],
+            **{
+                nom: options[nom]
+                for nom in ("recruteurs", "candidats", "offres", "candidatures")
+                if options[nom] is not None
+            },
+        )
+        copie = utilise_postgresql() and not options["sans_copy"]
+
+        debut = time.perf_counter()
+        peupler(
+            volumes,
+            graine=options["graine"],
+            taille_lot=options["taille_lot"],
+            copie=copie,
+            journal=lambda message: self.stdout.write(
+                f"[{time.perf_counter() - debut:7.1f} s] {message}"
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Données générées en {time.perf_counter() - debut:.1f} s"
+                f" ({'COPY' if copie else 'bulk_create'}), mot de passe des"
+                f" comptes: {MOT_DE_PASSE}"
+            )
+        )
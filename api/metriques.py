@@ -0,0 +1,248 @@
+"""
+Mesures par requête, agrégées en histogrammes dans le processus et exposées
+au format texte de Prometheus sur /metrics.
+
+Le middleware ``MesureRequetesMiddleware`` (api/middleware.py) place une
+``Mesure`` dans une variable de contexte pour la durée de la requête; le
+wrapper d'exécution installé sur chaque connexion à la base y compte les
+requêtes SQL et leur durée, y compris depuis les threads de sync_to_async,
+qui héritent du contexte. La propriété ``data`` des serializers DRF est
+enveloppée de même pour mesurer la sérialisation. Les histogrammes sont propres à chaque processus:
+avec plusieurs workers, chacun expose les siens.
+"""
+
+import contextvars
+import heapq
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.serializers import BaseSerializer
+
+TYPE_CONTENU = "text/plain; version=0.0.4; charset=utf-8"
+
+# requêtes SQL les plus lentes gardées par requête HTTP, pour les journaux
+NOMBRE_REQUETES_LENTES = 3
+
+SEUILS_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SEUILS_REQUETES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SEUILS_TAILLE = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+@dataclass
+class Mesure:
+    """Ce qu'une requête HTTP a coûté, rempli au fil de son traitement"""
+
+    debut: float = field(default_factory=time.perf_counter)
+    requetes_sql: int = 0
+    duree_sql: float = 0.0
+    plus_lentes: list = field(default_factory=list)
+    debut_vue: float = None
+    duree_vue: float = None
+    debut_rendu: float = None
+    duree_rendu: float = None
+    duree_serialisation: float = None
+    en_serialisation: bool = False
+
+    def enregistrer_requete(self, sql, duree):
+        self.requetes_sql += 1
+        self.duree_sql += duree
+        # tas des plus lentes: (durée, rang, sql), le rang départage les ex aequo
+        entree = (duree, self.requetes_sql, sql)
+        if len(self.plus_lentes) < NOMBRE_REQUETES_LENTES:
+            heapq.heappush(self.plus_lentes, entree)
+        else:
+            heapq.heappushpop(self.plus_lentes, entree)
+
+    def requetes_les_plus_lentes(self):
+        return [
+            (duree, sql) for duree, _, sql in sorted(self.plus_lentes, reverse=True)
+        ]
+
+
+mesure_courante = contextvars.ContextVar("mesure_courante", default=None)
+
+
+def mesurer_requete_sql(execute, sql, params, many, context):
+    mesure = mesure_courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    debut = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        mesure.enregistrer_requete(sql, time.perf_counter() - debut)
+
+
+@receiver(connection_created)
+def instrumenter_connexion(sender, connection, **kwargs):
+    # la liste des wrappers survit aux reconnexions: une seule installation
+    if mesurer_requete_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(mesurer_requete_sql)
+
+
+def mesurer_serialisation(propriete):
+    """
+    Enveloppe BaseSerializer.data: la durée de to_representation est cumulée
+    dans la mesure courante. Les serializers imbriqués ne passent pas par
+    data, et un appel à data pendant une sérialisation n'est pas recompté
+    """
+
+    def data(serialiseur):
+        mesure = mesure_courante.get()
+        if mesure is None or mesure.en_serialisation:
+            return propriete.fget(serialiseur)
+        mesure.en_serialisation = True
+        debut = time.perf_counter()
+        try:
+            return propriete.fget(serialiseur)
+        finally:
+            mesure.en_serialisation = False
+            mesure.duree_serialisation = (mesure.duree_serialisation or 0.0) + (
+                time.perf_counter() - debut
+            )
+
+    data.mesure = True
+    return property(data)
+
+
+def instrumenter_serialiseurs():
+    # Serializer.data et ListSerializer.data passent par super().data
+    if not getattr(BaseSerializer.data.fget, "mesure", False):
+        BaseSerializer.data = mesurer_serialisation(BaseSerializer.data)
+
+
+class Histogramme:
+    def __init__(self, seuils):
+        self.seuils = seuils
+        self.comptes = [0] * (len(seuils) + 1)
+        self.somme = 0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        for rang, seuil in enumerate(self.seuils):
+            if valeur <= seuil:
+                break
+        else:
+            rang = len(self.seuils)
+        self.comptes[rang] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def lignes(self, nom, etiquettes):
+        cumul = 0
+        for seuil, compte in zip((*self.seuils, "+Inf"), self.comptes):
+            cumul += compte
+            yield f"{nom}_bucket{formater({**etiquettes, 'le': seuil})} {cumul}"
+        yield f"{nom}_sum{formater(etiquettes)} {self.somme}"
+        yield f"{nom}_count{formater(etiquettes)} {self.nombre}"
+
+
+def echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def formater(etiquettes):
+    return (
+        "{" + ",".join(f'{nom}="{echapper(v)}"' for nom, v in etiquettes.items()) + "}"
+    )
+
+
+# (nom, aide, seuils): un histogramme par route et méthode
+HISTOGRAMMES = (
+    ("api_requete_duree_secondes", "Durée totale de la requête", SEUILS_DUREE),
+    (
+        "api_vue_duree_secondes",
+        "Durée d'exécution de la vue, sérialisation DRF comprise",
+        SEUILS_DUREE,
+    ),
+    (
+        "api_serialisation_duree_secondes",
+        "Durée de la sérialisation DRF (serializer.data), comptée dans la vue",
+        SEUILS_DUREE,
+    ),
+    (
+        "api_rendu_duree_secondes",
+        "Durée du rendu de la réponse par le renderer, hors sérialisation DRF"
+        " (comptée dans la vue)",
+        SEUILS_DUREE,
+    ),
+    ("api_sql_duree_secondes", "Durée cumulée des requêtes SQL", SEUILS_DUREE),
+    ("api_sql_requetes", "Nombre de requêtes SQL", SEUILS_REQUETES),
+    ("api_reponse_octets", "Taille du corps de la réponse", SEUILS_TAILLE),
+)
+
+
+class Registre:
+    """Histogrammes par (route, méthode) et compteur par statut"""
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.histogrammes = {}
+        self.compteurs = {}
+
+    def observer(self, route, methode, statut, valeurs):
+        """valeurs: {nom d'histogramme: valeur}, les valeurs None sont ignorées"""
+        with self.verrou:
+            cle = (route, methode, str(statut))
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + 1
+            for nom, _, seuils in HISTOGRAMMES:
+                if valeurs.get(nom) is None:
+                    continue
+                histogramme = self.histogrammes.get((nom, route, methode))
+                if histogramme is None:
+                    histogramme = self.histogrammes[(nom, route, methode)] = (
+                        Histogramme(seuils)
+                    )
+                histogramme.observer(valeurs[nom])
+
+    def exporter(self):
+        with self.verrou:
+            lignes = [
+                "# HELP api_requetes_total Requêtes traitées",
+                "# TYPE api_requetes_total counter",
+            ]
+            for (route, methode, statut), nombre in sorted(self.compteurs.items()):
+                etiquettes = {"route": route, "methode": methode, "statut": statut}
+                lignes.append(f"api_requetes_total{formater(etiquettes)} {nombre}")
+            for nom, aide, _ in HISTOGRAMMES:
+                lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} histogram"]
+                for (serie, route, methode), histogramme in sorted(
+                    self.histogrammes.items()
+                ):
+                    if serie == nom:
+                        lignes.extend(
+                            histogramme.lignes(
+                                nom, {"route": route, "methode": methode}
+                            )
+                        )
+        return "\n".join(lignes) + "\n"
+
+    def vider(self):
+        with self.verrou:
+            self.histogrammes.clear()
+            self.compteurs.clear()
+
+
+registre = Registre()
+
+
+def vue_metriques(request):
+    """
+    Histogrammes au format Prometheus, protégés par METRIQUES_JETON. Sans
+    jeton configuré, l'accès n'est ouvert qu'en DEBUG
+    """
+    jeton = settings.METRIQUES_JETON
+    if not jeton:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {jeton}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(registre.exporter(), content_type=TYPE_CONTENU)
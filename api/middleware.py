@@ -0,0 +1,128 @@
+"""Middleware de mesure des requêtes (voir api/metriques.py)"""
+
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metriques import Mesure, mesure_courante, registre
+
+logger = logging.getLogger(__name__)
+
+
+class MesureRequetesMiddleware:
+    """
+    Mesure chaque requête (requêtes SQL et leur durée, durée de la vue, de la
+    sérialisation DRF et du rendu par le renderer, taille de la réponse),
+    l'agrège par nom de route et journalise celles qui dépassent les budgets
+    METRIQUES_BUDGET_REQUETES_SQL et METRIQUES_BUDGET_DUREE avec leurs
+    requêtes SQL les plus lentes.
+
+    À placer en tête de MIDDLEWARE. Le contenu d'une réponse en flux est
+    produit après le middleware: ni ses requêtes ni sa taille ne sont comptées
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.est_async = iscoroutinefunction(get_response)
+        if self.est_async:
+            markcoroutinefunction(self)
+            # sous ASGI, des hooks synchrones seraient exécutés dans un thread
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.est_async:
+            return self.__acall__(request)
+        mesure = Mesure()
+        jeton = mesure_courante.set(mesure)
+        try:
+            reponse = self.get_response(request)
+        finally:
+            mesure_courante.reset(jeton)
+        self.terminer(request, reponse, mesure)
+        return reponse
+
+    async def __acall__(self, request):
+        mesure = Mesure()
+        jeton = mesure_courante.set(mesure)
+        try:
+            reponse = await self.get_response(request)
+        finally:
+            mesure_courante.reset(jeton)
+        self.terminer(request, reponse, mesure)
+        return reponse
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mesure = mesure_courante.get()
+        if mesure is not None:
+            mesure.debut_vue = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # réponse DRF: la vue, sérialisation comprise (serializer.data, mesurée
+        # à part), est terminée; reste le rendu des données par le renderer
+        mesure = mesure_courante.get()
+        if mesure is not None and mesure.debut_vue is not None:
+            mesure.debut_rendu = time.perf_counter()
+            mesure.duree_vue = mesure.debut_rendu - mesure.debut_vue
+            response.add_post_render_callback(
+                lambda _: setattr(
+                    mesure, "duree_rendu", time.perf_counter() - mesure.debut_rendu
+                )
+            )
+        return response
+
+    # process_view et process_template_response de l'instance, sous ASGI
+    async def aprocess_view(self, *args):
+        return MesureRequetesMiddleware.process_view(self, *args)
+
+    async def aprocess_template_response(self, *args):
+        return MesureRequetesMiddleware.process_template_response(self, *args)
+
+    def terminer(self, request, reponse, mesure):
+        fin = time.perf_counter()
+        duree = fin - mesure.debut
+        if mesure.duree_vue is None and mesure.debut_vue is not None:
+            mesure.duree_vue = fin - mesure.debut_vue
+        correspondance = request.resolver_match
+        route = (correspondance and correspondance.url_name) or "inconnue"
+        registre.observer(
+            route,
+            request.method,
+            reponse.status_code,
+            {
+                "api_requete_duree_secondes": duree,
+                "api_vue_duree_secondes": mesure.duree_vue,
+                "api_serialisation_duree_secondes": mesure.duree_serialisation,
+                "api_rendu_duree_secondes": mesure.duree_rendu,
+                "api_sql_duree_secondes": mesure.duree_sql,
+                "api_sql_requetes": mesure.requetes_sql,
+                "api_reponse_octets": (
+                    None if reponse.streaming else len(reponse.content)
+                ),
+            },
+        )
+
+        if (
+            mesure.requetes_sql > settings.METRIQUES_BUDGET_REQUETES_SQL
+            or duree > settings.METRIQUES_BUDGET_DUREE
+        ):
+            logger.warning(
+                "Budget dépassé: %s %s (%s) %.3f s, %d requêtes SQL en %.3f s;"
+                " plus lentes: %s",
+                request.method,
+                request.path,
+                route,
+                duree,
+                mesure.requetes_sql,
+                mesure.duree_sql,
+                " | ".join(
+                    f"{duree_sql * 1000:.1f} ms {sql[:500]}"
+                    for duree_sql, sql in mesure.requetes_les_plus_lentes()
+                )
+                or "aucune",
+            )
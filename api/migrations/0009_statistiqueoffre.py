@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def remplir_statistiques(apps, schema_editor):
+    Offre = apps.get_model("api", "Offre")
+    StatistiqueOffre = apps.get_model("api", "StatistiqueOffre")
+    lignes = Offre.objects.annotate(
+        en_attente=Count("candidatures", filter=Q(candidatures__statut="en attente")),
+        acceptees=Count("candidatures", filter=Q(candidatures__statut="acceptée")),
+        refusees=Count("candidatures", filter=Q(candidatures__statut="refusée")),
+    ).values("id", "recruteur_id", "en_attente", "acceptees", "refusees")
+    StatistiqueOffre.objects.bulk_create(
+        (
+            StatistiqueOffre(offre_id=ligne.pop("id"), **ligne)
+            for ligne in lignes.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_candidature_statut"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatistiqueOffre",
+            fields=[
+                (
+                    "offre",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="statistique",
+                        serialize=False,
+                        to="api.offre",
+                    ),
+                ),
+                ("en_attente", models.IntegerField(default=0)),
+                ("acceptees", models.IntegerField(default=0)),
+                ("refusees", models.IntegerField(default=0)),
+                (
+                    "recruteur",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistiques_offres",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(remplir_statistiques, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_statistiqueoffre"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="candidature",
+            index=models.Index(
+                fields=["candidat", "-date_creation", "-id"],
+                name="candidature_candidat_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidature",
+            index=models.Index(
+                fields=["offre", "-date_creation", "-id"],
+                name="candidature_offre_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="offre",
+            index=models.Index(
+                fields=["-date_creation", "-id"], name="offre_date_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "-date_joined", "-id"], name="user_role_date_idx"
+            ),
+        ),
+    ]
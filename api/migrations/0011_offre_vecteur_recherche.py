@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREER_RECHERCHE = """
+CREATE OR REPLACE FUNCTION api_offre_vecteur_recherche() RETURNS trigger AS $$
+BEGIN
+    NEW.vecteur_recherche :=
+        setweight(to_tsvector('french', coalesce(NEW.titre, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_offre_vecteur_recherche_trigger
+    BEFORE INSERT OR UPDATE OF titre, description ON api_offre
+    FOR EACH ROW EXECUTE FUNCTION api_offre_vecteur_recherche();
+
+UPDATE api_offre SET titre = titre;
+
+CREATE INDEX api_offre_vecteur_recherche_gin
+    ON api_offre USING gin (vecteur_recherche);
+"""
+
+SUPPRIMER_RECHERCHE = """
+DROP INDEX IF EXISTS api_offre_vecteur_recherche_gin;
+DROP TRIGGER IF EXISTS api_offre_vecteur_recherche_trigger ON api_offre;
+DROP FUNCTION IF EXISTS api_offre_vecteur_recherche();
+"""
+
+
+def creer_recherche(apps, schema_editor):
+    # trigger et index GIN propres à PostgreSQL, ignorés ailleurs
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREER_RECHERCHE)
+
+
+def supprimer_recherche(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SUPPRIMER_RECHERCHE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_index_pagination_keyset"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="offre",
+            name="vecteur_recherche",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(creer_recherche, supprimer_recherche),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# normalisation et encodage figés tels qu'au moment de cette migration: elle
+# ne doit pas suivre les évolutions de api/competences.py
+SEPARATEURS = re.compile(r"[,;/\n|]+")
+LONGUEUR_NOM = 100
+
+
+def normaliser_competences(texte):
+    noms = []
+    for morceau in SEPARATEURS.split(texte or ""):
+        nom = unicodedata.normalize("NFKD", morceau.strip().lower())
+        nom = "".join(c for c in nom if not unicodedata.combining(c))
+        nom = " ".join(nom.split())[:LONGUEUR_NOM]
+        if nom and nom not in noms:
+            noms.append(nom)
+    return noms
+
+
+def encoder(identifiants):
+    """Bitset little-endian: bit n levé pour la compétence d'identifiant n"""
+    bits = 0
+    for identifiant in identifiants:
+        bits |= 1 << identifiant
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def vectoriser_competences(apps, schema_editor):
+    Competence = apps.get_model("api", "Competence")
+    User = apps.get_model("api", "User")
+    Offre = apps.get_model("api", "Offre")
+    identifiants = {}
+
+    def vecteur(texte):
+        noms = normaliser_competences(texte)
+        for nom in noms:
+            if nom not in identifiants:
+                identifiants[nom] = Competence.objects.create(nom=nom).id
+        return encoder(identifiants[nom] for nom in noms)
+
+    for modele, champ in ((User, "competences"), (Offre, "competences_requises")):
+        lot = []
+        for instance in modele.objects.exclude(**{f"{champ}__isnull": True}).only(
+            "id", champ
+        ):
+            instance.vecteur_competences = vecteur(getattr(instance, champ))
+            lot.append(instance)
+        modele.objects.bulk_update(lot, ["vecteur_competences"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_offre_vecteur_recherche"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Competence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nom", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="offre",
+            name="vecteur_competences",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="vecteur_competences",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(vectoriser_competences, migrations.RunPython.noop),
+    ]
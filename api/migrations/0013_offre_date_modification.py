@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_competences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="offre",
+            name="date_modification",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
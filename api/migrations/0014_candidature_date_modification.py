@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_offre_date_modification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidature",
+            name="date_modification",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
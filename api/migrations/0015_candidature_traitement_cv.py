@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_candidature_date_modification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidature",
+            name="empreinte_cv",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="candidature",
+            name="statut_cv",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("en traitement", "En traitement"),
+                    ("traité", "Traité"),
+                    ("erreur", "Erreur"),
+                ],
+                max_length=20,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+import re
+
+# seule référence au code de l'application: le callable de stockage du
+# FileField, comme tout argument de champ (voir AlterField ci-dessous)
+import api.stockage
+from django.db import migrations, models
+from django.db.models import Count
+
+# reconnaissance des noms figée telle qu'au moment de cette migration: elle
+# ne doit pas suivre les évolutions de api/stockage.py
+NOM_ADRESSE_CONTENU = re.compile(r"^cvs/(?P<empreinte>[0-9a-f]{64})(\.\w+)?$")
+
+
+def empreinte_depuis_nom(nom):
+    correspondance = NOM_ADRESSE_CONTENU.match(nom or "")
+    return correspondance.group("empreinte") if correspondance else None
+
+
+def compter_references(apps, schema_editor):
+    """Recense les CV déjà rangés par empreinte par le traitement en arrière-plan"""
+    Candidature = apps.get_model("api", "Candidature")
+    FichierCV = apps.get_model("api", "FichierCV")
+    comptes = (
+        Candidature.objects.filter(cv__startswith="cvs/")
+        .values_list("cv")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    FichierCV.objects.bulk_create(
+        [
+            FichierCV(nom=nom, empreinte=empreinte_depuis_nom(nom), references=total)
+            for nom, total in comptes
+            if empreinte_depuis_nom(nom)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_candidature_traitement_cv"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FichierCV",
+            fields=[
+                (
+                    "nom",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("empreinte", models.CharField(db_index=True, max_length=64)),
+                ("references", models.IntegerField(default=0)),
+                ("date_creation", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="candidature",
+            name="cv",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=api.stockage.obtenir_stockage_cv,
+                upload_to="cvs/",
+            ),
+        ),
+        migrations.RunPython(compter_references, migrations.RunPython.noop),
+    ]
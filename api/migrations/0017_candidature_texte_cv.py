@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+CREER_RECHERCHE = """
+CREATE OR REPLACE FUNCTION api_candidature_vecteur_cv() RETURNS trigger AS $$
+BEGIN
+    NEW.vecteur_cv := to_tsvector('french', coalesce(NEW.texte_cv, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_candidature_vecteur_cv_trigger
+    BEFORE INSERT OR UPDATE OF texte_cv ON api_candidature
+    FOR EACH ROW EXECUTE FUNCTION api_candidature_vecteur_cv();
+
+CREATE INDEX api_candidature_vecteur_cv_gin
+    ON api_candidature USING gin (vecteur_cv);
+"""
+
+SUPPRIMER_RECHERCHE = """
+DROP INDEX IF EXISTS api_candidature_vecteur_cv_gin;
+DROP TRIGGER IF EXISTS api_candidature_vecteur_cv_trigger ON api_candidature;
+DROP FUNCTION IF EXISTS api_candidature_vecteur_cv();
+"""
+
+
+def creer_recherche(apps, schema_editor):
+    # trigger et index GIN propres à PostgreSQL, ignorés ailleurs
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREER_RECHERCHE)
+
+
+def supprimer_recherche(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SUPPRIMER_RECHERCHE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0016_fichiers_cv_adresses_contenu"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidature",
+            name="texte_cv",
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="candidature",
+            name="vecteur_cv",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(creer_recherche, supprimer_recherche),
+    ]
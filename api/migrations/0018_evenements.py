@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_candidature_texte_cv"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Evenement",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("candidature.creee", "Candidature créée"),
+                            ("candidature.statut", "Statut modifié"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("candidature_id", models.IntegerField()),
+                ("offre_id", models.IntegerField()),
+                ("candidat_id", models.IntegerField()),
+                ("recruteur_id", models.IntegerField()),
+                ("donnees", models.JSONField(default=dict)),
+                ("date_creation", models.DateTimeField(auto_now_add=True)),
+                ("date_envoi", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["recruteur_id", "id"], name="evenement_recruteur_idx"
+                    ),
+                    models.Index(
+                        fields=["candidat_id", "id"], name="evenement_candidat_idx"
+                    ),
+                    models.Index(
+                        condition=models.Q(("date_envoi__isnull", True)),
+                        fields=["id"],
+                        name="evenement_a_envoyer_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
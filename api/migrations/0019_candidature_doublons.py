@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+import logging
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count, F, Min, Q
+
+logger = logging.getLogger(__name__)
+
+
+def supprimer_doublons(apps, schema_editor):
+    """
+    Garde la première candidature de chaque couple (candidat, offre) avant
+    la contrainte d'unicité, puis recalcule les statistiques des offres touchées
+    et retire des FichierCV les références des candidatures supprimées. Les
+    modèles historiques n'émettent pas de signaux; l'outbox n'a pas
+    d'événement de suppression
+    """
+    Candidature = apps.get_model("api", "Candidature")
+    FichierCV = apps.get_model("api", "FichierCV")
+    Offre = apps.get_model("api", "Offre")
+    StatistiqueOffre = apps.get_model("api", "StatistiqueOffre")
+
+    doublons = (
+        Candidature.objects.values("candidat_id", "offre_id")
+        .annotate(premiere=Min("id"), nombre=Count("id"))
+        .filter(nombre__gt=1)
+    )
+    offres = set()
+    references = Counter()
+    supprimees = 0
+    for doublon in doublons.iterator():
+        en_trop = Candidature.objects.filter(
+            candidat_id=doublon["candidat_id"], offre_id=doublon["offre_id"]
+        ).exclude(id=doublon["premiere"])
+        references.update(nom for nom in en_trop.values_list("cv", flat=True) if nom)
+        supprimees += en_trop.delete()[0]
+        offres.add(doublon["offre_id"])
+    if not supprimees:
+        return
+
+    lignes = (
+        Offre.objects.filter(id__in=offres)
+        .annotate(
+            en_attente=Count(
+                "candidatures", filter=Q(candidatures__statut="en attente")
+            ),
+            acceptees=Count("candidatures", filter=Q(candidatures__statut="acceptée")),
+            refusees=Count("candidatures", filter=Q(candidatures__statut="refusée")),
+        )
+        .values("id", "en_attente", "acceptees", "refusees")
+    )
+    for ligne in lignes:
+        StatistiqueOffre.objects.filter(offre_id=ligne.pop("id")).update(**ligne)
+
+    for nom, nombre in references.items():
+        FichierCV.objects.filter(nom=nom).update(references=F("references") - nombre)
+    logger.warning(
+        "%d candidatures en double supprimées sur %d offres (%d références de CV"
+        " retirées)",
+        supprimees,
+        len(offres),
+        sum(references.values()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_evenements"),
+    ]
+
+    # séparée de la migration des contraintes: sous PostgreSQL, un ALTER TABLE
+    # ne peut suivre des modifications de lignes dans la même transaction
+    operations = [
+        migrations.RunPython(supprimer_doublons, migrations.RunPython.noop),
+    ]
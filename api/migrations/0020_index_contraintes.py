@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_candidature_doublons"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    # les nouveaux index sont créés avant la suppression de ceux qu'ils couvrent
+    operations = [
+        migrations.AddConstraint(
+            model_name="candidature",
+            constraint=models.UniqueConstraint(
+                fields=("candidat", "offre"), name="candidature_candidat_offre_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="candidature",
+            index=models.Index(
+                condition=models.Q(("statut", "en attente")),
+                fields=["offre", "id"],
+                name="candidature_en_attente_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="offre",
+            index=models.Index(
+                fields=["recruteur", "-date_creation", "-id"],
+                name="offre_recruteur_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("role", "candidat")),
+                fields=["-date_joined", "-id"],
+                name="user_candidat_date_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="user",
+            name="user_role_date_idx",
+        ),
+        migrations.AlterField(
+            model_name="candidature",
+            name="candidat",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="candidatures",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="candidature",
+            name="offre",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="candidatures",
+                to="api.offre",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="offre",
+            name="recruteur",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="offres",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def dater_orphelins(apps, schema_editor):
+    """Le délai de grâce des fichiers déjà orphelins part de la migration"""
+    FichierCV = apps.get_model("api", "FichierCV")
+    FichierCV.objects.filter(references__lte=0).update(dereference_le=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0020_index_contraintes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fichiercv",
+            name="dereference_le",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(dater_orphelins, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0021_fichiercv_dereference_le"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="evenement",
+            name="candidat_id",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="evenement",
+            name="candidature_id",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="evenement",
+            name="offre_id",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="evenement",
+            name="recruteur_id",
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+import struct
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# encodages figés tels qu'au moment de cette migration: elle ne doit pas
+# suivre les évolutions de api/competences.py
+TAILLE_LOT = 1000
+
+
+def identifiants_bitset(vecteur):
+    """Identifiants d'un bitset little-endian (bit n: compétence n)"""
+    bits = int.from_bytes(bytes(vecteur or b""), "little")
+    identifiants = []
+    while bits:
+        bas = bits & -bits
+        identifiants.append(bas.bit_length() - 1)
+        bits ^= bas
+    return identifiants
+
+
+def encoder_bitset(identifiants):
+    bits = 0
+    for identifiant in identifiants:
+        bits |= 1 << identifiant
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def identifiants_creux(vecteur):
+    """Identifiants d'un vecteur creux: entiers 32 bits little-endian triés"""
+    vecteur = bytes(vecteur or b"")
+    return struct.unpack(f"<{len(vecteur) // 4}I", vecteur)
+
+
+def encoder_creux(identifiants):
+    identifiants = sorted(set(identifiants))
+    return struct.pack(f"<{len(identifiants)}I", *identifiants)
+
+
+def convertir(modele, lire, encoder):
+    lot = []
+    for instance in (
+        modele.objects.exclude(vecteur_competences=b"")
+        .only("id", "vecteur_competences")
+        .iterator(chunk_size=TAILLE_LOT)
+    ):
+        instance.vecteur_competences = encoder(lire(instance.vecteur_competences))
+        lot.append(instance)
+        if len(lot) >= TAILLE_LOT:
+            modele.objects.bulk_update(lot, ["vecteur_competences"])
+            lot = []
+    modele.objects.bulk_update(lot, ["vecteur_competences"])
+
+
+def vers_vecteurs_creux(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Offre = apps.get_model("api", "Offre")
+    CompetenceCandidat = apps.get_model("api", "CompetenceCandidat")
+    for modele in (User, Offre):
+        convertir(modele, identifiants_bitset, encoder_creux)
+
+    lignes = []
+    for candidat_id, vecteur in (
+        User.objects.exclude(vecteur_competences=b"")
+        .values_list("id", "vecteur_competences")
+        .iterator(chunk_size=TAILLE_LOT)
+    ):
+        lignes.extend(
+            CompetenceCandidat(competence_id=identifiant, candidat_id=candidat_id)
+            for identifiant in identifiants_creux(vecteur)
+        )
+        if len(lignes) >= TAILLE_LOT:
+            CompetenceCandidat.objects.bulk_create(lignes)
+            lignes = []
+    CompetenceCandidat.objects.bulk_create(lignes)
+
+
+def vers_bitsets(apps, schema_editor):
+    for nom in ("User", "Offre"):
+        convertir(apps.get_model("api", nom), identifiants_creux, encoder_bitset)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_evenement_identifiants_64_bits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompetenceCandidat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "candidat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="competences_indexees",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "competence",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.competence",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("competence", "candidat"),
+                        name="competence_candidat_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(vers_vecteurs_creux, vers_bitsets),
+    ]
@@ -1,6 +1,12 @@
+from collections import defaultdict
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
-from django.db import models
+from .stockage import empreinte_depuis_nom, obtenir_stockage_cv
 
 
 class User(AbstractUser):
@@ -14,6 +20,50 @@ class User(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     competences = models.TextField(blank=True, null=True)
     experience = models.TextField(blank=True, null=True)  # optionel pour des recruteurs
+    # identifiants des compétences normalisées (voir api/competences.py)
+    vecteur_competences = models.BinaryField(default=b"", editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # pagination keyset des candidats, seul rôle listé: index partiel
+            models.Index(
+                fields=["-date_joined", "-id"],
+                condition=models.Q(role="candidat"),
+                name="user_candidat_date_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # pour ne recalculer le vecteur que si les compétences changent
+        instance._competences_initiales = instance.__dict__.get("competences")
+        return instance
+
+
+class Competence(models.Model):
+    """Vocabulaire des compétences normalisées"""
+
+    nom = models.CharField(max_length=100, unique=True)
+
+
+class CompetenceCandidat(models.Model):
+    """Index compétence -> candidats, tenu à jour depuis vecteur_competences"""
+
+    competence = models.ForeignKey(
+        Competence, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    candidat = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="competences_indexees"
+    )
+
+    class Meta:
+        constraints = [
+            # présélection des candidats partageant une compétence avec l'offre
+            models.UniqueConstraint(
+                fields=["competence", "candidat"], name="competence_candidat_unique"
+            ),
+        ]
 
 
 class Offre(models.Model):
@@ -22,21 +72,64 @@ class Offre(models.Model):
     description = models.TextField()
     salaire = models.DecimalField(max_digits=10, decimal_places=2)
     competences_requises = models.TextField(blank=True, null=True)
-    recruteur = models.ForeignKey(User, on_delete=models.CASCADE, related_name="offres")
+    # index couvert par offre_recruteur_date_idx
+    recruteur = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="offres", db_index=False
+    )
     date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
+    vecteur_competences = models.BinaryField(default=b"", editable=False)
+    # tsvector maintenu par un trigger PostgreSQL (voir api/recherche.py)
+    vecteur_recherche = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # pagination keyset de la liste des offres
+            models.Index(fields=["-date_creation", "-id"], name="offre_date_id_idx"),
+            # offres d'un recruteur, et jointure offre__recruteur des candidatures
+            models.Index(
+                fields=["recruteur", "-date_creation", "-id"],
+                name="offre_recruteur_date_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._competences_initiales = instance.__dict__.get("competences_requises")
+        return instance
 
 
 class Candidature(models.Model):
 
+    # index des clés étrangères couverts par les index composites de Meta
     candidat = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="candidatures"
+        User, on_delete=models.CASCADE, related_name="candidatures", db_index=False
     )
     offre = models.ForeignKey(
-        Offre, on_delete=models.CASCADE, related_name="candidatures"
+        Offre, on_delete=models.CASCADE, related_name="candidatures", db_index=False
     )
-    cv = models.FileField(upload_to="cvs/", blank=True, null=True)  # optionel
+    cv = models.FileField(
+        upload_to="cvs/", storage=obtenir_stockage_cv, blank=True, null=True
+    )  # optionel
+    # le cv est rangé d'après son empreinte en arrière-plan (voir api/taches.py)
+    statut_cv = models.CharField(
+        max_length=20,
+        blank=True,
+        null=True,
+        choices=(
+            ("en traitement", "En traitement"),
+            ("traité", "Traité"),
+            ("erreur", "Erreur"),
+        ),
+    )
+    empreinte_cv = models.CharField(max_length=64, blank=True, null=True)
+    # texte extrait du cv (voir api/extraction.py) et son tsvector sous PostgreSQL
+    texte_cv = models.TextField(null=True, editable=False)
+    vecteur_cv = SearchVectorField(null=True, editable=False)
     lettre_motivation = models.TextField(blank=True, null=True)
     date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
     statut = models.CharField(
         max_length=100,
         default="en attente",
@@ -46,3 +139,221 @@ class Candidature(models.Model):
             ("refusée", "Refusée"),
         ),
     )
+
+    class Meta:
+        indexes = [
+            # pagination keyset des candidatures d'un candidat et d'une offre
+            models.Index(
+                fields=["candidat", "-date_creation", "-id"],
+                name="candidature_candidat_date_idx",
+            ),
+            models.Index(
+                fields=["offre", "-date_creation", "-id"],
+                name="candidature_offre_date_idx",
+            ),
+            # candidatures à trier d'une offre (mise à jour des statuts en masse)
+            models.Index(
+                fields=["offre", "id"],
+                condition=models.Q(statut="en attente"),
+                name="candidature_en_attente_idx",
+            ),
+        ]
+        constraints = [
+            # une seule candidature par candidat et par offre
+            models.UniqueConstraint(
+                fields=["candidat", "offre"], name="candidature_candidat_offre_unique"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # statut tel qu'enregistré, pour détecter les changements dans les signaux
+        instance._statut_initial = instance.__dict__.get("statut")
+        instance._cv_initial = instance.__dict__.get("cv")
+        return instance
+
+
+class StatistiqueOffreManager(models.Manager):
+
+    def ajuster(self, offre_id, variations):
+        """Applique des variations {statut: delta} aux compteurs d'une offre"""
+        valeurs = {
+            StatistiqueOffre.CHAMPS_PAR_STATUT[statut]: models.F(
+                StatistiqueOffre.CHAMPS_PAR_STATUT[statut]
+            )
+            + delta
+            for statut, delta in variations.items()
+            if delta
+        }
+        if not valeurs:
+            return 0
+        return self.filter(offre_id=offre_id).update(**valeurs)
+
+    def reconstruire(self, offres=None, taille_lot=1000):
+        """
+        Recalcule les compteurs à partir des candidatures, pour toutes les offres
+        ou seulement pour celles dont les ids sont donnés
+        """
+        lignes = Offre.objects.all()
+        statistiques = self.all()
+        if offres is not None:
+            lignes = lignes.filter(id__in=offres)
+            statistiques = statistiques.filter(offre_id__in=offres)
+
+        lignes = (
+            lignes.annotate(
+                **{
+                    champ: models.Count(
+                        "candidatures",
+                        filter=models.Q(candidatures__statut=statut),
+                    )
+                    for statut, champ in StatistiqueOffre.CHAMPS_PAR_STATUT.items()
+                }
+            )
+            .values("id", "recruteur_id", *StatistiqueOffre.CHAMPS_PAR_STATUT.values())
+            .order_by("id")
+        )
+
+        total = 0
+        with transaction.atomic():
+            statistiques.delete()
+            lot = []
+            for ligne in lignes.iterator(chunk_size=taille_lot):
+                offre_id = ligne.pop("id")
+                lot.append(StatistiqueOffre(offre_id=offre_id, **ligne))
+                if len(lot) >= taille_lot:
+                    total += len(self.bulk_create(lot))
+                    lot = []
+            total += len(self.bulk_create(lot))
+        return total
+
+
+class StatistiqueOffre(models.Model):
+    """Compteurs de candidatures par statut, maintenus à chaque écriture"""
+
+    CHAMPS_PAR_STATUT = {
+        "en attente": "en_attente",
+        "acceptée": "acceptees",
+        "refusée": "refusees",
+    }
+
+    offre = models.OneToOneField(
+        Offre, on_delete=models.CASCADE, primary_key=True, related_name="statistique"
+    )
+    recruteur = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="statistiques_offres"
+    )
+    en_attente = models.IntegerField(default=0)
+    acceptees = models.IntegerField(default=0)
+    refusees = models.IntegerField(default=0)
+
+    objects = StatistiqueOffreManager()
+
+
+class FichierCVManager(models.Manager):
+
+    def ajuster(self, nom, delta):
+        """
+        Ajoute delta au nombre de références d'un fichier du stockage adressé
+        par contenu. Les autres noms (spool, anciens CV) sont ignorés
+        """
+        empreinte = empreinte_depuis_nom(nom)
+        if empreinte is None or not delta:
+            return
+        maintenant = timezone.now()
+        valeurs = self._valeurs(delta, maintenant)
+        if self.filter(nom=nom).update(**valeurs):
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    nom=nom,
+                    empreinte=empreinte,
+                    references=delta,
+                    dereference_le=maintenant if delta <= 0 else None,
+                )
+        except IntegrityError:
+            # créé entre temps par une autre requête
+            self.filter(nom=nom).update(**valeurs)
+
+    def ajuster_lot(self, variations, taille_lot=1000):
+        """
+        Applique {nom: delta} avec un UPDATE par valeur de delta (et par lot
+        de noms). Les fichiers sans ligne sont ignorés: sert aux suppressions
+        """
+        noms_par_delta = defaultdict(list)
+        for nom, delta in variations.items():
+            if delta and empreinte_depuis_nom(nom) is not None:
+                noms_par_delta[delta].append(nom)
+        maintenant = timezone.now()
+        for delta, noms in noms_par_delta.items():
+            valeurs = self._valeurs(delta, maintenant)
+            for debut in range(0, len(noms), taille_lot):
+                self.filter(nom__in=noms[debut : debut + taille_lot]).update(**valeurs)
+
+    @staticmethod
+    def _valeurs(delta, maintenant):
+        # le délai de grâce de nettoyer_cvs part de la dernière référence perdue
+        return {
+            "references": models.F("references") + delta,
+            "dereference_le": models.Case(
+                models.When(references__lte=-delta, then=models.Value(maintenant)),
+                default=None,
+            ),
+        }
+
+    def reutiliser(self, nom):
+        """
+        Repousse la suppression d'un fichier orphelin sur lequel un nouveau
+        dépôt vient d'être dédupliqué. Attend le verrou d'un nettoyage en cours
+        """
+        self.filter(nom=nom, references__lte=0).update(dereference_le=timezone.now())
+
+
+class FichierCV(models.Model):
+    """Fichier CV stocké une seule fois, partagé par plusieurs candidatures"""
+
+    nom = models.CharField(max_length=100, primary_key=True)
+    empreinte = models.CharField(max_length=64, db_index=True)
+    references = models.IntegerField(default=0)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    # date à laquelle le nombre de références est tombé à zéro
+    dereference_le = models.DateTimeField(null=True, blank=True)
+
+    objects = FichierCVManager()
+
+
+class Evenement(models.Model):
+    """
+    Boîte d'envoi (outbox) des changements de candidature, écrite dans la
+    transaction du changement. L'id sert de curseur aux flux d'événements
+    """
+
+    TYPES = (
+        ("candidature.creee", "Candidature créée"),
+        ("candidature.statut", "Statut modifié"),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    type = models.CharField(max_length=50, choices=TYPES)
+    # pas de clés étrangères: l'événement survit à la candidature
+    candidature_id = models.BigIntegerField()
+    offre_id = models.BigIntegerField()
+    candidat_id = models.BigIntegerField()
+    recruteur_id = models.BigIntegerField()
+    donnees = models.JSONField(default=dict)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_envoi = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recruteur_id", "id"], name="evenement_recruteur_idx"),
+            models.Index(fields=["candidat_id", "id"], name="evenement_candidat_idx"),
+            # file des événements restant à diffuser
+            models.Index(
+                fields=["id"],
+                condition=models.Q(date_envoi__isnull=True),
+                name="evenement_a_envoyer_idx",
+            ),
+        ]
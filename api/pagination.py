@@ -0,0 +1,180 @@
+"""Pagination par curseur (keyset) pour les listes de l'API"""
+
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def lire_taille(request, defaut, maximum, parametre="taille"):
+    """Nombre de résultats demandé, borné entre 1 et maximum"""
+    try:
+        taille = int(request.query_params[parametre])
+    except (KeyError, ValueError):
+        return defaut
+    return min(max(taille, 1), maximum)
+
+
+class PaginationCurseur(BasePagination):
+    """
+    Pagination keyset sur le couple (champ de date, id): chaque page est obtenue
+    par une condition WHERE sur la position de la dernière ligne vue, et non par
+    un OFFSET, de sorte qu'une page profonde coûte autant que la première.
+    Le curseur est opaque pour le client.
+    """
+
+    ordering = ("-date_creation", "-id")
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "taille"
+    cursor_query_param = "curseur"
+    invalid_cursor_message = "Curseur invalide."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.terminer(list(self.preparer(queryset, request)))
+
+    async def apaginer(self, queryset, request):
+        """Variante asynchrone de paginate_queryset, pour les vues async"""
+        requete = self.preparer(queryset, request)
+        return self.terminer([ligne async for ligne in requete.aiterator()])
+
+    def preparer(self, queryset, request):
+        """Requête de la page demandée, plus une ligne pour détecter la suite"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.taille = self.get_page_size(request)
+        self.position, self.arriere = self.decoder_curseur(request)
+
+        champ, cle = (nom.lstrip("-") for nom in self.ordering)
+        descendant = self.ordering[0].startswith("-")
+        ordre = self.ordering
+        if self.arriere:
+            ordre = tuple(
+                nom[1:] if nom.startswith("-") else f"-{nom}" for nom in ordre
+            )
+
+        if self.position is not None:
+            valeur, identifiant = self.position
+            operateur = "lt" if descendant != self.arriere else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{champ}__{operateur}": valeur})
+                | Q(**{champ: valeur, f"{cle}__{operateur}": identifiant})
+            )
+        return queryset.order_by(*ordre)[: self.taille + 1]
+
+    def terminer(self, resultats):
+        encore = len(resultats) > self.taille
+        resultats = resultats[: self.taille]
+        if self.arriere:
+            resultats.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = encore
+        else:
+            self.has_next = encore
+            self.has_previous = self.position is not None
+
+        self.page = resultats
+        return resultats
+
+    def get_page_size(self, request):
+        return lire_taille(
+            request, self.page_size, self.max_page_size, self.page_size_query_param
+        )
+
+    def decoder_curseur(self, request):
+        """Retourne ((valeur, id), arriere) ou (None, False) sans curseur"""
+        encode = request.query_params.get(self.cursor_query_param)
+        if not encode:
+            return None, False
+        try:
+            valeur, identifiant, arriere = json.loads(
+                base64.urlsafe_b64decode(encode.encode("ascii"))
+            )
+            # le curseur vient du client: la date et l'id sont validés avant
+            # d'atteindre le filtre de l'ORM
+            date = parse_datetime(valeur)
+            identifiant = int(identifiant)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None or not -(2**63) <= identifiant < 2**63:
+            raise NotFound(self.invalid_cursor_message)
+        return (date, identifiant), bool(arriere)
+
+    def encoder_curseur(self, ligne, arriere):
+        champ, cle = (nom.lstrip("-") for nom in self.ordering)
+        valeur, identifiant = self.lire(ligne, champ), self.lire(ligne, cle)
+        if hasattr(valeur, "isoformat"):
+            valeur = valeur.isoformat()
+        encode = base64.urlsafe_b64encode(
+            json.dumps([valeur, identifiant, arriere]).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encode)
+
+    @staticmethod
+    def lire(ligne, nom):
+        if isinstance(ligne, dict):
+            return ligne[nom]
+        return getattr(ligne, nom)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encoder_curseur(self.page[-1], arriere=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encoder_curseur(self.page[0], arriere=True)
+
+    def get_paginated_response(self, data):
+        return Response(self.donnees_paginees(data))
+
+    def donnees_paginees(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Curseur opaque renvoyé dans next/previous",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Taille de page (max {self.max_page_size})",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class PaginationCurseurUtilisateur(PaginationCurseur):
+    """Pagination keyset des utilisateurs, triés par date d'inscription"""
+
+    ordering = ("-date_joined", "-id")
@@ -7,7 +7,7 @@ class IsCandidat(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user.role == "candidat" and request.user.is_authenticated
+        return request.user.is_authenticated and request.user.role == "candidat"
 
 
 class IsRecruteur(permissions.BasePermission):
@@ -16,4 +16,4 @@ class IsRecruteur(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user.role == "recruteur" and request.user.is_authenticated
+        return request.user.is_authenticated and request.user.role == "recruteur"
@@ -0,0 +1,242 @@
+"""
+Recherche plein texte des offres et du texte des CV.
+
+Sous PostgreSQL, la recherche s'appuie sur les colonnes ``Offre.vecteur_recherche``
+(tsvector français, pondéré titre > description) et ``Candidature.vecteur_cv``,
+maintenues par des triggers et indexées en GIN. Sur les autres bases (SQLite en
+développement et en tests), des index inversés en mémoire du processus servent
+de solution de repli.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+
+from .models import Candidature, Offre
+
+CONFIGURATION = "french"
+
+MOTS_VIDES = frozenset(
+    "a au aux avec ce ces d dans de des du elle en et il je l la le les leur "
+    "lui ma mais me meme mes moi mon n ne nos notre nous on ou par pas pour qu "
+    "que qui s sa se ses son sur t ta te tes toi ton tu un une vos votre vous".split()
+)
+
+SUFFIXES = (
+    "issements",
+    "issement",
+    "ements",
+    "ement",
+    "ations",
+    "ation",
+    "euses",
+    "euse",
+    "eurs",
+    "eur",
+    "ives",
+    "ive",
+    "ifs",
+    "if",
+    "ees",
+    "ee",
+    "es",
+    "er",
+    "e",
+    "s",
+    "x",
+)
+
+POIDS_TITRE = 2.0
+POIDS_DESCRIPTION = 1.0
+
+# repli hors PostgreSQL: ids vérifiés par requête, et nombre maximal de
+# résultats retenus sans limite explicite (une annotation When par résultat)
+TAILLE_LOT_REPLI = 500
+MAX_RESULTATS_REPLI = 1000
+
+
+def raciniser(mot):
+    """Racinisation légère du français: retire le suffixe le plus long"""
+    for suffixe in SUFFIXES:
+        if mot.endswith(suffixe) and len(mot) - len(suffixe) >= 3:
+            return mot[: -len(suffixe)]
+    return mot
+
+
+def analyser(texte):
+    """Découpe un texte en racines normalisées (minuscules, sans accents)"""
+    texte = unicodedata.normalize("NFKD", (texte or "").lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return [
+        raciniser(mot) for mot in re.findall(r"\w+", texte) if mot not in MOTS_VIDES
+    ]
+
+
+class IndexInverse:
+    """
+    Index inversé en mémoire: racine -> {id: poids}. Construit paresseusement
+    depuis la base au premier appel puis tenu à jour par les signaux.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.verrou = threading.RLock()
+        self.construit = False
+        self.postings = defaultdict(dict)
+        self.termes_par_document = {}
+
+    def construire(self):
+        with self.verrou:
+            self.postings.clear()
+            self.termes_par_document.clear()
+            for identifiant, *champs in self.source():
+                self._indexer(identifiant, champs)
+            self.construit = True
+
+    def indexer(self, identifiant, *champs):
+        with self.verrou:
+            if self.construit:
+                self._indexer(identifiant, champs)
+
+    def _indexer(self, identifiant, champs):
+        self._retirer(identifiant)
+        poids = Counter()
+        for texte, ponderation in zip(champs, (POIDS_TITRE, POIDS_DESCRIPTION)):
+            for terme in analyser(texte):
+                poids[terme] += ponderation
+        for terme, valeur in poids.items():
+            self.postings[terme][identifiant] = valeur
+        self.termes_par_document[identifiant] = tuple(poids)
+
+    def retirer(self, identifiant):
+        with self.verrou:
+            if self.construit:
+                self._retirer(identifiant)
+
+    def _retirer(self, identifiant):
+        for terme in self.termes_par_document.pop(identifiant, ()):
+            documents = self.postings.get(terme)
+            if documents is not None:
+                documents.pop(identifiant, None)
+                if not documents:
+                    del self.postings[terme]
+
+    def vider(self):
+        with self.verrou:
+            self.postings.clear()
+            self.termes_par_document.clear()
+            self.construit = False
+
+    def chercher(self, requete):
+        """Retourne [(id, score)] des documents contenant tous les termes"""
+        with self.verrou:
+            if not self.construit:
+                self.construire()
+            termes = set(analyser(requete))
+            if not termes:
+                return []
+            listes = [self.postings.get(terme, {}) for terme in termes]
+            listes.sort(key=len)
+            candidats = set(listes[0])
+            for documents in listes[1:]:
+                if not candidats:
+                    break
+                candidats &= documents.keys()
+            if not candidats:
+                return []
+
+            total = len(self.termes_par_document)
+            scores = {}
+            for documents in listes:
+                idf = math.log(1 + total / len(documents))
+                for identifiant in candidats:
+                    scores[identifiant] = (
+                        scores.get(identifiant, 0.0) + documents[identifiant] * idf
+                    )
+        return sorted(scores.items(), key=lambda paire: (-paire[1], -paire[0]))
+
+
+index_offres = IndexInverse(
+    lambda: Offre.objects.values_list("id", "titre", "description").iterator()
+)
+index_cvs = IndexInverse(
+    lambda: Candidature.objects.exclude(texte_cv__isnull=True)
+    .values_list("id", "texte_cv")
+    .iterator()
+)
+
+
+def utilise_postgresql():
+    return connection.vendor == "postgresql"
+
+
+def rechercher_offres(requete, queryset=None, limite=None):
+    """
+    Filtre les offres correspondant à la requête et les trie par pertinence,
+    l'annotation ``rang`` donnant le score
+    """
+    if queryset is None:
+        queryset = Offre.objects.all()
+    return rechercher(requete, queryset, "vecteur_recherche", index_offres, limite)
+
+
+def rechercher_candidatures(requete, queryset=None, limite=None):
+    """Comme rechercher_offres, sur le texte extrait des CV des candidatures"""
+    if queryset is None:
+        queryset = Candidature.objects.all()
+    return rechercher(requete, queryset, "vecteur_cv", index_cvs, limite)
+
+
+def meilleurs_resultats(resultats, queryset, nombre):
+    """
+    Les nombre premiers résultats (id, score) de l'index, déjà triés, qui
+    appartiennent au queryset. Les ids sont vérifiés par lots, dans l'ordre
+    des scores: une requête SQL ne porte jamais sur plus de TAILLE_LOT_REPLI
+    ids, même pour un terme présent dans tous les documents
+    """
+    retenus = []
+    for debut in range(0, len(resultats), TAILLE_LOT_REPLI):
+        lot = resultats[debut : debut + TAILLE_LOT_REPLI]
+        presents = set(
+            queryset.filter(pk__in=[identifiant for identifiant, _ in lot])
+            .order_by()
+            .values_list("pk", flat=True)
+        )
+        retenus += [resultat for resultat in lot if resultat[0] in presents]
+        if len(retenus) >= nombre:
+            break
+    return retenus[:nombre]
+
+
+def rechercher(requete, queryset, colonne, index, limite=None):
+    if utilise_postgresql():
+        recherche = SearchQuery(requete, config=CONFIGURATION, search_type="websearch")
+        queryset = queryset.filter(**{colonne: recherche}).annotate(
+            rang=SearchRank(F(colonne), recherche)
+        )
+    else:
+        resultats = meilleurs_resultats(
+            index.chercher(requete), queryset, limite or MAX_RESULTATS_REPLI
+        )
+        if not resultats:
+            return queryset.none()
+        queryset = queryset.filter(
+            pk__in=[identifiant for identifiant, _ in resultats]
+        ).annotate(
+            rang=Case(
+                *(
+                    When(pk=identifiant, then=Value(score))
+                    for identifiant, score in resultats
+                ),
+                output_field=FloatField(),
+            )
+        )
+
+    queryset = queryset.order_by("-rang", "-id")
+    return queryset[:limite] if limite else queryset
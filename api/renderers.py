@@ -0,0 +1,48 @@
+"""Rendus supplémentaires de l'API"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle: rendu par le module json
+    orjson = None
+
+# types qu'orjson n'encode pas (Decimal, timedelta...): même rendu que DRF
+defaut_json = encoders.JSONEncoder().default
+
+
+class RapideJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer de DRF encodé par orjson quand il est installé: dates,
+    heures et UUID sont encodés nativement, les autres types (Decimal,
+    timedelta, QuerySet...) par l'encodeur de DRF, de sorte que la sortie est
+    la même qu'avec le module json. Seules différences: NaN et l'infini
+    deviennent null au lieu de littéraux invalides en JSON.
+
+    Le rendu indenté (Accept: application/json; indent=4, API navigable), le
+    rendu ASCII (UNICODE_JSON à False) et les entiers hors de 64 bits passent
+    par le JSONRenderer de DRF
+    """
+
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendu = orjson.dumps(data, default=defaut_json, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # comme DRF: U+2028 et U+2029 échappés, sortie sous-ensemble de JavaScript
+        if b"\xe2\x80\xa8" in rendu or b"\xe2\x80\xa9" in rendu:
+            rendu = rendu.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return rendu
@@ -1,5 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Left
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import Offre, Candidature
 
@@ -21,34 +31,272 @@ class UserSerializer(serializers.ModelSerializer):
         )
         extra_kwargs = {"password": {"write_only": True}}
 
+    @staticmethod
+    def optimiser_queryset(queryset):
+        """Ne charge que les colonnes utiles à la représentation (et au curseur)"""
+        return queryset.only(
+            "id",
+            "username",
+            "email",
+            "role",
+            "bio",
+            "competences",
+            "experience",
+            "date_joined",
+        )
+
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
         return user
 
 
+class PersonnaliseeTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Ajoute le rôle aux claims pour évaluer les permissions sans requête"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["role"] = user.role
+        return token
+
+
+class ProfilSerializer(UserSerializer):
+    """
+    Profil modifiable par son propriétaire: le rôle, porté par les tokens et
+    fixé à l'inscription, n'en fait pas partie
+    """
+
+    class Meta(UserSerializer.Meta):
+        read_only_fields = ("role",)
+
+
+class PersonnaliseeTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Le token d'accès rafraîchi reprend le rôle et l'état actif de la ligne en
+    base, pas les claims du token de rafraîchissement (valable 30 jours)
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        utilisateur = (
+            User.objects.only("id", "role", "is_active")
+            .filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM))
+            .first()
+        )
+        if utilisateur is None or not api_settings.USER_AUTHENTICATION_RULE(
+            utilisateur
+        ):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        acces = refresh.access_token
+        acces["role"] = utilisateur.role
+        return {"access": str(acces)}
+
+
 class OffreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Offre
-        fields = "__all__"
+        exclude = ("vecteur_recherche", "vecteur_competences")
         extra_kwargs = {"recruteur": {"read_only": True}}
 
+    @staticmethod
+    def optimiser_queryset(queryset):
+        """Écarte les colonnes internes volumineuses"""
+        return queryset.defer(*OffreSerializer.Meta.exclude)
+
     def create(self, validated_data):
         offre = Offre.objects.create(**validated_data)
         return offre
 
 
+def date_iso(valeur):
+    """Date au format de serializers.DateTimeField (UTC noté Z)"""
+    if valeur is None:
+        return None
+    texte = valeur.isoformat()
+    if texte.endswith("+00:00"):
+        texte = texte[:-6] + "Z"
+    return texte
+
+
+class OffreResumeSerializer(serializers.Serializer):
+    """
+    Représentation abrégée des offres pour les listes: description tronquée,
+    nom du recruteur et nombre de candidatures. Les lignes viennent de
+    ``projection()`` (dictionnaires de .values()) et sont converties sans
+    passer par les champs DRF, déclarés ici pour le schéma OpenAPI seulement.
+    Le détail d'une offre reste servi par OffreSerializer
+    """
+
+    LONGUEUR_DESCRIPTION = 200
+
+    id = serializers.IntegerField()
+    titre = serializers.CharField()
+    description = serializers.CharField(
+        help_text=f"Tronquée à {LONGUEUR_DESCRIPTION} caractères"
+    )
+    salaire = serializers.DecimalField(max_digits=10, decimal_places=2)
+    competences_requises = serializers.CharField(allow_null=True)
+    recruteur = serializers.IntegerField()
+    recruteur_nom = serializers.CharField()
+    nombre_candidatures = serializers.IntegerField()
+    date_creation = serializers.DateTimeField()
+    date_modification = serializers.DateTimeField()
+
+    @classmethod
+    def projection(cls, queryset):
+        """
+        Colonnes de la représentation en une requête: la description est
+        coupée en base (un caractère de plus pour savoir s'il faut l'élider),
+        le compteur vient de StatistiqueOffre
+        """
+        return queryset.values(
+            "id",
+            "titre",
+            "salaire",
+            "competences_requises",
+            "date_creation",
+            "date_modification",
+            "recruteur",
+            description_debut=Left("description", cls.LONGUEUR_DESCRIPTION + 1),
+            recruteur_nom=F("recruteur__username"),
+            nombre_candidatures=Coalesce(
+                F("statistique__en_attente")
+                + F("statistique__acceptees")
+                + F("statistique__refusees"),
+                0,
+            ),
+        )
+
+    def to_representation(self, ligne):
+        description = ligne["description_debut"]
+        if len(description) > self.LONGUEUR_DESCRIPTION:
+            description = description[: self.LONGUEUR_DESCRIPTION - 1] + "…"
+        salaire = ligne["salaire"]
+        return {
+            "id": ligne["id"],
+            "titre": ligne["titre"],
+            "description": description,
+            "salaire": None if salaire is None else f"{salaire:.2f}",
+            "competences_requises": ligne["competences_requises"],
+            "recruteur": ligne["recruteur"],
+            "recruteur_nom": ligne["recruteur_nom"],
+            "nombre_candidatures": ligne["nombre_candidatures"],
+            "date_creation": date_iso(ligne["date_creation"]),
+            "date_modification": date_iso(ligne["date_modification"]),
+        }
+
+
 class CandidatureSerializer(serializers.ModelSerializer):
+    offre_titre = serializers.CharField(source="offre.titre", read_only=True)
+    candidat_nom = serializers.CharField(source="candidat.username", read_only=True)
+
     class Meta:
         model = Candidature
-        fields = "__all__"
-        read_only_fields = ["id", "date_creation", "candidat", "offre"]
+        # le texte extrait du cv sert à la recherche, il n'est pas renvoyé
+        exclude = ("texte_cv", "vecteur_cv")
+        read_only_fields = [
+            "id",
+            "date_creation",
+            "candidat",
+            "offre",
+            "statut_cv",
+            "empreinte_cv",
+        ]
+
+    @staticmethod
+    def optimiser_queryset(queryset):
+        """Joint l'offre et le candidat en une requête pour les champs imbriqués"""
+        return queryset.select_related("offre", "candidat").only(
+            "id",
+            "cv",
+            "statut_cv",
+            "empreinte_cv",
+            "lettre_motivation",
+            "date_creation",
+            "date_modification",
+            "statut",
+            "offre__id",
+            "offre__titre",
+            "candidat__id",
+            "candidat__username",
+        )
 
     def create(self, validated_data):
-        # Vérifier si une candidature existe déjà pour cette offre et ce candidat
-        candidat = validated_data.get("candidat")
-        offre = validated_data.get("offre")
+        """
+        Insère directement la candidature avec candidat_id et offre_id, sans
+        lecture préalable: la base tranche, même entre requêtes concurrentes.
+        Une erreur d'intégrité est ensuite qualifiée: clé étrangère vers une
+        offre absente (vérifiée au commit, l'offre a pu être supprimée entre
+        temps) ou contrainte unique (candidat, offre)
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            offre_id = validated_data.get("offre_id")
+            if not Offre.objects.filter(pk=offre_id).exists():
+                raise NotFound("Offre introuvable.")
+            if Candidature.objects.filter(
+                candidat_id=validated_data.get("candidat_id"), offre_id=offre_id
+            ).exists():
+                raise serializers.ValidationError(
+                    "Vous avez déjà postulé à cette offre."
+                )
+            raise
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, validated_data)
+
+
+CHOIX_STATUTS = Candidature._meta.get_field("statut").choices
+
+
+class StatutCandidatureSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    statut = serializers.ChoiceField(choices=CHOIX_STATUTS)
+
+
+class FiltreCandidaturesSerializer(serializers.Serializer):
+    offre = serializers.IntegerField(required=False)
+    statut = serializers.ChoiceField(choices=CHOIX_STATUTS, required=False)
+
+
+class MiseAJourStatutsSerializer(serializers.Serializer):
+    """Liste de paires (id, statut), ou filtre et statut commun"""
+
+    TAILLE_MAX = 1000
+
+    candidatures = StatutCandidatureSerializer(
+        many=True, required=False, max_length=TAILLE_MAX
+    )
+    filtre = FiltreCandidaturesSerializer(required=False)
+    statut = serializers.ChoiceField(choices=CHOIX_STATUTS, required=False)
+
+    def validate(self, data):
+        if ("candidatures" in data) == ("filtre" in data):
+            raise serializers.ValidationError(
+                "Indiquez soit une liste de candidatures, soit un filtre."
+            )
+        if "filtre" in data and "statut" not in data:
+            raise serializers.ValidationError(
+                {"statut": "Le statut à appliquer au filtre est obligatoire."}
+            )
+        return data
+
+
+class CandidatureRechercheSerializer(CandidatureSerializer):
+    rang = serializers.FloatField(read_only=True)
+
+
+class CandidatCorrespondanceSerializer(UserSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ("score",)
 
-        if Candidature.objects.filter(candidat=candidat, offre=offre).exists():
-            raise serializers.ValidationError("Vous avez déjà postulé à cette offre.")
 
-        return super().create(validated_data)
+class OffreCorrespondanceSerializer(OffreSerializer):
+    score = serializers.FloatField(read_only=True)
@@ -0,0 +1,363 @@
+"""Signaux pour maintenir les données dénormalisées de l'application"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .authentication import cache_utilisateurs
+from .cache import invalider_liste_offres_au_commit, invalider_offre_au_commit
+from .competences import lignes_competences, vecteur_pour, vecteurs_pour
+from .evenements import enregistrer, evenement
+from .models import (
+    Candidature,
+    CompetenceCandidat,
+    FichierCV,
+    Offre,
+    StatistiqueOffre,
+    User,
+)
+from .recherche import index_cvs, index_offres, utilise_postgresql
+from .stockage import empreinte_depuis_nom
+from .taches import extraire_cv, soumettre
+
+# envoyé une fois par mise à jour en masse, dans la transaction, avec
+# recruteur_id et changements: [(id, offre_id, ancien statut, nouveau statut)]
+statuts_candidatures_modifies = Signal()
+
+
+def _competences_modifiees(instance, texte, update_fields):
+    if update_fields is not None and not {
+        "competences",
+        "competences_requises",
+    } & set(update_fields):
+        return False
+    return instance._state.adding or texte != getattr(
+        instance, "_competences_initiales", None
+    )
+
+
+@receiver(pre_save, sender=User)
+def vectoriser_competences_utilisateur(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Recalcule le vecteur de compétences d'un profil modifié"""
+    if not raw and _competences_modifiees(
+        instance, instance.competences, update_fields
+    ):
+        instance.vecteur_competences = vecteur_pour(instance.competences)
+        instance._competences_initiales = instance.competences
+        instance._competences_a_indexer = True
+
+
+@receiver(post_save, sender=User)
+def indexer_competences_utilisateur(sender, instance, created, raw=False, **kwargs):
+    """Tient à jour l'index CompetenceCandidat d'un profil modifié"""
+    if raw or not instance.__dict__.pop("_competences_a_indexer", False):
+        return
+    if not created:
+        CompetenceCandidat.objects.filter(candidat_id=instance.pk).delete()
+    CompetenceCandidat.objects.bulk_create(
+        lignes_competences(instance.pk, instance.vecteur_competences)
+    )
+
+
+@receiver(pre_save, sender=Offre)
+def vectoriser_competences_offre(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Recalcule le vecteur de compétences requises d'une offre modifiée"""
+    if not raw and _competences_modifiees(
+        instance, instance.competences_requises, update_fields
+    ):
+        instance.vecteur_competences = vecteur_pour(instance.competences_requises)
+        instance._competences_initiales = instance.competences_requises
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalider_cache_utilisateur(sender, instance, **kwargs):
+    cache_utilisateurs.invalider(instance.pk)
+
+
+@receiver(post_save, sender=Offre)
+def creer_statistique_offre(sender, instance, created, raw=False, **kwargs):
+    """Crée la ligne de statistiques vide d'une nouvelle offre"""
+    if created and not raw:
+        StatistiqueOffre.objects.create(
+            offre_id=instance.pk, recruteur_id=instance.recruteur_id
+        )
+
+
+@receiver(post_save, sender=Offre)
+def indexer_offre(sender, instance, raw=False, **kwargs):
+    """Tient à jour l'index de recherche en mémoire hors PostgreSQL"""
+    if not raw and not utilise_postgresql():
+        index_offres.indexer(instance.pk, instance.titre, instance.description)
+
+
+@receiver(post_delete, sender=Offre)
+def desindexer_offre(sender, instance, **kwargs):
+    if not utilise_postgresql():
+        index_offres.retirer(instance.pk)
+
+
+@receiver(post_save, sender=Offre)
+@receiver(post_delete, sender=Offre)
+def invalider_cache_offre(sender, instance, **kwargs):
+    """Invalide le détail de l'offre en cache et les pages de liste, au commit"""
+    invalider_offre_au_commit(instance.pk)
+
+
+# connecté avant compter_candidature, qui met à jour _statut_initial
+@receiver(post_save, sender=Candidature)
+def journaliser_candidature(sender, instance, created, raw=False, **kwargs):
+    """Écrit l'événement de création ou de changement de statut dans l'outbox"""
+    if raw:
+        return
+    statut_initial = getattr(instance, "_statut_initial", None)
+    if created:
+        type_evenement, donnees = "candidature.creee", {"statut": instance.statut}
+    elif statut_initial is not None and statut_initial != instance.statut:
+        type_evenement = "candidature.statut"
+        donnees = {"statut": instance.statut, "ancien_statut": statut_initial}
+    else:
+        return
+    if Candidature.offre.is_cached(instance):
+        recruteur_id = instance.offre.recruteur_id
+    else:
+        recruteur_id = (
+            Offre.objects.filter(pk=instance.offre_id)
+            .values_list("recruteur_id", flat=True)
+            .first()
+        )
+    if recruteur_id is None:
+        # offre absente: la clé étrangère fera échouer la transaction au commit
+        return
+    enregistrer(
+        [
+            evenement(
+                type_evenement,
+                instance.pk,
+                instance.offre_id,
+                instance.candidat_id,
+                recruteur_id,
+                **donnees,
+            )
+        ]
+    )
+
+
+@receiver(statuts_candidatures_modifies)
+def journaliser_statuts(sender, recruteur_id, changements, **kwargs):
+    """Événements d'une mise à jour en masse, écrits par un seul INSERT"""
+    candidats = dict(
+        Candidature.objects.filter(
+            id__in=[changement[0] for changement in changements]
+        ).values_list("id", "candidat_id")
+    )
+    enregistrer(
+        [
+            evenement(
+                "candidature.statut",
+                candidature_id,
+                offre_id,
+                candidats[candidature_id],
+                recruteur_id,
+                statut=nouveau,
+                ancien_statut=ancien,
+            )
+            for candidature_id, offre_id, ancien, nouveau in changements
+        ]
+    )
+
+
+@receiver(post_save, sender=Candidature)
+def compter_candidature(sender, instance, created, raw=False, **kwargs):
+    """Met à jour les compteurs lors d'une création ou d'un changement de statut"""
+    if raw:
+        return
+
+    statut_initial = getattr(instance, "_statut_initial", None)
+    if created:
+        variations = {instance.statut: 1}
+    elif statut_initial is not None and statut_initial != instance.statut:
+        variations = {statut_initial: -1, instance.statut: 1}
+    else:
+        variations = {}
+    instance._statut_initial = instance.statut
+
+    if variations and not StatistiqueOffre.objects.ajuster(
+        instance.offre_id, variations
+    ):
+        # ligne absente (offre antérieure aux statistiques): on la recalcule
+        StatistiqueOffre.objects.reconstruire(offres=[instance.offre_id])
+
+
+def _supprimee_en_cascade(origin):
+    """Suppression partie d'une offre ou d'un utilisateur (voir retirer_candidatures)"""
+    modele = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return modele in (Offre, User)
+
+
+@receiver(pre_delete, sender=Offre)
+@receiver(pre_delete, sender=User)
+def retirer_candidatures(sender, instance, **kwargs):
+    """
+    Avant la suppression en cascade des candidatures d'une offre ou d'un
+    utilisateur: compteurs et références des CV ajustés par requêtes groupées,
+    plutôt que par decompter_candidature et dereferencer_cv pour chacune
+    """
+    if sender is Offre:
+        # la ligne de statistiques de l'offre part avec elle
+        candidatures = Candidature.objects.filter(offre_id=instance.pk)
+    else:
+        # celles des offres du recruteur supprimé: pre_delete de chaque offre
+        candidatures = Candidature.objects.filter(candidat_id=instance.pk).exclude(
+            offre__recruteur_id=instance.pk
+        )
+        variations = defaultdict(lambda: defaultdict(int))
+        for offre_id, statut, nombre in (
+            candidatures.values_list("offre_id", "statut")
+            .annotate(nombre=Count("id"))
+            .order_by()
+        ):
+            variations[offre_id][statut] -= nombre
+        for offre_id, variation in variations.items():
+            StatistiqueOffre.objects.ajuster(offre_id, variation)
+    FichierCV.objects.ajuster_lot(
+        {
+            cv: -nombre
+            for cv, nombre in candidatures.exclude(cv__isnull=True)
+            .exclude(cv="")
+            .values_list("cv")
+            .annotate(nombre=Count("id"))
+            .order_by()
+        }
+    )
+
+
+@receiver(post_delete, sender=Candidature)
+def decompter_candidature(sender, instance, origin=None, **kwargs):
+    """Décrémente les compteurs lors de la suppression d'une candidature"""
+    if _supprimee_en_cascade(origin):
+        return
+    statut = getattr(instance, "_statut_initial", None) or instance.statut
+    # pas de reconstruction ici: l'offre peut être en cours de suppression
+    StatistiqueOffre.objects.ajuster(instance.offre_id, {statut: -1})
+
+
+@receiver(pre_save, sender=Candidature)
+def oublier_texte_cv(sender, instance, raw=False, **kwargs):
+    """Le texte d'un CV remplacé est effacé, puis extrait à nouveau"""
+    if not raw and (instance.cv.name or None) != getattr(instance, "_cv_initial", None):
+        instance.texte_cv = None
+
+
+@receiver(post_save, sender=Candidature)
+def referencer_cv(sender, instance, raw=False, **kwargs):
+    """Tient à jour le nombre de références des fichiers CV partagés"""
+    if raw:
+        return
+    cv_initial = getattr(instance, "_cv_initial", None)
+    cv = instance.cv.name or None
+    if cv != cv_initial:
+        FichierCV.objects.ajuster(cv_initial, -1)
+        FichierCV.objects.ajuster(cv, 1)
+        if not utilise_postgresql():
+            index_cvs.retirer(instance.pk)
+        if empreinte_depuis_nom(cv):
+            # un CV du spool est extrait par traiter_cv une fois rangé
+            soumettre(extraire_cv, instance.pk, cv)
+    instance._cv_initial = cv
+
+
+@receiver(post_delete, sender=Candidature)
+def dereferencer_cv(sender, instance, origin=None, **kwargs):
+    """Le fichier n'est pas supprimé ici: voir la commande nettoyer_cvs"""
+    if not _supprimee_en_cascade(origin):
+        FichierCV.objects.ajuster(
+            getattr(instance, "_cv_initial", None) or instance.cv.name, -1
+        )
+    if not utilise_postgresql():
+        index_cvs.retirer(instance.pk)
+
+
+def creer_offres_en_masse(offres, taille_lot=1000):
+    """
+    Insère des offres par bulk_create, qui n'émet pas de signaux: les données
+    dénormalisées (compétences, statistiques, index de recherche) sont donc
+    maintenues ici, par lots
+    """
+    vecteurs = vecteurs_pour(offre.competences_requises for offre in offres)
+    for offre, vecteur in zip(offres, vecteurs):
+        offre.vecteur_competences = vecteur
+        offre._competences_initiales = offre.competences_requises
+
+    with transaction.atomic():
+        offres = Offre.objects.bulk_create(offres, batch_size=taille_lot)
+        StatistiqueOffre.objects.bulk_create(
+            [
+                StatistiqueOffre(offre_id=offre.pk, recruteur_id=offre.recruteur_id)
+                for offre in offres
+            ],
+            batch_size=taille_lot,
+        )
+
+    if not utilise_postgresql():
+        for offre in offres:
+            index_offres.indexer(offre.pk, offre.titre, offre.description)
+    invalider_liste_offres_au_commit()
+    return offres
+
+
+def mettre_a_jour_statuts(recruteur_id, statuts_par_id, taille_lot=1000):
+    """
+    Applique {id: statut} aux candidatures des offres du recruteur avec un
+    UPDATE par statut, qui n'émet pas post_save: statistiques et date de
+    modification sont donc maintenues ici. Retourne {id: résultat}
+    """
+    resultats = dict.fromkeys(statuts_par_id, "introuvable")
+    changements = []
+    with transaction.atomic():
+        actuelles = Candidature.objects.filter(
+            offre__recruteur_id=recruteur_id, id__in=statuts_par_id
+        ).select_for_update()
+        ids_par_statut = defaultdict(list)
+        for candidature_id, offre_id, ancien in actuelles.values_list(
+            "id", "offre_id", "statut"
+        ).iterator(chunk_size=taille_lot):
+            nouveau = statuts_par_id[candidature_id]
+            if nouveau == ancien:
+                resultats[candidature_id] = "inchangée"
+                continue
+            resultats[candidature_id] = "modifiée"
+            ids_par_statut[nouveau].append(candidature_id)
+            changements.append((candidature_id, offre_id, ancien, nouveau))
+        if not changements:
+            return resultats
+
+        maintenant = timezone.now()
+        for statut, ids in ids_par_statut.items():
+            Candidature.objects.filter(
+                offre__recruteur_id=recruteur_id, id__in=ids
+            ).update(statut=statut, date_modification=maintenant)
+
+        # événements avant statistiques, comme pour une candidature seule
+        # (journaliser_candidature avant compter_candidature): les verrous de
+        # l'outbox sont toujours pris avant ceux des statistiques
+        statuts_candidatures_modifies.send(
+            sender=Candidature, recruteur_id=recruteur_id, changements=changements
+        )
+
+        variations = defaultdict(lambda: defaultdict(int))
+        for _, offre_id, ancien, nouveau in changements:
+            variations[offre_id][ancien] -= 1
+            variations[offre_id][nouveau] += 1
+        for offre_id, variation in variations.items():
+            if not StatistiqueOffre.objects.ajuster(offre_id, variation):
+                StatistiqueOffre.objects.reconstruire(offres=[offre_id])
+    return resultats
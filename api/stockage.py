@@ -0,0 +1,100 @@
+"""
+Stockage des CV adressé par contenu.
+
+Chaque fichier est rangé sous ``cvs/<sha256><ext>``: deux candidatures qui
+joignent le même CV partagent un seul fichier, servi par une seule URL. Le
+nombre de candidatures qui référencent chaque fichier est tenu dans
+``FichierCV`` et la commande ``nettoyer_cvs`` supprime les fichiers orphelins.
+"""
+
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+TAILLE_MORCEAU = 64 * 1024
+DOSSIER_CVS = "cvs"
+# les noms tiennent dans le FileField (100 caractères) quel que soit l'original
+LONGUEUR_MAX_EXTENSION = 10
+EXTENSION_VALIDE = re.compile(rf"^\.[a-z0-9]{{1,{LONGUEUR_MAX_EXTENSION - 1}}}$")
+NOM_ADRESSE_CONTENU = re.compile(
+    rf"^{DOSSIER_CVS}/(?P<empreinte>[0-9a-f]{{64}})(\.\w+)?$"
+)
+
+
+def extension(nom):
+    """Extension du nom en minuscules, ou "" si elle est trop longue ou exotique"""
+    _, suffixe = os.path.splitext(nom)
+    suffixe = suffixe.lower()
+    return suffixe if EXTENSION_VALIDE.match(suffixe) else ""
+
+
+def empreinte_depuis_nom(nom):
+    """Empreinte SHA-256 portée par un nom du stockage, ou None"""
+    correspondance = NOM_ADRESSE_CONTENU.match(nom or "")
+    return correspondance.group("empreinte") if correspondance else None
+
+
+class StockageCVAdresseContenu(FileSystemStorage):
+    """FileSystemStorage qui nomme les fichiers d'après l'empreinte de leur contenu"""
+
+    def nom_pour(self, empreinte, nom_original):
+        return f"{DOSSIER_CVS}/{empreinte}{extension(nom_original)}"
+
+    def get_available_name(self, name, max_length=None):
+        # le nom définitif est choisi dans _save, d'après le contenu
+        return name
+
+    def _save(self, name, content):
+        sha256 = hashlib.sha256()
+        content.seek(0)
+        for morceau in content.chunks(TAILLE_MORCEAU):
+            sha256.update(morceau)
+        content.seek(0)
+        nom = self.nom_pour(sha256.hexdigest(), name)
+        if self.reutiliser(nom):
+            return nom
+        return super()._save(nom, content)
+
+    def reutiliser(self, nom):
+        """
+        Indique si le contenu est déjà stocké sous ce nom. Le fichier est
+        d'abord soustrait à nettoyer_cvs, qui pourrait sinon le supprimer
+        entre ce test et l'enregistrement de la nouvelle référence
+        """
+        # import local: models importe ce module
+        from .models import FichierCV
+
+        FichierCV.objects.reutiliser(nom)
+        return self.exists(nom)
+
+    def deposer(self, nom, content):
+        """Enregistre un fichier sous le nom donné, sans l'adresser par contenu"""
+        return super()._save(nom, content)
+
+    def ranger(self, nom_local):
+        """
+        Range un fichier déjà présent sous la racine du stockage (le spool):
+        empreinte calculée par morceaux puis simple renommage, ou suppression
+        si ce contenu est déjà stocké
+        """
+        chemin = self.path(nom_local)
+        sha256 = hashlib.sha256()
+        with open(chemin, "rb") as fichier:
+            for morceau in iter(lambda: fichier.read(TAILLE_MORCEAU), b""):
+                sha256.update(morceau)
+        nom = self.nom_pour(sha256.hexdigest(), nom_local)
+        if self.reutiliser(nom):
+            os.remove(chemin)
+        else:
+            os.makedirs(os.path.dirname(self.path(nom)), exist_ok=True)
+            os.replace(chemin, self.path(nom))
+        return nom
+
+
+stockage_cv = StockageCVAdresseContenu()
+
+
+def obtenir_stockage_cv():
+    return stockage_cv
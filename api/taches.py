@@ -0,0 +1,145 @@
+"""
+Traitement en arrière-plan des CV déposés avec une candidature.
+
+La vue se contente de déplacer le fichier téléversé (déjà écrit sur disque par
+morceaux) dans ``cvs/spool/`` et de répondre. Un pool de threads calcule
+ensuite l'empreinte SHA-256 du fichier, le range dans le stockage adressé par
+contenu (voir api/stockage.py): un même CV envoyé plusieurs fois n'est stocké
+qu'une fois, puis en extrait le texte pour la recherche des recruteurs.
+
+Le pool vit dans le processus: une tâche perdue par un redémarrage laisse la
+candidature "en traitement" avec son fichier dans le spool, jusqu'à ce que la
+commande ``relancer_cvs`` la reprenne.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .extraction import extraire_texte
+from .models import Candidature, FichierCV
+from .recherche import index_cvs, utilise_postgresql
+from .stockage import empreinte_depuis_nom, extension, stockage_cv
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_TRAVAILLEURS = 2
+DOSSIER_SPOOL = "cvs/spool"
+
+_verrou = threading.Lock()
+_executeur = None
+
+
+def executeur():
+    """Pool de threads partagé, ou None si le traitement doit être synchrone"""
+    global _executeur
+    nombre = getattr(settings, "CV_NOMBRE_TRAVAILLEURS", NOMBRE_TRAVAILLEURS)
+    if nombre <= 0:
+        return None
+    with _verrou:
+        if _executeur is None:
+            _executeur = ThreadPoolExecutor(
+                max_workers=nombre, thread_name_prefix="traitement-cv"
+            )
+        return _executeur
+
+
+def soumettre(fonction, *args):
+    """Exécute la tâche après validation de la transaction courante"""
+
+    def lancer():
+        pool = executeur()
+        if pool is None:
+            fonction(*args)
+        else:
+            pool.submit(_dans_un_thread, fonction, *args)
+
+    transaction.on_commit(lancer)
+
+
+def _dans_un_thread(fonction, *args):
+    try:
+        fonction(*args)
+    except Exception:
+        logger.exception("Échec de la tâche %s", fonction.__name__)
+    finally:
+        # chaque thread du pool ouvre sa propre connexion
+        connection.close()
+
+
+def mettre_en_spool(fichier):
+    """
+    Enregistre le fichier téléversé dans le spool. Pour un fichier temporaire,
+    FileSystemStorage se contente d'un renommage, sans recopie
+    """
+    return stockage_cv.deposer(
+        f"{DOSSIER_SPOOL}/{uuid.uuid4().hex}{extension(fichier.name)}", fichier
+    )
+
+
+def traiter_cv(candidature_id, nom_spool):
+    """Range le CV par empreinte, en extrait le texte et met à jour la candidature"""
+    try:
+        nom_final = stockage_cv.ranger(nom_spool)
+    except Exception:
+        logger.exception("Traitement du CV de la candidature %s", candidature_id)
+        # ne marque pas en erreur un CV déjà rangé par une relance concurrente
+        Candidature.objects.filter(pk=candidature_id, cv=nom_spool).update(
+            statut_cv="erreur", date_modification=timezone.now()
+        )
+        return None
+    texte = texte_cv(nom_final)
+
+    with transaction.atomic():
+        mises_a_jour = Candidature.objects.filter(
+            pk=candidature_id, cv=nom_spool
+        ).update(
+            cv=nom_final,
+            empreinte_cv=empreinte_depuis_nom(nom_final),
+            texte_cv=texte,
+            statut_cv="traité",
+            date_modification=timezone.now(),
+        )
+        if mises_a_jour:
+            # update() n'émet pas post_save: la référence est comptée ici
+            FichierCV.objects.ajuster(nom_final, 1)
+    if mises_a_jour:
+        indexer_cv(candidature_id, texte)
+    else:
+        # candidature supprimée ou CV remplacé entre temps: nettoyer_cvs
+        # supprimera le fichier s'il n'est référencé nulle part
+        logger.info("CV %s orphelin pour la candidature %s", nom_final, candidature_id)
+    return nom_final
+
+
+def extraire_cv(candidature_id, nom):
+    """Extrait le texte d'un CV enregistré directement (hors spool)"""
+    texte = texte_cv(nom)
+    if Candidature.objects.filter(pk=candidature_id, cv=nom).update(
+        texte_cv=texte, date_modification=timezone.now()
+    ):
+        indexer_cv(candidature_id, texte)
+
+
+def texte_cv(nom):
+    try:
+        return extraire_texte(stockage_cv.path(nom))
+    except Exception:
+        # un CV illisible reste attaché à la candidature, sans texte
+        logger.warning("Extraction du texte de %s impossible", nom, exc_info=True)
+        return None
+
+
+def indexer_cv(candidature_id, texte):
+    """Sous PostgreSQL, le tsvector est tenu à jour par un trigger"""
+    if utilise_postgresql():
+        return
+    if texte:
+        index_cvs.indexer(candidature_id, texte)
+    else:
+        index_cvs.retirer(candidature_id)
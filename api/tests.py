@@ -1,11 +1,57 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+import zlib
+from unittest import skipIf
+from unittest.mock import patch
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-from api.models import User, Offre, Candidature
+from api.authentication import cache_utilisateurs
+from api.competences import meilleurs_candidats
+from api.diffusion import canal_candidat, diffuseur
+from api.evenements import cles_verrous, diffuser, evenement, representation
+from api.extraction import BUDGET_FLUX_PDF, extraire_texte, flux_pdf
+from api.metriques import registre
+from api.models import (
+    User,
+    Offre,
+    Candidature,
+    Competence,
+    CompetenceCandidat,
+    Evenement,
+    FichierCV,
+    StatistiqueOffre,
+)
+from api.recherche import index_cvs, index_offres, rechercher_offres
+from api.renderers import RapideJSONRenderer
+from api.serializers import (
+    OffreResumeSerializer,
+    PersonnaliseeTokenObtainPairSerializer,
+)
+from api.signals import statuts_candidatures_modifies
+from api.views_async import sondeur_outbox
 
 
 class UserModelTest(TestCase):
@@ -87,6 +133,11 @@ class CandidatureModelTest(TestCase):
         self.assertEqual(self.candidature.offre, self.offre)
         self.assertTrue(hasattr(self.candidature, "date_creation"))
 
+    def test_candidature_unique_par_candidat_et_offre(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Candidature.objects.create(candidat=self.candidat, offre=self.offre)
+        self.assertEqual(StatistiqueOffre.objects.get(offre=self.offre).en_attente, 1)
+
 
 class AuthenticationAPITest(APITestCase):
     def setUp(self):
@@ -130,6 +181,8 @@ class AuthenticationAPITest(APITestCase):
 
 class OffreAPITest(APITestCase):
     def setUp(self):
+        # invalidé au commit: le cache ne l'est jamais dans un TestCase
+        cache.clear()
         self.client = APIClient()
 
         # Créer un recruteur
@@ -171,6 +224,93 @@ class OffreAPITest(APITestCase):
         response = self.client.get(self.liste_offres_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_liste_offres_pagination_curseur(self):
+        for i in range(4):
+            Offre.objects.create(
+                titre=f"Offre {i}",
+                description="Description",
+                salaire=Decimal("50000.00"),
+                recruteur=self.recruteur,
+            )
+        self.client.force_authenticate(user=self.candidat)
+
+        ids = []
+        url = f"{self.liste_offres_url}?taille=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids += [offre["id"] for offre in response.data["results"]]
+            url = response.data["next"]
+
+        attendus = list(
+            Offre.objects.order_by("-date_creation", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, attendus)
+
+        # le lien précédent ramène à la page déjà vue
+        response = self.client.get(f"{self.liste_offres_url}?taille=2")
+        response = self.client.get(response.data["next"])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([offre["id"] for offre in response.data["results"]], ids[:2])
+
+    def test_liste_offres_representation_abregee(self):
+        longueur = OffreResumeSerializer.LONGUEUR_DESCRIPTION
+        self.offre.description = "x" * (longueur + 50)
+        self.offre.save()
+        Candidature.objects.create(candidat=self.candidat, offre=self.offre)
+        self.client.force_authenticate(user=self.candidat)
+
+        response = self.client.get(self.liste_offres_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ligne = response.data["results"][0]
+        self.assertEqual(len(ligne["description"]), longueur)
+        self.assertTrue(ligne["description"].endswith("…"))
+        self.assertEqual(ligne["recruteur_nom"], self.recruteur.username)
+        self.assertEqual(ligne["nombre_candidatures"], 1)
+        # mêmes formats que la représentation complète, servie par le détail
+        complete = self.client.get(self.detail_offre_url).data
+        self.assertEqual(complete["description"], self.offre.description)
+        for champ in ("salaire", "date_creation", "date_modification", "recruteur"):
+            self.assertEqual(ligne[champ], complete[champ])
+
+    def test_liste_offres_curseur_invalide(self):
+        self.client.force_authenticate(user=self.candidat)
+        response = self.client.get(f"{self.liste_offres_url}?curseur=invalide")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_liste_offres_curseur_falsifie(self):
+        self.client.force_authenticate(user=self.candidat)
+        for contenu in (
+            ["x", 1, False],
+            [{}, 1, False],
+            [None, 1, False],
+            ["2024-13-45T00:00:00", 1, False],
+            ["2024-01-01T00:00:00+00:00", 2**70, False],
+            {"valeur": 1},
+        ):
+            curseur = base64.urlsafe_b64encode(json.dumps(contenu).encode()).decode()
+            response = self.client.get(self.liste_offres_url, {"curseur": curseur})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, contenu)
+
+    def test_offres_du_recruteur_paginees(self):
+        Offre.objects.create(
+            titre="Autre offre",
+            description="Description",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        self.client.force_authenticate(user=self.recruteur)
+
+        response = self.client.get(self.recruteur_offres_url, {"taille": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [offre["id"] for offre in response.data["results"]], [self.offre.id]
+        )
+        self.assertIsNone(response.data["next"])
+
     def test_creation_offre_recruteur(self):
         self.client.force_authenticate(user=self.recruteur)
         nouvelle_offre = {
@@ -239,6 +379,8 @@ class CandidatureAPITest(APITestCase):
         response = self.client.post(self.creer_candidature_url, {}, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Candidature.objects.count(), 1)
+        self.assertEqual(response.data["candidat_nom"], "candidat")
+        self.assertEqual(response.data["offre_titre"], "Développeur Full Stack")
 
     def test_creer_candidature_recruteur_interdit(self):
         self.client.force_authenticate(user=self.recruteur)
@@ -252,7 +394,7 @@ class CandidatureAPITest(APITestCase):
         self.client.force_authenticate(user=self.candidat)
         response = self.client.get(self.liste_candidatures_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_candidature_double_impossible(self):
         # Créer une première candidature
@@ -263,3 +405,1647 @@ class CandidatureAPITest(APITestCase):
         response = self.client.post(self.creer_candidature_url, {}, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(Candidature.objects.count(), 1)
+
+
+@skipIf(
+    connection.vendor == "sqlite",
+    "écritures concurrentes impossibles sur la base SQLite de test (en mémoire)",
+)
+class CandidatureConcurrenteAPITest(TransactionTestCase):
+    """Candidatures envoyées en même temps, chacune sur sa connexion"""
+
+    NOMBRE_REQUETES = 4
+
+    def setUp(self):
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur",
+            description="Poste",
+            salaire=Decimal("50000.00"),
+            recruteur=recruteur,
+        )
+
+    def envoyer_ensemble(self, url, methode="post", donnees=None, utilisateur=None):
+        depart = threading.Barrier(self.NOMBRE_REQUETES)
+        statuts = []
+
+        def envoyer():
+            client = APIClient()
+            client.force_authenticate(user=utilisateur or self.candidat)
+            depart.wait()
+            try:
+                reponse = getattr(client, methode)(url, donnees or {}, format="json")
+                statuts.append(reponse.status_code)
+            finally:
+                connection.close()
+
+        fils = [threading.Thread(target=envoyer) for _ in range(self.NOMBRE_REQUETES)]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+        return sorted(statuts)
+
+    def test_doublons_concurrents(self):
+        statuts = self.envoyer_ensemble(
+            reverse("creer-candidature", kwargs={"offre_id": self.offre.pk})
+        )
+        self.assertEqual(statuts, [201] + [400] * (self.NOMBRE_REQUETES - 1), statuts)
+        self.assertEqual(Candidature.objects.count(), 1)
+        self.assertEqual(StatistiqueOffre.objects.get(offre=self.offre).en_attente, 1)
+        self.assertEqual(Evenement.objects.count(), 1)
+
+    def test_statut_modifie_en_meme_temps(self):
+        candidature = Candidature.objects.create(
+            candidat=self.candidat, offre=self.offre
+        )
+        statuts = self.envoyer_ensemble(
+            reverse("mettre-a-jour-statut", kwargs={"pk": candidature.pk}),
+            methode="patch",
+            donnees={"statut": "acceptée"},
+            utilisateur=self.offre.recruteur,
+        )
+        self.assertEqual(statuts, [200] * self.NOMBRE_REQUETES, statuts)
+        statistique = StatistiqueOffre.objects.get(offre=self.offre)
+        self.assertEqual((statistique.en_attente, statistique.acceptees), (0, 1))
+        self.assertEqual(Evenement.objects.filter(type="candidature.statut").count(), 1)
+
+
+class CandidatureOffreIntrouvableAPITest(TransactionTestCase):
+    """La clé étrangère vers l'offre n'est vérifiée qu'au commit"""
+
+    def setUp(self):
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.candidat)
+
+    def test_candidature_offre_introuvable(self):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.post(
+                reverse("creer-candidature", kwargs={"offre_id": 999}),
+                {},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Candidature.objects.exists())
+        self.assertFalse(Evenement.objects.exists())
+        # pas de lecture de l'offre avant l'insertion
+        premiere = next(
+            requete["sql"]
+            for requete in requetes.captured_queries
+            if '"api_candidature"' in requete["sql"] or '"api_offre"' in requete["sql"]
+        )
+        self.assertTrue(premiere.startswith('INSERT INTO "api_candidature"'), premiere)
+
+
+class StatistiquesRecruteurAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+
+        self.candidats = [
+            User.objects.create_user(
+                username=f"candidat{i}",
+                email=f"candidat{i}@example.com",
+                password="password123",
+                role="candidat",
+            )
+            for i in range(3)
+        ]
+
+        self.statistiques_url = reverse("statistiques")
+
+    def creer_offre(self, titre):
+        return Offre.objects.create(
+            titre=titre,
+            description="Description",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+
+    def test_statistiques_par_statut(self):
+        offre = self.creer_offre("Développeur Django")
+        self.creer_offre("Développeur React")
+        Candidature.objects.create(candidat=self.candidats[0], offre=offre)
+        Candidature.objects.create(
+            candidat=self.candidats[1], offre=offre, statut="acceptée"
+        )
+        Candidature.objects.create(
+            candidat=self.candidats[2], offre=offre, statut="refusée"
+        )
+
+        self.client.force_authenticate(user=self.recruteur)
+        response = self.client.get(self.statistiques_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_offres"], 2)
+        self.assertEqual(response.data["total_candidatures"], 3)
+        self.assertEqual(
+            response.data["candidatures_par_offre"],
+            {"Développeur Django": 3, "Développeur React": 0},
+        )
+        self.assertEqual(
+            response.data["candidatures_par_statut"],
+            {"en attente": 1, "acceptée": 1, "refusée": 1},
+        )
+
+    def test_nombre_requetes_constant(self):
+        self.client.force_authenticate(user=self.recruteur)
+        for i in range(10):
+            offre = self.creer_offre(f"Offre {i}")
+            Candidature.objects.create(candidat=self.candidats[0], offre=offre)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.statistiques_url)
+        self.assertEqual(response.data["total_offres"], 10)
+        self.assertEqual(response.data["total_candidatures"], 10)
+
+    def test_statistiques_suivent_statut_et_suppression(self):
+        offre = self.creer_offre("Développeur Django")
+        candidature = Candidature.objects.create(
+            candidat=self.candidats[0], offre=offre
+        )
+        Candidature.objects.create(candidat=self.candidats[1], offre=offre)
+
+        self.client.force_authenticate(user=self.recruteur)
+        response = self.client.patch(
+            reverse("mettre-a-jour-statut", kwargs={"pk": candidature.pk}),
+            {"statut": "acceptée"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        statistique = StatistiqueOffre.objects.get(offre=offre)
+        self.assertEqual(statistique.en_attente, 1)
+        self.assertEqual(statistique.acceptees, 1)
+
+        Candidature.objects.get(pk=candidature.pk).delete()
+        statistique.refresh_from_db()
+        self.assertEqual(statistique.acceptees, 0)
+        self.assertEqual(statistique.en_attente, 1)
+
+    def test_reconstruire_statistiques(self):
+        offre = self.creer_offre("Développeur Django")
+        Candidature.objects.create(candidat=self.candidats[0], offre=offre)
+        StatistiqueOffre.objects.filter(offre=offre).update(en_attente=42)
+
+        call_command("reconstruire_statistiques", stdout=StringIO())
+
+        self.assertEqual(StatistiqueOffre.objects.get(offre=offre).en_attente, 1)
+
+
+class RechercheOffreAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+
+        self.offre_titre = Offre.objects.create(
+            titre="Développeur Python",
+            description="Rejoignez notre équipe produit",
+            salaire=Decimal("55000.00"),
+            recruteur=self.recruteur,
+        )
+        self.offre_description = Offre.objects.create(
+            titre="Ingénieur logiciel",
+            description="Nous cherchons des développeurs Python expérimentés",
+            salaire=Decimal("60000.00"),
+            recruteur=self.recruteur,
+        )
+        Offre.objects.create(
+            titre="Comptable",
+            description="Gestion de la comptabilité",
+            salaire=Decimal("40000.00"),
+            recruteur=self.recruteur,
+        )
+
+        self.recherche_url = reverse("recherche")
+        self.client.force_authenticate(user=self.recruteur)
+
+    def test_recherche_plein_texte_classee(self):
+        response = self.client.get(self.recherche_url, {"q": "développeurs python"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # le titre pèse plus que la description
+        self.assertEqual(
+            [offre["id"] for offre in response.data],
+            [self.offre_titre.id, self.offre_description.id],
+        )
+
+    def test_recherche_simple_paginee(self):
+        response = self.client.get(self.recherche_url, {"search": "e", "taille": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_recherche_suit_les_modifications(self):
+        self.offre_titre.titre = "Chef de projet"
+        self.offre_titre.save()
+        self.offre_description.delete()
+
+        response = self.client.get(self.recherche_url, {"q": "développeur"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    @skipIf(connection.vendor == "postgresql", "repli en mémoire hors PostgreSQL")
+    def test_recherche_terme_frequent_par_lots(self):
+        autre = User.objects.create_user(
+            username="autre", password="password123", role="recruteur"
+        )
+        Offre.objects.bulk_create(
+            Offre(
+                titre=f"Poste {numero}",
+                description="python " * (1 + numero % 5),
+                salaire=Decimal("50000.00"),
+                recruteur=autre if numero % 2 else self.recruteur,
+            )
+            for numero in range(60)
+        )
+        index_offres.vider()
+        attendus = [
+            identifiant
+            for identifiant, _ in index_offres.chercher("python")
+            if Offre.objects.get(pk=identifiant).recruteur_id == self.recruteur.id
+        ][:5]
+
+        with patch("api.recherche.TAILLE_LOT_REPLI", 7), self.assertNumQueries(3):
+            offres = list(
+                rechercher_offres(
+                    "python",
+                    Offre.objects.filter(recruteur=self.recruteur),
+                    limite=5,
+                )
+            )
+        self.assertEqual([offre.id for offre in offres], attendus)
+        with patch("api.recherche.MAX_RESULTATS_REPLI", 20):
+            self.assertEqual(rechercher_offres("python").count(), 20)
+
+
+class CorrespondanceCompetencesAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+        self.candidat_complet = User.objects.create_user(
+            username="complet",
+            password="password123",
+            role="candidat",
+            competences="Python, Django, PostgreSQL",
+        )
+        self.candidat_partiel = User.objects.create_user(
+            username="partiel",
+            password="password123",
+            role="candidat",
+            competences="python; React",
+        )
+        User.objects.create_user(
+            username="aucun",
+            password="password123",
+            role="candidat",
+            competences="Comptabilité",
+        )
+
+        self.offre = Offre.objects.create(
+            titre="Développeur Django",
+            description="Poste de développeur Django",
+            salaire=Decimal("60000.00"),
+            competences_requises="Django, Python",
+            recruteur=self.recruteur,
+        )
+
+    def test_meilleurs_candidats_pour_offre(self):
+        self.client.force_authenticate(user=self.recruteur)
+        response = self.client.get(
+            reverse("meilleurs-candidats", kwargs={"offre_id": self.offre.pk})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [candidat["username"] for candidat in response.data],
+            ["complet", "partiel"],
+        )
+        self.assertGreater(response.data[0]["score"], response.data[1]["score"])
+
+    def test_vecteur_creux_et_index_des_candidats(self):
+        # 4 octets par compétence, quelle que soit la taille du vocabulaire
+        Competence.objects.bulk_create(
+            [Competence(nom=f"competence {i}") for i in range(500)]
+        )
+        self.candidat_partiel.competences = "Python, competence 499"
+        self.candidat_partiel.save()
+        self.assertEqual(len(self.candidat_partiel.vecteur_competences), 8)
+        self.assertEqual(
+            set(
+                CompetenceCandidat.objects.filter(
+                    candidat=self.candidat_partiel
+                ).values_list("competence__nom", flat=True)
+            ),
+            {"python", "competence 499"},
+        )
+
+        # seuls les candidats partageant une compétence sont lus et notés
+        with CaptureQueriesContext(connection) as requetes:
+            candidats = meilleurs_candidats(self.offre)
+        self.assertEqual(
+            [candidat.username for candidat in candidats], ["complet", "partiel"]
+        )
+        self.assertIn('"api_competencecandidat"', requetes.captured_queries[0]["sql"])
+
+    def test_offres_recommandees_suivent_le_profil(self):
+        self.client.force_authenticate(user=self.candidat_partiel)
+        url = reverse("offres-recommandees")
+        response = self.client.get(url)
+        self.assertEqual([offre["id"] for offre in response.data], [self.offre.id])
+
+        self.client.patch(reverse("profil"), {"competences": "Comptabilité"})
+        # force_authenticate garde l'instance d'avant la modification, écrite
+        # depuis une instance chargée en base
+        self.candidat_partiel.refresh_from_db()
+        response = self.client.get(url)
+        self.assertEqual(response.data, [])
+
+
+class ImportExportOffresAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+        self.client.force_authenticate(user=self.recruteur)
+        self.import_url = reverse("recruteur-offres-import")
+        self.export_url = reverse("recruteur-offres-export")
+
+    def test_import_ndjson_erreurs_par_ligne(self):
+        corps = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "titre": "Développeur Django",
+                        "description": "Poste Django",
+                        "salaire": "50000.00",
+                        "competences_requises": "Django, Python",
+                    }
+                ),
+                json.dumps({"titre": "Sans salaire", "description": "Invalide"}),
+                "pas du json",
+                json.dumps(
+                    {"titre": "Comptable", "description": "Poste", "salaire": "40000"}
+                ),
+            ]
+        )
+        response = self.client.post(
+            self.import_url, corps, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["crees"], 2)
+        self.assertEqual([e["ligne"] for e in response.data["erreurs"]], [2, 3])
+        self.assertIn("salaire", response.data["erreurs"][0]["erreurs"])
+        self.assertEqual(Offre.objects.filter(recruteur=self.recruteur).count(), 2)
+        # les données dérivées sont maintenues malgré bulk_create
+        self.assertEqual(StatistiqueOffre.objects.count(), 2)
+        self.assertNotEqual(
+            Offre.objects.get(titre="Développeur Django").vecteur_competences, b""
+        )
+
+    def test_import_csv_puis_export(self):
+        corps = (
+            "titre,description,salaire,competences_requises\n"
+            'Développeur React,"Poste front, React",45000.00,React\n'
+            "Développeur Go,Poste back,52000.00,\n"
+        )
+        response = self.client.post(self.import_url, corps, content_type="text/csv")
+        self.assertEqual(response.data, {"crees": 2, "erreurs": []})
+
+        response = self.client.get(self.export_url, {"type": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lignes = list(
+            csv.DictReader(
+                io.StringIO(b"".join(response.streaming_content).decode("utf-8"))
+            )
+        )
+        self.assertEqual(
+            [ligne["titre"] for ligne in lignes],
+            ["Développeur React", "Développeur Go"],
+        )
+        self.assertEqual(lignes[0]["description"], "Poste front, React")
+
+        response = self.client.get(self.export_url, {"type": "ndjson"})
+        lignes = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(json.loads(lignes[1])["salaire"], "52000.00")
+
+
+class ExportCandidaturesAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur Django",
+            description="Poste Django",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        for i in range(5):
+            candidat = User.objects.create_user(
+                username=f"candidat{i}",
+                email=f"candidat{i}@example.com",
+                password="password123",
+                role="candidat",
+                competences="Python",
+            )
+            Candidature.objects.create(candidat=candidat, offre=self.offre)
+
+        self.export_url = reverse(
+            "candidatures-export", kwargs={"offre_id": self.offre.pk}
+        )
+
+    def test_export_ndjson_avec_profil_candidat(self):
+        self.client.force_authenticate(user=self.recruteur)
+
+        # l'offre, puis une seule requête jointe pour toutes les candidatures
+        with self.assertNumQueries(2):
+            response = self.client.get(self.export_url, {"type": "ndjson"})
+            contenu = b"".join(response.streaming_content).decode("utf-8")
+
+        lignes = [json.loads(ligne) for ligne in contenu.splitlines()]
+        self.assertEqual(len(lignes), 5)
+        self.assertEqual(lignes[0]["candidat_username"], "candidat0")
+        self.assertEqual(lignes[0]["candidat_competences"], "Python")
+        self.assertEqual(lignes[0]["statut"], "en attente")
+
+    async def test_export_en_flux_asynchrone_sous_asgi(self):
+        token = PersonnaliseeTokenObtainPairSerializer.get_token(self.recruteur)
+        response = await self.async_client.get(
+            self.export_url,
+            {"type": "ndjson"},
+            headers={"Authorization": f"Bearer {token.access_token}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # un itérateur synchrone serait chargé en entier avant l'envoi
+        self.assertTrue(response.is_async)
+        contenu = b"".join([morceau async for morceau in response.streaming_content])
+        self.assertEqual(len(contenu.decode("utf-8").splitlines()), 5)
+
+    def test_export_offre_d_un_autre_recruteur(self):
+        autre = User.objects.create_user(
+            username="autre", password="password123", role="recruteur"
+        )
+        self.client.force_authenticate(user=autre)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class NombreRequetesListesAPITest(APITestCase):
+    """Chaque liste doit coûter un nombre constant de requêtes"""
+
+    def setUp(self):
+        # invalidé au commit: le cache ne l'est jamais dans un TestCase
+        cache.clear()
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+        self.candidat = User.objects.create_user(
+            username="candidat",
+            email="candidat@example.com",
+            password="password123",
+            role="candidat",
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur Django",
+            description="Poste Django",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        self.ajouter_lignes(0)
+
+    def ajouter_lignes(self, debut, nombre=1):
+        for i in range(debut, debut + nombre):
+            candidat = User.objects.create_user(
+                username=f"candidat{i}", password="password123", role="candidat"
+            )
+            offre = Offre.objects.create(
+                titre=f"Offre {i}",
+                description="Description",
+                salaire=Decimal("40000.00"),
+                recruteur=self.recruteur,
+            )
+            Candidature.objects.create(candidat=candidat, offre=self.offre)
+            Candidature.objects.create(candidat=self.candidat, offre=offre)
+
+    def verifier_requetes(self, utilisateur, url, nombre_requetes):
+        self.client.force_authenticate(user=utilisateur)
+        with self.assertNumQueries(nombre_requetes):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_nombre_requetes_constant(self):
+        listes = [
+            (self.candidat, reverse("offres"), 1),
+            # requête de version (ETag) puis page
+            (self.candidat, reverse("list-candidatures"), 2),
+            (self.recruteur, reverse("candidats"), 1),
+            (
+                self.recruteur,
+                reverse("candidats-postule", kwargs={"offre_id": self.offre.pk}),
+                3,
+            ),
+            (
+                self.recruteur,
+                reverse("candidats-offre", kwargs={"offre_id": self.offre.pk}),
+                2,
+            ),
+        ]
+        for utilisateur, url, nombre_requetes in listes:
+            with self.subTest(url=url):
+                self.verifier_requetes(utilisateur, url, nombre_requetes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ajouter_lignes(1, nombre=5)
+        for utilisateur, url, nombre_requetes in listes:
+            with self.subTest(url=url, lignes=6):
+                response = self.verifier_requetes(utilisateur, url, nombre_requetes)
+                self.assertGreater(len(response.data["results"]), 1)
+
+    def test_candidature_imbriquee(self):
+        response = self.verifier_requetes(
+            self.candidat, reverse("list-candidatures"), 2
+        )
+        candidature = response.data["results"][0]
+        self.assertEqual(candidature["offre_titre"], "Offre 0")
+        self.assertEqual(candidature["candidat_nom"], "candidat")
+
+
+class CacheOffresAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur",
+            email="recruteur@example.com",
+            password="password123",
+            role="recruteur",
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur Django",
+            description="Poste Django",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        self.detail_url = reverse("offre-detail", kwargs={"pk": self.offre.pk})
+        self.liste_url = reverse("offres")
+        self.recruteur_detail_url = reverse(
+            "recruteur-offre-detail", kwargs={"pk": self.offre.pk}
+        )
+        self.client.force_authenticate(user=self.recruteur)
+
+    def test_detail_en_cache_et_304(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["titre"], "Développeur Django")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalidation_apres_modification_et_suppression(self):
+        etag_detail = self.client.get(self.detail_url)["ETag"]
+        etag_liste = self.client.get(self.liste_url)["ETag"]
+
+        # invalidation au commit seulement
+        with self.captureOnCommitCallbacks() as rappels:
+            self.client.patch(
+                self.recruteur_detail_url,
+                {"titre": "Développeur Python"},
+                format="json",
+            )
+            response = self.client.get(self.detail_url)
+            self.assertEqual(response.data["titre"], "Développeur Django")
+        for rappel in rappels:
+            rappel()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag_detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["titre"], "Développeur Python")
+        response = self.client.get(self.liste_url, HTTP_IF_NONE_MATCH=etag_liste)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["titre"], "Développeur Python")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.recruteur_detail_url)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.liste_url).data["results"], [])
+
+
+class ReponseConditionnelleAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur Django",
+            description="Poste Django",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        self.candidature = Candidature.objects.create(
+            candidat=self.candidat, offre=self.offre
+        )
+        self.liste_url = reverse("list-candidatures")
+        self.detail_url = reverse(
+            "candidature-detail", kwargs={"pk": self.candidature.pk}
+        )
+
+    def test_304_sans_serialisation_puis_200_apres_changement(self):
+        self.client.force_authenticate(user=self.candidat)
+        etag_liste = self.client.get(self.liste_url)["ETag"]
+        response = self.client.get(self.detail_url)
+        etag_detail = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # seule la requête d'agrégat est exécutée
+        with self.assertNumQueries(1):
+            response = self.client.get(self.liste_url, HTTP_IF_NONE_MATCH=etag_liste)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag_detail)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(user=self.recruteur)
+        self.client.patch(
+            reverse("mettre-a-jour-statut", kwargs={"pk": self.candidature.pk}),
+            {"statut": "acceptée"},
+            format="json",
+        )
+
+        self.client.force_authenticate(user=self.candidat)
+        response = self.client.get(self.liste_url, HTTP_IF_NONE_MATCH=etag_liste)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["statut"], "acceptée")
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag_detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_inexistant(self):
+        self.client.force_authenticate(user=self.candidat)
+        response = self.client.get(reverse("candidature-detail", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AuthentificationSansEtatAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache_utilisateurs.vider()
+
+        self.candidat = User.objects.create_user(
+            username="candidat",
+            password="password123",
+            role="candidat",
+            competences="Python",
+        )
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+
+    def authentifier(self, username):
+        response = self.client.post(
+            reverse("token"),
+            {"username": username, "password": "password123"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return AccessToken(response.data["access"])
+
+    def test_claims_role_et_permissions_sans_requete(self):
+        token = self.authentifier("candidat")
+        self.assertEqual(token["role"], "candidat")
+        self.assertEqual(str(token["user_id"]), str(self.candidat.id))
+
+        # seule la requête de la liste est exécutée, pas de chargement du User
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("offres"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("candidats"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_profil_charge_utilisateur_complet(self):
+        self.authentifier("recruteur")
+        response = self.client.patch(reverse("profil"), {"bio": "Recruteur tech"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("profil"))
+        self.assertEqual(response.data["bio"], "Recruteur tech")
+
+        response = self.client.post(
+            reverse("recruteur-offres"),
+            {
+                "titre": "Développeur Go",
+                "description": "Poste back",
+                "salaire": "52000.00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["recruteur"], self.recruteur.id)
+
+    def test_modification_profil_repart_de_la_base(self):
+        self.authentifier("candidat")
+        self.client.get(reverse("profil"))  # met l'utilisateur en cache
+        # modifié sans signal: la copie en cache est périmée
+        User.objects.filter(pk=self.candidat.pk).update(email="nouveau@example.com")
+
+        response = self.client.patch(reverse("profil"), {"bio": "Développeuse"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.email, "nouveau@example.com")
+        self.assertEqual(self.candidat.bio, "Développeuse")
+
+    def test_role_relu_au_rafraichissement(self):
+        self.authentifier("recruteur")
+        response = self.client.patch(reverse("profil"), {"role": "candidat"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.recruteur.refresh_from_db()
+        self.assertEqual(self.recruteur.role, "recruteur")
+
+        # rôle changé par un administrateur: pris en compte au rafraîchissement
+        User.objects.filter(pk=self.recruteur.pk).update(role="candidat")
+        response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "candidat")
+
+        User.objects.filter(pk=self.recruteur.pk).update(is_active=False)
+        response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(DUREE_CACHE_UTILISATEURS=30, TAILLE_CACHE_UTILISATEURS=1)
+    def test_cache_utilisateurs_borne(self):
+        cache_utilisateurs.obtenir(self.candidat.pk)
+        cache_utilisateurs.obtenir(self.recruteur.pk)
+        self.assertEqual(list(cache_utilisateurs.entrees), [str(self.recruteur.pk)])
+
+    def test_non_authentifie(self):
+        response = self.client.get(reverse("candidats"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TraitementCVAPITest(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media, CV_NOMBRE_TRAVAILLEURS=0)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.client = APIClient()
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.offres = [
+            Offre.objects.create(
+                titre=f"Offre {i}",
+                description="Description",
+                salaire=Decimal("50000.00"),
+                recruteur=self.recruteur,
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(user=self.candidat)
+
+    def postuler(self, offre, contenu=b"%PDF-1.4 cv du candidat"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("creer-candidature", kwargs={"offre_id": offre.pk}),
+                {"cv": SimpleUploadedFile("mon cv.PDF", contenu)},
+                format="multipart",
+            )
+
+    def test_cv_traite_en_arriere_plan_et_deduplique(self):
+        response = self.postuler(self.offres[0])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["statut_cv"], "en traitement")
+
+        self.postuler(self.offres[1])
+
+        condensat = hashlib.sha256(b"%PDF-1.4 cv du candidat").hexdigest()
+        candidatures = Candidature.objects.order_by("id")
+        for candidature in candidatures:
+            self.assertEqual(candidature.statut_cv, "traité")
+            self.assertEqual(candidature.empreinte_cv, condensat)
+            self.assertEqual(candidature.cv.name, f"cvs/{condensat}.pdf")
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.media, "cvs"))),
+            [f"{condensat}.pdf", "spool"],
+        )
+        self.assertEqual(os.listdir(os.path.join(self.media, "cvs", "spool")), [])
+
+    def test_candidature_refusee_ne_laisse_pas_de_fichier(self):
+        Candidature.objects.create(candidat=self.candidat, offre=self.offres[0])
+        response = self.postuler(self.offres[0])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(os.listdir(os.path.join(self.media, "cvs", "spool")), [])
+
+    def test_cv_partage_compte_et_nettoye(self):
+        self.postuler(self.offres[0])
+        self.postuler(self.offres[1])
+        condensat = hashlib.sha256(b"%PDF-1.4 cv du candidat").hexdigest()
+        nom = f"cvs/{condensat}.pdf"
+        self.assertEqual(FichierCV.objects.get(nom=nom).references, 2)
+
+        Candidature.objects.get(offre=self.offres[0]).delete()
+        self.assertEqual(FichierCV.objects.get(nom=nom).references, 1)
+        call_command("nettoyer_cvs", delai=0, stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media, nom)))
+
+        Candidature.objects.get(offre=self.offres[1]).delete()
+        self.assertEqual(FichierCV.objects.get(nom=nom).references, 0)
+        call_command("nettoyer_cvs", delai=0, stdout=StringIO())
+        self.assertFalse(os.path.exists(os.path.join(self.media, nom)))
+        self.assertFalse(FichierCV.objects.filter(nom=nom).exists())
+
+    def test_suppressions_en_cascade_groupees(self):
+        self.postuler(self.offres[0])
+        self.postuler(self.offres[1])
+        nom = Candidature.objects.first().cv.name
+
+        with CaptureQueriesContext(connection) as requetes:
+            self.offres[0].delete()
+        mises_a_jour = [
+            requete["sql"]
+            for requete in requetes.captured_queries
+            if requete["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(mises_a_jour), 1, mises_a_jour)
+        self.assertEqual(FichierCV.objects.get(nom=nom).references, 1)
+
+        self.candidat.delete()
+        self.assertEqual(FichierCV.objects.get(nom=nom).references, 0)
+        statistique = StatistiqueOffre.objects.get(offre=self.offres[1])
+        self.assertEqual(statistique.en_attente, 0)
+
+    def test_delai_de_grace_depuis_le_dereferencement(self):
+        self.postuler(self.offres[0])
+        nom = Candidature.objects.get().cv.name
+        FichierCV.objects.filter(nom=nom).update(
+            date_creation=timezone.now() - timedelta(days=30)
+        )
+        Candidature.objects.get().delete()
+        call_command("nettoyer_cvs", delai=1, stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media, nom)))
+
+        # un nouveau dépôt du même contenu repart de zéro
+        FichierCV.objects.filter(nom=nom).update(
+            dereference_le=timezone.now() - timedelta(hours=2)
+        )
+        Candidature.objects.create(
+            candidat=self.candidat,
+            offre=self.offres[1],
+            cv=SimpleUploadedFile("cv.pdf", b"%PDF-1.4 cv du candidat"),
+        )
+        self.assertIsNone(FichierCV.objects.get(nom=nom).dereference_le)
+        call_command("nettoyer_cvs", delai=1, stdout=StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media, nom)))
+
+    def test_cv_anciens_ranges_par_empreinte(self):
+        os.makedirs(os.path.join(self.media, "cvs"))
+        with open(os.path.join(self.media, "cvs", "ancien_cv.pdf"), "wb") as fichier:
+            fichier.write(b"ancien cv")
+        candidature = Candidature.objects.create(
+            candidat=self.candidat, offre=self.offres[0], cv="cvs/ancien_cv.pdf"
+        )
+        self.assertFalse(FichierCV.objects.exists())
+
+        call_command("ranger_cvs", stdout=StringIO())
+        condensat = hashlib.sha256(b"ancien cv").hexdigest()
+        candidature.refresh_from_db()
+        self.assertEqual(candidature.cv.name, f"cvs/{condensat}.pdf")
+        self.assertEqual(candidature.empreinte_cv, condensat)
+        self.assertEqual(FichierCV.objects.get(empreinte=condensat).references, 1)
+        self.assertEqual(
+            os.listdir(os.path.join(self.media, "cvs")), [f"{condensat}.pdf"]
+        )
+
+    def test_extension_longue_ecartee_du_nom(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("creer-candidature", kwargs={"offre_id": self.offres[0].pk}),
+                {"cv": SimpleUploadedFile("cv." + "x" * 40, b"contenu")},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        condensat = hashlib.sha256(b"contenu").hexdigest()
+        self.assertEqual(Candidature.objects.get().cv.name, f"cvs/{condensat}")
+
+    def test_traitement_perdu_repris(self):
+        # tâche perdue: la réponse est partie mais le pool n'a rien exécuté
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.post(
+                reverse("creer-candidature", kwargs={"offre_id": self.offres[0].pk}),
+                {"cv": SimpleUploadedFile("cv.txt", b"mon cv")},
+                format="multipart",
+            )
+        candidature = Candidature.objects.get()
+        self.assertEqual(candidature.statut_cv, "en traitement")
+
+        call_command("relancer_cvs", stdout=StringIO())
+        candidature.refresh_from_db()
+        self.assertEqual(candidature.statut_cv, "en traitement")
+
+        call_command("relancer_cvs", delai=-1, stdout=StringIO())
+        candidature.refresh_from_db()
+        condensat = hashlib.sha256(b"mon cv").hexdigest()
+        self.assertEqual(candidature.statut_cv, "traité")
+        self.assertEqual(candidature.cv.name, f"cvs/{condensat}.txt")
+        self.assertEqual(candidature.texte_cv, "mon cv")
+        self.assertEqual(os.listdir(os.path.join(self.media, "cvs", "spool")), [])
+
+    def test_cv_enregistre_directement_adresse_par_contenu(self):
+        candidature = Candidature.objects.create(
+            candidat=self.candidat,
+            offre=self.offres[0],
+            cv=SimpleUploadedFile("cv.txt", b"mon cv"),
+        )
+        condensat = hashlib.sha256(b"mon cv").hexdigest()
+        self.assertEqual(candidature.cv.name, f"cvs/{condensat}.txt")
+        self.assertEqual(candidature.cv.url, f"/media/cvs/{condensat}.txt")
+        self.assertEqual(FichierCV.objects.get(empreinte=condensat).references, 1)
+
+
+class RechercheCVAPITest(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media, CV_NOMBRE_TRAVAILLEURS=0)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        index_cvs.vider()
+
+        self.client = APIClient()
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        autre_recruteur = User.objects.create_user(
+            username="autre", password="password123", role="recruteur"
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur",
+            description="Backend",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        autre_offre = Offre.objects.create(
+            titre="Développeur",
+            description="Backend",
+            salaire=Decimal("50000.00"),
+            recruteur=autre_recruteur,
+        )
+        cvs = {
+            "alice": (
+                "cv.txt",
+                "Développeuse Django et PostgreSQL, Django REST".encode(),
+            ),
+            "bruno": ("cv.txt", "Développeur Java, notions de Django".encode()),
+            "chloe": ("cv.txt", "Comptable".encode()),
+        }
+        for nom, (fichier, contenu) in cvs.items():
+            candidat = User.objects.create_user(
+                username=nom, password="password123", role="candidat"
+            )
+            self.client.force_authenticate(user=candidat)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse("creer-candidature", kwargs={"offre_id": self.offre.pk}),
+                    {"cv": SimpleUploadedFile(fichier, contenu)},
+                    format="multipart",
+                )
+        # même CV sur l'offre d'un autre recruteur: hors des résultats
+        with self.captureOnCommitCallbacks(execute=True):
+            Candidature.objects.create(
+                candidat=User.objects.get(username="alice"),
+                offre=autre_offre,
+                cv=Candidature.objects.get(candidat__username="alice").cv.name,
+            )
+        self.client.force_authenticate(user=self.recruteur)
+
+    def test_recherche_classee_dans_les_cv_du_recruteur(self):
+        response = self.client.get(reverse("recherche-candidatures"), {"q": "django"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [candidature["candidat_nom"] for candidature in response.data],
+            ["alice", "bruno"],
+        )
+        self.assertNotIn("texte_cv", response.data[0])
+        self.assertGreater(response.data[0]["rang"], response.data[1]["rang"])
+
+        response = self.client.get(
+            reverse("recherche-candidatures"), {"q": "postgresql django"}
+        )
+        self.assertEqual(len(response.data), 1)
+
+    def test_extraction_pdf_et_docx(self):
+        contenu = zlib.compress(
+            b"BT /F1 12 Tf 72 700 Td (D\\351veloppeur) Tj 0 -14 Td"
+            b" [(Dj)-20(ango)-300(REST)] TJ ET"
+        )
+        pdf = os.path.join(self.media, "cv.pdf")
+        with open(pdf, "wb") as fichier:
+            fichier.write(
+                b"%PDF-1.4\n1 0 obj\n<< /Filter /FlateDecode >>\nstream\n"
+                + contenu
+                + b"\nendstream\nendobj\n%%EOF"
+            )
+        self.assertEqual(extraire_texte(pdf), "Développeur\nDjango REST")
+
+        docx = os.path.join(self.media, "cv.docx")
+        with zipfile.ZipFile(docx, "w") as archive:
+            archive.writestr(
+                "word/document.xml",
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+                'wordprocessingml/2006/main"><w:body><w:p><w:r><w:t>Ingénieur'
+                "</w:t></w:r></w:p><w:p><w:r><w:t>PostgreSQL</w:t></w:r></w:p>"
+                "</w:body></w:document>",
+            )
+        self.assertEqual(extraire_texte(docx), "Ingénieur\nPostgreSQL")
+
+    def test_extraction_pdf_bombe_de_decompression(self):
+        # 30 flux de 10 Mo chacun, quelques dizaines de Ko une fois compressés
+        bombe = zlib.compress(b"BT " + b"0 " * (5 * 1024 * 1024), 9)
+        pdf = b"%PDF-1.4\n" + b"".join(
+            b"%d 0 obj\n<< /Filter /FlateDecode >>\nstream\n" % numero
+            + bombe
+            + b"\nendstream\nendobj\n"
+            for numero in range(1, 31)
+        )
+        self.assertLessEqual(sum(len(flux) for flux in flux_pdf(pdf)), BUDGET_FLUX_PDF)
+        chemin = os.path.join(self.media, "bombe.pdf")
+        with open(chemin, "wb") as fichier:
+            fichier.write(pdf)
+        self.assertIsNone(extraire_texte(chemin))
+
+
+class MiseAJourStatutsAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        autre_recruteur = User.objects.create_user(
+            username="autre", password="password123", role="recruteur"
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur",
+            description="Backend",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        autre_offre = Offre.objects.create(
+            titre="Comptable",
+            description="Finance",
+            salaire=Decimal("40000.00"),
+            recruteur=autre_recruteur,
+        )
+        candidats = [
+            User.objects.create_user(
+                username=f"candidat{i}", password="password123", role="candidat"
+            )
+            for i in range(4)
+        ]
+        self.candidatures = [
+            Candidature.objects.create(candidat=candidat, offre=self.offre)
+            for candidat in candidats[:3]
+        ]
+        self.etrangere = Candidature.objects.create(
+            candidat=candidats[3], offre=autre_offre
+        )
+        self.evenements = []
+        statuts_candidatures_modifies.connect(self.recevoir)
+        self.addCleanup(statuts_candidatures_modifies.disconnect, self.recevoir)
+        self.client.force_authenticate(user=self.recruteur)
+
+    def recevoir(self, sender, recruteur_id, changements, **kwargs):
+        self.evenements.append((recruteur_id, sorted(changements)))
+
+    def test_resultats_par_id_et_statistiques(self):
+        acceptee, refusee, inchangee = self.candidatures
+        response = self.client.post(
+            reverse("mettre-a-jour-statuts"),
+            {
+                "candidatures": [
+                    {"id": acceptee.pk, "statut": "acceptée"},
+                    {"id": refusee.pk, "statut": "refusée"},
+                    {"id": inchangee.pk, "statut": "en attente"},
+                    {"id": self.etrangere.pk, "statut": "acceptée"},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["modifiees"], 2)
+        self.assertEqual(
+            {ligne["id"]: ligne["resultat"] for ligne in response.data["resultats"]},
+            {
+                acceptee.pk: "modifiée",
+                refusee.pk: "modifiée",
+                inchangee.pk: "inchangée",
+                self.etrangere.pk: "introuvable",
+            },
+        )
+        self.etrangere.refresh_from_db()
+        self.assertEqual(self.etrangere.statut, "en attente")
+
+        statistique = StatistiqueOffre.objects.get(offre=self.offre)
+        self.assertEqual(
+            (statistique.en_attente, statistique.acceptees, statistique.refusees),
+            (1, 1, 1),
+        )
+        self.assertEqual(
+            self.evenements,
+            [
+                (
+                    self.recruteur.pk,
+                    sorted(
+                        [
+                            (acceptee.pk, self.offre.pk, "en attente", "acceptée"),
+                            (refusee.pk, self.offre.pk, "en attente", "refusée"),
+                        ]
+                    ),
+                )
+            ],
+        )
+
+    def test_mise_a_jour_par_filtre(self):
+        response = self.client.post(
+            reverse("mettre-a-jour-statuts"),
+            {"filtre": {"statut": "en attente"}, "statut": "refusée"},
+            format="json",
+        )
+        self.assertEqual(response.data["modifiees"], 3)
+        self.assertTrue(response.data["complet"])
+        self.assertEqual(Candidature.objects.filter(statut="refusée").count(), 3)
+        self.assertEqual(len(self.evenements), 1)
+
+        response = self.client.post(
+            reverse("mettre-a-jour-statuts"),
+            {"filtre": {"offre": self.offre.pk}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EvenementsAPITest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.offre = Offre.objects.create(
+            titre="Développeur",
+            description="Backend",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+
+    def test_outbox_ecrite_a_la_creation_et_au_changement_de_statut(self):
+        self.client.force_authenticate(user=self.candidat)
+        self.client.post(
+            reverse("creer-candidature", kwargs={"offre_id": self.offre.pk}),
+            {"lettre_motivation": "Bonjour"},
+        )
+        candidature = Candidature.objects.get()
+        self.client.force_authenticate(user=self.recruteur)
+        self.client.patch(
+            reverse("mettre-a-jour-statut", kwargs={"pk": candidature.pk}),
+            {"statut": "acceptée"},
+        )
+        self.client.post(
+            reverse("mettre-a-jour-statuts"),
+            {"candidatures": [{"id": candidature.pk, "statut": "refusée"}]},
+            format="json",
+        )
+        self.assertEqual(
+            list(Evenement.objects.order_by("id").values_list("type", "donnees")),
+            [
+                ("candidature.creee", {"statut": "en attente"}),
+                (
+                    "candidature.statut",
+                    {"statut": "acceptée", "ancien_statut": "en attente"},
+                ),
+                (
+                    "candidature.statut",
+                    {"statut": "refusée", "ancien_statut": "acceptée"},
+                ),
+            ],
+        )
+
+        premier = Evenement.objects.order_by("id").first()
+        response = self.client.get(reverse("evenements"), {"curseur": premier.id})
+        self.assertEqual(
+            [e["statut"] for e in response.data["evenements"]],
+            ["acceptée", "refusée"],
+        )
+        self.assertEqual(response.data["curseur"], Evenement.objects.latest("id").id)
+
+        autre = User.objects.create_user(
+            username="autre", password="password123", role="candidat"
+        )
+        self.client.force_authenticate(user=autre)
+        response = self.client.get(reverse("evenements"))
+        self.assertEqual(response.data["evenements"], [])
+
+    def test_diffusion_par_lots_et_flux_sse(self):
+        for i in range(3):
+            candidat = User.objects.create_user(
+                username=f"candidat{i}", password="password123", role="candidat"
+            )
+            Candidature.objects.create(candidat=candidat, offre=self.offre)
+
+        def echouer(evenements):
+            raise OSError("webhook indisponible")
+
+        with self.assertRaises(OSError):
+            diffuser(echouer)
+        self.assertEqual(Evenement.objects.filter(date_envoi=None).count(), 3)
+
+        lots = []
+        self.assertEqual(diffuser(lots.append, taille_lot=2), 2)
+        self.assertEqual(diffuser(lots.append, taille_lot=2), 1)
+        self.assertEqual(diffuser(lots.append, taille_lot=2), 0)
+        self.assertEqual([len(lot) for lot in lots], [2, 1])
+
+    def test_verrous_par_recruteur_et_candidat(self):
+        evenements = [
+            evenement("candidature.statut", 1, 1, candidat_id, 7)
+            for candidat_id in (5, 3, 5)
+        ]
+        # recruteur 7 -> 14; candidats 3 et 5 -> 7 et 11; triées et uniques
+        self.assertEqual(cles_verrous(evenements), [7, 11, 14])
+
+    async def test_flux_sse_asynchrone(self):
+        candidature = await Candidature.objects.acreate(
+            candidat=self.candidat, offre=self.offre
+        )
+        token = PersonnaliseeTokenObtainPairSerializer.get_token(self.recruteur)
+        response = await self.async_client.get(
+            reverse("flux-evenements"),
+            headers={"Authorization": f"Bearer {token.access_token}"},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        flux = aiter(response.streaming_content)
+        self.assertEqual(await anext(flux), b"retry: 3000\n\n")
+        message = await anext(flux)
+        self.assertIn(b"event: candidature.creee\n", message)
+        self.assertIn(f'"candidature": {candidature.pk}'.encode(), message)
+        await flux.aclose()
+        response.close()
+
+
+class FluxCandidaturesAsyncTest(TestCase):
+    def setUp(self):
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        offre = Offre.objects.create(
+            titre="Développeur",
+            description="Backend",
+            salaire=Decimal("50000.00"),
+            recruteur=self.recruteur,
+        )
+        self.candidature = Candidature.objects.create(
+            candidat=self.candidat, offre=offre
+        )
+
+    def entetes(self, utilisateur):
+        token = PersonnaliseeTokenObtainPairSerializer.get_token(utilisateur)
+        return {"Authorization": f"Bearer {token.access_token}"}
+
+    async def test_rattrapage_puis_statuts_pousses(self):
+        response = await self.async_client.get(
+            reverse("flux-candidatures"), headers=self.entetes(self.candidat)
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        flux = aiter(response.streaming_content)
+        self.assertEqual(await anext(flux), b"retry: 3000\n\n")
+        self.assertIn(b"event: candidature.creee", await anext(flux))
+
+        diffuseur().publier(
+            canal_candidat(self.candidat.id),
+            {"id": 10**6, "type": "candidature.statut", "statut": "acceptée"},
+        )
+        message = await anext(flux)
+        self.assertTrue(message.startswith(b"id: 1000000\nevent: candidature.statut"))
+        self.assertIn("acceptée".encode(), message)
+
+        # fin de réponse (déconnexion du client) côté gestionnaire ASGI
+        await flux.aclose()
+        response.close()
+        self.assertEqual(diffuseur().nombre_abonnes(), 0)
+
+    @patch("api.views_async.SONDAGE_OUTBOX", 0.05)
+    async def test_evenement_d_un_autre_processus_lu_dans_l_outbox(self):
+        response = await self.async_client.get(
+            reverse("flux-candidatures"), headers=self.entetes(self.candidat)
+        )
+        flux = aiter(response.streaming_content)
+        await anext(flux)
+        await anext(flux)
+
+        # écrit par un autre processus: rien n'est publié dans celui-ci
+        evenement = await self.evenement_ecrit("acceptée")
+        message = await anext(flux)
+        self.assertTrue(message.startswith(f"id: {evenement.id}\n".encode()))
+        await flux.aclose()
+        response.close()
+        self.assertEqual(sondeur_outbox.suivis, {})
+
+    async def test_message_pousse_apres_les_evenements_precedents(self):
+        response = await self.async_client.get(
+            reverse("flux-candidatures"), headers=self.entetes(self.candidat)
+        )
+        flux = aiter(response.streaming_content)
+        await anext(flux)
+        await anext(flux)
+
+        # le premier vient d'un autre processus, seul le second est poussé ici
+        autre = await self.evenement_ecrit("acceptée")
+        local = await self.evenement_ecrit("refusée")
+        diffuseur().publier(canal_candidat(self.candidat.id), representation(local))
+        self.assertTrue((await anext(flux)).startswith(f"id: {autre.id}\n".encode()))
+        self.assertTrue((await anext(flux)).startswith(f"id: {local.id}\n".encode()))
+        await flux.aclose()
+        response.close()
+
+    async def evenement_ecrit(self, statut):
+        return await Evenement.objects.acreate(
+            type="candidature.statut",
+            candidature_id=self.candidature.pk,
+            offre_id=self.candidature.offre_id,
+            candidat_id=self.candidat.id,
+            recruteur_id=self.recruteur.id,
+            donnees={"statut": statut},
+        )
+
+    async def test_reserve_aux_candidats_authentifies(self):
+        response = await self.async_client.get(reverse("flux-candidatures"))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            reverse("flux-candidatures"), headers=self.entetes(self.recruteur)
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class VuesAsyncAPITest(APITestCase):
+    def setUp(self):
+        # invalidé au commit: le cache ne l'est jamais dans un TestCase
+        cache.clear()
+        self.client = APIClient()
+        self.recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.offres = [
+            Offre.objects.create(
+                titre=f"Développeur Django {i}",
+                description="Backend Python",
+                salaire=Decimal("50000.00"),
+                recruteur=self.recruteur,
+            )
+            for i in range(3)
+        ]
+        for offre in self.offres[:2]:
+            Candidature.objects.create(candidat=self.candidat, offre=offre)
+        token = PersonnaliseeTokenObtainPairSerializer.get_token(self.candidat)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+
+    def test_memes_reponses_que_les_vues_synchrones(self):
+        paires = [
+            ("offres", "async-offres", {}, {"taille": 2}),
+            ("offre-detail", "async-offre-detail", {"pk": self.offres[0].pk}, {}),
+            ("list-candidatures", "async-candidatures", {}, {}),
+        ]
+        for synchrone, asynchrone, kwargs, parametres in paires:
+            with self.subTest(vue=asynchrone):
+                attendu = self.client.get(
+                    reverse(synchrone, kwargs=kwargs), parametres
+                ).json()
+                response = self.client.get(
+                    reverse(asynchrone, kwargs=kwargs), parametres
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                if "next" in attendu and attendu["next"]:
+                    attendu["next"] = attendu["next"].replace(
+                        reverse(synchrone), reverse(asynchrone)
+                    )
+                self.assertEqual(response.json(), attendu)
+
+        response = self.client.get(reverse("async-recherche"), {"q": "django"})
+        self.assertEqual(response["X-Total-Count"], "3")
+        self.assertEqual(len(response.json()), 3)
+
+    def test_authentification_et_role(self):
+        response = self.client.get(reverse("async-offre-detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse("async-offres"), {"curseur": "invalide"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.credentials()
+        response = self.client.get(reverse("async-offres"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        token = PersonnaliseeTokenObtainPairSerializer.get_token(self.recruteur)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        response = self.client.get(reverse("async-candidatures"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MetriquesAPITest(APITestCase):
+    def setUp(self):
+        registre.vider()
+        self.candidat = User.objects.create_user(
+            username="candidat", password="password123", role="candidat"
+        )
+        self.client.force_authenticate(user=self.candidat)
+
+    @override_settings(DEBUG=True)
+    def test_mesures_par_route(self):
+        self.client.get(reverse("list-candidatures"))
+        self.client.get(reverse("list-candidatures"))
+
+        response = self.client.get(reverse("metriques"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        texte = response.content.decode()
+        etiquettes = 'route="list-candidatures",methode="GET"'
+        self.assertIn(f'api_requetes_total{{{etiquettes},statut="200"}} 2', texte)
+        self.assertIn(f"api_sql_requetes_count{{{etiquettes}}} 2", texte)
+        self.assertIn(
+            f'api_rendu_duree_secondes_bucket{{{etiquettes},le="+Inf"}} 2', texte
+        )
+        self.assertIn(
+            "# HELP api_rendu_duree_secondes Durée du rendu de la réponse par le"
+            " renderer, hors sérialisation DRF",
+            texte,
+        )
+        self.assertIn(f"api_reponse_octets_count{{{etiquettes}}} 2", texte)
+        self.assertIn(
+            f"api_serialisation_duree_secondes_count{{{etiquettes}}} 2", texte
+        )
+
+    @override_settings(METRIQUES_BUDGET_REQUETES_SQL=0)
+    def test_budget_depasse_journalise(self):
+        with self.assertLogs("api.middleware", "WARNING") as journaux:
+            self.client.get(reverse("list-candidatures"))
+        self.assertIn("list-candidatures", journaux.output[0])
+        self.assertIn("SELECT", journaux.output[0])
+
+    @override_settings(METRIQUES_JETON="secret")
+    def test_jeton_metriques(self):
+        response = self.client.get(reverse("metriques"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(
+            reverse("metriques"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metriques_fermees_sans_jeton_hors_debug(self):
+        response = self.client.get(reverse("metriques"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SeedDataCommandTest(TestCase):
+    VOLUMES = {"recruteurs": 3, "candidats": 10, "offres": 30, "candidatures": 45}
+
+    def generer(self, graine):
+        call_command(
+            "seed_data", graine=graine, taille_lot=7, stdout=StringIO(), **self.VOLUMES
+        )
+        return list(
+            Candidature.objects.order_by("id").values_list(
+                "candidat__username", "offre__titre", "offre__salaire", "statut"
+            )
+        )
+
+    def test_volumes_et_donnees_derivees(self):
+        self.generer(graine=1)
+        self.assertEqual(User.objects.filter(role="recruteur").count(), 3)
+        self.assertEqual(User.objects.filter(role="candidat").count(), 10)
+        self.assertEqual(Offre.objects.count(), 30)
+        self.assertEqual(Candidature.objects.count(), 45)
+        self.assertFalse(Offre.objects.filter(vecteur_competences=b"").exists())
+        self.assertFalse(
+            User.objects.filter(role="candidat", vecteur_competences=b"").exists()
+        )
+        statistiques = StatistiqueOffre.objects.all()
+        self.assertEqual(statistiques.count(), 30)
+        self.assertEqual(
+            sum(s.en_attente + s.acceptees + s.refusees for s in statistiques), 45
+        )
+        self.assertTrue(
+            self.client.login(
+                username="bench-candidat-0", password="bench-mot-de-passe"
+            )
+        )
+
+    def test_deterministe(self):
+        premiere = self.generer(graine=7)
+        User.objects.all().delete()
+        self.assertEqual(self.generer(graine=7), premiere)
+        User.objects.all().delete()
+        self.assertNotEqual(self.generer(graine=8), premiere)
+
+    def test_base_deja_peuplee(self):
+        self.generer(graine=1)
+        with self.assertRaises(CommandError):
+            self.generer(graine=1)
+
+
+class RenduJSONTest(APITestCase):
+    DONNEES = {
+        "salaire": Decimal("45000.50"),
+        "date": timezone.now(),
+        "duree": timedelta(hours=2),
+        "texte": "Développeur\u2028réseau",
+        "liste": (1, 2.5, None, True),
+        1: "clé entière",
+    }
+
+    def test_meme_rendu_que_drf(self):
+        attendu = JSONRenderer().render(self.DONNEES)
+        self.assertEqual(RapideJSONRenderer().render(self.DONNEES), attendu)
+        # sans orjson, repli sur le module json
+        with patch("api.renderers.orjson", None):
+            self.assertEqual(RapideJSONRenderer().render(self.DONNEES), attendu)
+
+    def test_corps_json_invalide(self):
+        recruteur = User.objects.create_user(
+            username="recruteur", password="password123", role="recruteur"
+        )
+        self.client.force_authenticate(user=recruteur)
+        response = self.client.post(
+            reverse("recruteur-offres"), b"{invalide", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["detail"])
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import views, views_async
 
 urlpatterns = [
     # pour les utilisateurs
@@ -28,12 +28,32 @@ urlpatterns = [
         views.ToutCandidaturesPostuleRecruteurAPIView.as_view(),
         name="candidats-postule",
     ),
+    path(
+        "recruteur/candidatures/rechercher/",
+        views.ChercherCandidaturesRecruteurAPIView.as_view(),
+        name="recherche-candidatures",
+    ),
+    path(
+        "recruteur/offres/<int:offre_id>/candidatures/export/",
+        views.ExporterCandidaturesRecruteurAPIView.as_view(),
+        name="candidatures-export",
+    ),
     path(
         "recruteur/offres/<int:offre_id>/candidats/",
         views.ToutCandidatSurOffreRecruteurAPIView.as_view(),
         name="candidats-offre",
     ),
+    path(
+        "recruteur/offres/<int:offre_id>/meilleurs-candidats/",
+        views.MeilleursCandidatsOffreAPIView.as_view(),
+        name="meilleurs-candidats",
+    ),
     path("offres/rechercher/", views.ChercherOffreAPIView.as_view(), name="recherche"),
+    path(
+        "offres/recommandees/",
+        views.OffresRecommandeesCandidatAPIView.as_view(),
+        name="offres-recommandees",
+    ),
     path(
         "offres/", views.ListerToutesOffreAPIView.as_view(), name="offres"
     ),  # toutes les offres
@@ -47,6 +67,16 @@ urlpatterns = [
         views.ListerCreerOffreRecruteurAPIView.as_view(),
         name="recruteur-offres",
     ),
+    path(
+        "recruteur/offres/import/",
+        views.ImporterOffresRecruteurAPIView.as_view(),
+        name="recruteur-offres-import",
+    ),
+    path(
+        "recruteur/offres/export/",
+        views.ExporterOffresRecruteurAPIView.as_view(),
+        name="recruteur-offres-export",
+    ),
     path(
         "recruteur/offres/<int:pk>/",
         views.RetrouverOffreRecruteurAPIView.as_view(),
@@ -58,11 +88,21 @@ urlpatterns = [
         views.CreerCandidatureCandidatAPIView.as_view(),
         name="creer-candidature",
     ),
+    path(
+        "recruteur/candidatures/statuts/",
+        views.MettreAJourStatutsCandidaturesAPIView.as_view(),
+        name="mettre-a-jour-statuts",
+    ),
     path(
         "candidatures/<int:pk>/mettre-a-jour-statut/",
         views.MettreAJourStatutCandidatureAPIView.as_view(),
         name="mettre-a-jour-statut",
     ),
+    path(
+        "candidatures/flux/",
+        views_async.flux_candidatures_candidat,
+        name="flux-candidatures",
+    ),
     path(
         "candidatures/<int:pk>/",
         views.DetailCandidatureCandidatAPIView.as_view(),
@@ -73,4 +113,25 @@ urlpatterns = [
         views.ListerCandidatureCandidatAPIView.as_view(),
         name="list-candidatures",
     ),
+    # pour les événements
+    path("evenements/", views.EvenementsAPIView.as_view(), name="evenements"),
+    path("evenements/flux/", views_async.flux_evenements, name="flux-evenements"),
+    # versions asynchrones des lectures, à servir sous ASGI
+    path("async/offres/", views_async.lister_offres, name="async-offres"),
+    path(
+        "async/offres/rechercher/",
+        views_async.chercher_offres,
+        name="async-recherche",
+    ),
+    path("async/offres/<int:pk>/", views_async.detail_offre, name="async-offre-detail"),
+    path(
+        "async/candidatures/",
+        views_async.lister_candidatures_candidat,
+        name="async-candidatures",
+    ),
+    path(
+        "async/candidatures/<int:pk>/",
+        views_async.detail_candidature_candidat,
+        name="async-candidature-detail",
+    ),
 ]
@@ -1,25 +1,69 @@
 """Vues pour les API"""
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework_simplejwt.serializers import (
-    TokenObtainPairSerializer,
-)
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .models import Offre, Candidature
+from .authentication import utilisateur_complet
+from .cache import (
+    DetailOffreEnCacheMixin,
+    ListeOffresEnCacheMixin,
+    ReponseConditionnelleMixin,
+)
+from .competences import meilleurs_candidats, meilleures_offres
+from .evenements import ATTENTE_MAX, attendre_evenements, representation
+from .exports import FORMATS_EXPORT, lire_format_export, reponse_export
+from .models import Offre, Candidature, StatistiqueOffre
+from .pagination import PaginationCurseur, PaginationCurseurUtilisateur, lire_taille
+from .parsers import CSVParser, LigneInvalide, NDJSONParser, RapideJSONParser
+from .recherche import rechercher_candidatures, rechercher_offres
 from .permissions import IsRecruteur, IsCandidat
+from .signals import creer_offres_en_masse, mettre_a_jour_statuts
+from .stockage import stockage_cv
+from .taches import mettre_en_spool, soumettre, traiter_cv
 
 User = get_user_model()
-from .serializers import UserSerializer, OffreSerializer, CandidatureSerializer
+from .serializers import (
+    UserSerializer,
+    OffreSerializer,
+    OffreResumeSerializer,
+    CandidatureSerializer,
+    CandidatureRechercheSerializer,
+    MiseAJourStatutsSerializer,
+    CandidatCorrespondanceSerializer,
+    OffreCorrespondanceSerializer,
+    PersonnaliseeTokenObtainPairSerializer,
+    PersonnaliseeTokenRefreshSerializer,
+    ProfilSerializer,
+)
+
+# la représentation d'une candidature inclut le titre de son offre
+CHAMPS_VERSION_CANDIDATURE = ("date_modification", "offre__date_modification")
+
+
+class TailleResultatsMixin:
+    """Lit le nombre de résultats demandé dans le paramètre taille"""
+
+    taille_resultats = 10
+    taille_resultats_max = 100
+
+    def get_taille_resultats(self):
+        return lire_taille(
+            self.request, self.taille_resultats, self.taille_resultats_max
+        )
 
 
 # POUR LES AUTHENTICATIONS
@@ -44,7 +88,7 @@ class InscriptionAPIView(generics.CreateAPIView):
     description="Obtention d'un token JWT, assurer"
     " de stocker l'access token, et d'inclure dans header à chaque"
     " requete pour savoir qui est l' utilisateur connecté, et aussi pour les permissions ",
-    request=TokenObtainPairSerializer,
+    request=PersonnaliseeTokenObtainPairSerializer,
     responses={
         200: {
             "type": "object",
@@ -56,6 +100,7 @@ class PersonnaliseeObtenirTokenAPIView(TokenObtainPairView):
     """Vue personnalisée pour obtenir un token JWT"""
 
     permission_classes = [AllowAny]
+    serializer_class = PersonnaliseeTokenObtainPairSerializer
 
     def post(self, request: Request, *args, **kwargs) -> Response:
         """
@@ -85,6 +130,8 @@ class PersonnaliseeObtenirTokenAPIView(TokenObtainPairView):
 class PersonnaliseeRafraichirTokenAPIView(TokenRefreshView):
     """Vue personnalisée pour rafraîchir un token JWT"""
 
+    serializer_class = PersonnaliseeTokenRefreshSerializer
+
     def post(self, request: Request, *args, **kwargs) -> Response:
         """
         Surcharge de la méthode post pour récupérer le refresh token depuis les cookies
@@ -99,22 +146,27 @@ class PersonnaliseeRafraichirTokenAPIView(TokenRefreshView):
     tags=["Utilisateurs"],
     description="Consulter et modifier son profil: PUT ou PATCH pour modifier"
     " et GET pour consulter. PERMISSION : être connecté",
-    responses={200: UserSerializer},
+    responses={200: ProfilSerializer},
 )
 class ProfileInfoModifierAPIView(generics.RetrieveUpdateAPIView):
     """Vue pour modifier les informations du profil d'un utilisateur"""
 
     permission_classes = [IsAuthenticated]
-    serializer_class = UserSerializer
+    serializer_class = ProfilSerializer
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in SAFE_METHODS:
+            return utilisateur_complet(self.request.user)
+        # une modification part de la ligne en base, pas de la copie en cache:
+        # save() réécrit toutes les colonnes (mot de passe, email)
+        return get_object_or_404(User, pk=self.request.user.id)
 
 
 # recruteurs
 @extend_schema(
     tags=["Statistiques"],
-    description="Statistiques pour le recruteur. PERMISSION : recruteur",
+    description="Statistiques pour le recruteur, lues depuis les compteurs"
+    " maintenus à chaque candidature. PERMISSION : recruteur",
     responses={
         200: {
             "type": "object",
@@ -122,6 +174,8 @@ class ProfileInfoModifierAPIView(generics.RetrieveUpdateAPIView):
                 "total_offres": {"type": "integer"},
                 "total_candidatures": {"type": "integer"},
                 "candidatures_par_offre": {"type": "object"},
+                "candidatures_par_statut": {"type": "object"},
+                "details_par_offre": {"type": "array", "items": {"type": "object"}},
             },
         }
     },
@@ -132,18 +186,51 @@ class StatistiquesRecruteurAPIView(generics.RetrieveAPIView):
     permission_classes = [IsRecruteur]
 
     def retrieve(self, request, *args, **kwargs):
-        offres = Offre.objects.filter(recruteur=request.user)
-        total_offres = offres.count()
-        total_candidatures = Candidature.objects.filter(offre__in=offres).count()
-        candidatures_par_offre = {
-            offre.titre: offre.candidatures.count() for offre in offres
-        }
+        # compteurs maintenus à l'écriture: lecture en O(offres), sans scanner
+        # les candidatures
+        lignes = (
+            StatistiqueOffre.objects.filter(recruteur_id=request.user.id)
+            .values(
+                "en_attente",
+                "acceptees",
+                "refusees",
+                id=F("offre_id"),
+                titre=F("offre__titre"),
+            )
+            .order_by("offre_id")
+        )
+
+        candidatures_par_statut = {"en attente": 0, "acceptée": 0, "refusée": 0}
+        candidatures_par_offre = {}
+        details_par_offre = []
+        for ligne in lignes:
+            ligne["total"] = (
+                ligne["en_attente"] + ligne["acceptees"] + ligne["refusees"]
+            )
+            candidatures_par_offre[ligne["titre"]] = ligne["total"]
+            candidatures_par_statut["en attente"] += ligne["en_attente"]
+            candidatures_par_statut["acceptée"] += ligne["acceptees"]
+            candidatures_par_statut["refusée"] += ligne["refusees"]
+            details_par_offre.append(
+                {
+                    "id": ligne["id"],
+                    "titre": ligne["titre"],
+                    "total": ligne["total"],
+                    "par_statut": {
+                        "en attente": ligne["en_attente"],
+                        "acceptée": ligne["acceptees"],
+                        "refusée": ligne["refusees"],
+                    },
+                }
+            )
 
         return Response(
             {
-                "total_offres": total_offres,
-                "total_candidatures": total_candidatures,
+                "total_offres": len(details_par_offre),
+                "total_candidatures": sum(candidatures_par_statut.values()),
                 "candidatures_par_offre": candidatures_par_offre,
+                "candidatures_par_statut": candidatures_par_statut,
+                "details_par_offre": details_par_offre,
             }
         )
 
@@ -161,8 +248,86 @@ class MettreAJourStatutCandidatureAPIView(generics.UpdateAPIView):
     serializer_class = CandidatureSerializer
     lookup_field = "pk"
 
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
     def get_queryset(self):
-        return Candidature.objects.filter(offre__recruteur=self.request.user)
+        # ligne verrouillée jusqu'au commit, comme dans mettre_a_jour_statuts:
+        # deux PATCH concurrents ne partent pas du même statut initial
+        return (
+            Candidature.objects.filter(offre__recruteur_id=self.request.user.id)
+            .select_related("offre", "candidat")
+            .select_for_update(of=("self",))
+        )
+
+
+@extend_schema(
+    tags=["Candidatures"],
+    description="Mise à jour en masse du statut des candidatures reçues:"
+    " candidatures=[{id, statut}] ou filtre={offre, statut} avec le statut à"
+    " appliquer (au plus 1000 candidatures par requête, complet=false s'il en"
+    " reste). Un UPDATE par statut, résultat par id: modifiée, inchangée ou"
+    " introuvable, PERMISSION : recruteur",
+    request=MiseAJourStatutsSerializer,
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "modifiees": {"type": "integer"},
+                "complet": {"type": "boolean"},
+                "resultats": {"type": "array", "items": {"type": "object"}},
+            },
+        }
+    },
+)
+class MettreAJourStatutsCandidaturesAPIView(generics.GenericAPIView):
+    """Vue pour trier plusieurs candidatures en une requête"""
+
+    permission_classes = [IsRecruteur]
+    serializer_class = MiseAJourStatutsSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        donnees = serializer.validated_data
+        taille_max = MiseAJourStatutsSerializer.TAILLE_MAX
+
+        complet = True
+        if "candidatures" in donnees:
+            statuts_par_id = {
+                ligne["id"]: ligne["statut"] for ligne in donnees["candidatures"]
+            }
+        else:
+            filtre = {"offre__recruteur_id": request.user.id}
+            if "offre" in donnees["filtre"]:
+                filtre["offre_id"] = donnees["filtre"]["offre"]
+            if "statut" in donnees["filtre"]:
+                filtre["statut"] = donnees["filtre"]["statut"]
+            ids = list(
+                Candidature.objects.filter(**filtre)
+                .exclude(statut=donnees["statut"])
+                .order_by("id")
+                .values_list("id", flat=True)[: taille_max + 1]
+            )
+            complet = len(ids) <= taille_max
+            statuts_par_id = dict.fromkeys(ids[:taille_max], donnees["statut"])
+
+        resultats = mettre_a_jour_statuts(request.user.id, statuts_par_id)
+        return Response(
+            {
+                "modifiees": sum(r == "modifiée" for r in resultats.values()),
+                "complet": complet,
+                "resultats": [
+                    {
+                        "id": candidature_id,
+                        "statut": statuts_par_id[candidature_id],
+                        "resultat": resultat,
+                    }
+                    for candidature_id, resultat in resultats.items()
+                ],
+            }
+        )
 
 
 @extend_schema(
@@ -172,16 +337,124 @@ class MettreAJourStatutCandidatureAPIView(generics.UpdateAPIView):
     " PERMISSION : recruteur",
     responses={200: CandidatureSerializer(many=True)},
 )
-class ToutCandidaturesPostuleRecruteurAPIView(generics.ListAPIView):
+class ToutCandidaturesPostuleRecruteurAPIView(
+    ReponseConditionnelleMixin, generics.ListAPIView
+):
     """Vue pour lister toutes les candidatures pour l'une de ses offres"""
 
     permission_classes = [IsRecruteur]
     serializer_class = CandidatureSerializer
+    pagination_class = PaginationCurseur
+    champs_version = CHAMPS_VERSION_CANDIDATURE
 
-    def get_queryset(self):
+    @cached_property
+    def offre(self):
         offre_id = self.kwargs.get("offre_id")
-        offre = get_object_or_404(Offre, id=offre_id, recruteur=self.request.user)
-        return offre.candidatures.all()
+        return get_object_or_404(Offre, id=offre_id, recruteur_id=self.request.user.id)
+
+    def get_queryset(self):
+        return CandidatureSerializer.optimiser_queryset(self.offre.candidatures.all())
+
+
+@extend_schema(
+    tags=["Candidatures"],
+    description="Recherche plein texte dans les CV des candidatures reçues sur les"
+    " offres du recruteur connecté, résultats triés par pertinence (rang),"
+    " PERMISSION : recruteur",
+    parameters=[
+        OpenApiParameter("q", str, required=True, description="Mots-clés"),
+        OpenApiParameter("offre", int, description="Restreindre à une offre"),
+        OpenApiParameter("taille", int, description="Nombre de résultats (max 100)"),
+    ],
+    responses={200: CandidatureRechercheSerializer(many=True)},
+)
+class ChercherCandidaturesRecruteurAPIView(TailleResultatsMixin, generics.ListAPIView):
+    """Vue pour chercher les candidatures d'un recruteur par le contenu des CV"""
+
+    permission_classes = [IsRecruteur]
+    serializer_class = CandidatureRechercheSerializer
+    taille_resultats = 20
+
+    def get_queryset(self):
+        requete = self.request.query_params.get("q", "").strip()
+        if not requete:
+            return Candidature.objects.none()
+        queryset = Candidature.objects.filter(offre__recruteur_id=self.request.user.id)
+        offre = self.request.query_params.get("offre")
+        if offre:
+            if not offre.isdigit():
+                raise ValidationError({"offre": "Identifiant d'offre invalide."})
+            queryset = queryset.filter(offre_id=offre)
+        return rechercher_candidatures(
+            requete,
+            CandidatureSerializer.optimiser_queryset(queryset),
+            limite=self.get_taille_resultats(),
+        )
+
+
+@extend_schema(
+    tags=["Candidatures"],
+    description="Export en flux des candidatures pour l'une des offres d'un recruteur,"
+    " avec le profil du candidat, type=csv (par défaut) ou type=ndjson,"
+    " PERMISSION : recruteur",
+    parameters=[OpenApiParameter("type", str, enum=list(FORMATS_EXPORT))],
+    responses={200: {"type": "string", "format": "binary"}},
+)
+class ExporterCandidaturesRecruteurAPIView(generics.GenericAPIView):
+    """Vue pour exporter en flux les candidatures d'une offre d'un recruteur"""
+
+    permission_classes = [IsRecruteur]
+    colonnes = (
+        "id",
+        "statut",
+        "date_creation",
+        "lettre_motivation",
+        "cv",
+        "candidat_id",
+        "candidat_username",
+        "candidat_email",
+        "candidat_competences",
+        "candidat_experience",
+    )
+
+    def get(self, request, *args, **kwargs):
+        format_export = lire_format_export(request)
+        offre = get_object_or_404(
+            Offre, id=self.kwargs.get("offre_id"), recruteur_id=request.user.id
+        )
+        # profil du candidat joint dans la même requête, lue par paquets
+        lignes = (
+            Candidature.objects.filter(offre=offre)
+            .order_by("id")
+            .values(
+                "id",
+                "statut",
+                "date_creation",
+                "lettre_motivation",
+                "cv",
+                "candidat_id",
+                candidat_username=F("candidat__username"),
+                candidat_email=F("candidat__email"),
+                candidat_competences=F("candidat__competences"),
+                candidat_experience=F("candidat__experience"),
+            )
+            .iterator(chunk_size=2000)
+        )
+        return reponse_export(
+            request,
+            self.avec_url_cv(lignes),
+            self.colonnes,
+            format_export,
+            f"candidatures-offre-{offre.pk}",
+        )
+
+    def avec_url_cv(self, lignes):
+        for ligne in lignes:
+            if ligne["cv"]:
+                ligne["cv"] = self.request.build_absolute_uri(
+                    stockage_cv.url(ligne["cv"])
+                )
+            yield ligne
 
 
 @extend_schema(
@@ -196,13 +469,37 @@ class ToutCandidatSurOffreRecruteurAPIView(generics.ListAPIView):
 
     permission_classes = [IsRecruteur]
     serializer_class = UserSerializer
+    pagination_class = PaginationCurseurUtilisateur
 
     def get_queryset(self):
         offre_id = self.kwargs.get("offre_id")
-        offre = get_object_or_404(Offre, id=offre_id, recruteur=self.request.user)
+        offre = get_object_or_404(Offre, id=offre_id, recruteur_id=self.request.user.id)
 
         candidat_ids = offre.candidatures.values_list("candidat", flat=True)
-        return User.objects.filter(id__in=candidat_ids)
+        return UserSerializer.optimiser_queryset(
+            User.objects.filter(id__in=candidat_ids)
+        )
+
+
+@extend_schema(
+    tags=["Candidats"],
+    description="Meilleurs candidats pour une offre d'un recruteur, classés selon"
+    " la part des compétences requises couvertes par leur profil, PERMISSION : recruteur",
+    parameters=[
+        OpenApiParameter("taille", int, description="Nombre de candidats (max 100)")
+    ],
+    responses={200: CandidatCorrespondanceSerializer(many=True)},
+)
+class MeilleursCandidatsOffreAPIView(TailleResultatsMixin, generics.ListAPIView):
+    """Vue pour lister les candidats correspondant le mieux à une offre"""
+
+    permission_classes = [IsRecruteur]
+    serializer_class = CandidatCorrespondanceSerializer
+
+    def get_queryset(self):
+        offre_id = self.kwargs.get("offre_id")
+        offre = get_object_or_404(Offre, id=offre_id, recruteur_id=self.request.user.id)
+        return meilleurs_candidats(offre, self.get_taille_resultats())
 
 
 # candidat
@@ -216,7 +513,8 @@ class ToutCandidatAPIView(generics.ListAPIView):
 
     permission_classes = [IsRecruteur]
     serializer_class = UserSerializer
-    queryset = User.objects.filter(role="candidat")
+    pagination_class = PaginationCurseurUtilisateur
+    queryset = UserSerializer.optimiser_queryset(User.objects.filter(role="candidat"))
 
 
 @extend_schema(
@@ -236,21 +534,109 @@ class CandidatInfoAPIView(generics.RetrieveAPIView):
 # vues pour les offres
 @extend_schema(
     tags=["Offres"],
-    description="Liste et création des offres pour un recruteur: POST pour créer, GET pour lister ses offres, PERMISSION : recruteur",
+    description="Liste et création des offres pour un recruteur: POST pour créer, GET pour lister ses offres (pagination par curseur), PERMISSION : recruteur",
     request=OffreSerializer,
     responses={200: OffreSerializer(many=True), 201: OffreSerializer},
 )
-class ListerCreerOffreRecruteurAPIView(generics.ListCreateAPIView):
+class ListerCreerOffreRecruteurAPIView(
+    ReponseConditionnelleMixin, generics.ListCreateAPIView
+):
     """Vue pour lister ou créer des offres pour un recruteur"""
 
     permission_classes = [IsRecruteur]
     serializer_class = OffreSerializer
+    pagination_class = PaginationCurseur
 
     def perform_create(self, serializer):
-        serializer.save(recruteur=self.request.user)
+        serializer.save(recruteur_id=self.request.user.id)
 
     def get_queryset(self):
-        return Offre.objects.filter(recruteur=self.request.user)
+        return OffreSerializer.optimiser_queryset(
+            Offre.objects.filter(recruteur_id=self.request.user.id)
+        )
+
+
+@extend_schema(
+    tags=["Offres"],
+    description="Import en masse d'offres pour un recruteur depuis un corps NDJSON"
+    " (application/x-ndjson, un objet par ligne) ou CSV avec en-tête (text/csv),"
+    " colonnes: titre, description, salaire, competences_requises. Les lignes sont"
+    " validées et insérées par lots, les lignes invalides sont signalées sans"
+    " interrompre l'import, PERMISSION : recruteur",
+    request={
+        "application/x-ndjson": {"type": "string"},
+        "text/csv": {"type": "string"},
+    },
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "crees": {"type": "integer"},
+                "erreurs": {"type": "array", "items": {"type": "object"}},
+            },
+        }
+    },
+)
+class ImporterOffresRecruteurAPIView(generics.GenericAPIView):
+    """Vue pour importer des offres en masse"""
+
+    permission_classes = [IsRecruteur]
+    serializer_class = OffreSerializer
+    parser_classes = [NDJSONParser, CSVParser]
+    taille_lot = 500
+
+    def post(self, request, *args, **kwargs):
+        crees = 0
+        erreurs = []
+        lot = []
+        for numero, ligne in enumerate(request.data, start=1):
+            if isinstance(ligne, LigneInvalide):
+                erreurs.append({"ligne": numero, "erreurs": [ligne.message]})
+                continue
+            serializer = self.get_serializer(data=ligne)
+            if not serializer.is_valid():
+                erreurs.append({"ligne": numero, "erreurs": serializer.errors})
+                continue
+            lot.append(Offre(recruteur_id=request.user.id, **serializer.validated_data))
+            if len(lot) >= self.taille_lot:
+                crees += len(creer_offres_en_masse(lot, self.taille_lot))
+                lot = []
+        if lot:
+            crees += len(creer_offres_en_masse(lot, self.taille_lot))
+
+        return Response({"crees": crees, "erreurs": erreurs})
+
+
+@extend_schema(
+    tags=["Offres"],
+    description="Export en flux des offres du recruteur connecté, type=csv (par"
+    " défaut) ou type=ndjson, PERMISSION : recruteur",
+    parameters=[OpenApiParameter("type", str, enum=list(FORMATS_EXPORT))],
+    responses={200: {"type": "string", "format": "binary"}},
+)
+class ExporterOffresRecruteurAPIView(generics.GenericAPIView):
+    """Vue pour exporter les offres d'un recruteur en flux"""
+
+    permission_classes = [IsRecruteur]
+    colonnes = (
+        "id",
+        "titre",
+        "description",
+        "salaire",
+        "competences_requises",
+        "date_creation",
+    )
+
+    def get(self, request, *args, **kwargs):
+        format_export = lire_format_export(request)
+        # iterator() lit par paquets via un curseur côté serveur sous PostgreSQL
+        lignes = (
+            Offre.objects.filter(recruteur_id=request.user.id)
+            .order_by("id")
+            .values(*self.colonnes)
+            .iterator(chunk_size=2000)
+        )
+        return reponse_export(request, lignes, self.colonnes, format_export, "offres")
 
 
 @extend_schema(
@@ -260,7 +646,9 @@ class ListerCreerOffreRecruteurAPIView(generics.ListCreateAPIView):
     request=OffreSerializer,
     responses={200: OffreSerializer, 204: None},
 )
-class RetrouverOffreRecruteurAPIView(generics.RetrieveUpdateDestroyAPIView):
+class RetrouverOffreRecruteurAPIView(
+    ReponseConditionnelleMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """Vue pour afficher, modifier et supprimer une offre pour un recruteur"""
 
     permission_classes = [IsRecruteur]
@@ -268,28 +656,35 @@ class RetrouverOffreRecruteurAPIView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = "pk"
 
     def get_queryset(self):
-        return Offre.objects.filter(recruteur=self.request.user)
+        return Offre.objects.filter(recruteur_id=self.request.user.id)
 
 
 @extend_schema(
     tags=["Offres"],
-    description="Liste de toutes les offres disponibles, PERMISSION : être connecté",
-    responses={200: OffreSerializer(many=True)},
+    description="Liste de toutes les offres disponibles, en version abrégée"
+    " (description tronquée, nom du recruteur, nombre de candidatures), servie"
+    " depuis le cache avec un ETag (304 si If-None-Match correspond), PERMISSION :"
+    " être connecté",
+    responses={200: OffreResumeSerializer(many=True)},
 )
-class ListerToutesOffreAPIView(generics.ListAPIView):
+class ListerToutesOffreAPIView(ListeOffresEnCacheMixin, generics.ListAPIView):
     """Vue pour lister toutes les offres"""
 
     permission_classes = [IsAuthenticated]
-    serializer_class = OffreSerializer
-    queryset = Offre.objects.all()
+    serializer_class = OffreResumeSerializer
+    pagination_class = PaginationCurseur
+    # le nombre de candidatures d'une page en cache peut avoir jusqu'à
+    # DUREE_CACHE de retard: seules les écritures d'offres invalident la liste
+    queryset = OffreResumeSerializer.projection(Offre.objects.all())
 
 
 @extend_schema(
     tags=["Offres"],
-    description="Détail d'une offre spécifique, PERMISSION : être connecté",
+    description="Détail d'une offre spécifique, servi depuis le cache avec ETag et"
+    " Last-Modified (304 si inchangé), PERMISSION : être connecté",
     responses={200: OffreSerializer},
 )
-class DetailToutesOffreAPIView(generics.RetrieveAPIView):
+class DetailToutesOffreAPIView(DetailOffreEnCacheMixin, generics.RetrieveAPIView):
     """Vue pour afficher les détails d'une offre pour tout le monde"""
 
     permission_classes = [IsAuthenticated]
@@ -300,23 +695,76 @@ class DetailToutesOffreAPIView(generics.RetrieveAPIView):
 
 @extend_schema(
     tags=["Offres"],
-    description="Recherche avancée d'offres, PERMISSION : être connecté",
+    description="Recherche avancée d'offres: q pour une recherche plein texte"
+    " (racinisation française, liste des résultats triés par pertinence), search"
+    " pour une recherche simple sur le titre et la description (pagination par"
+    " curseur), PERMISSION : être connecté",
+    parameters=[
+        OpenApiParameter("q", str, description="Requête plein texte"),
+        OpenApiParameter(
+            "taille",
+            int,
+            description="Nombre maximal de résultats pour q, taille de page sinon"
+            " (max 100)",
+        ),
+    ],
     responses={200: OffreSerializer(many=True)},
 )
-class ChercherOffreAPIView(generics.ListAPIView):
+class ChercherOffreAPIView(TailleResultatsMixin, generics.ListAPIView):
     """Vue pour chercher des offres par mot-clé"""
 
     permission_classes = [IsAuthenticated]
     serializer_class = OffreSerializer
-    queryset = Offre.objects.all()
+    queryset = OffreSerializer.optimiser_queryset(Offre.objects.all())
     search_fields = ["titre", "description"]
     filter_backends = [SearchFilter, DjangoFilterBackend]
+    pagination_class = PaginationCurseur
+    taille_resultats = 20
+
+    @property
+    def paginator(self):
+        # avec q, les résultats sont triés par pertinence et bornés par taille
+        if self.request is not None and self.request.query_params.get("q"):
+            return None
+        return super().paginator
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        requete = self.request.query_params.get("q")
+        if requete:
+            queryset = rechercher_offres(
+                requete, queryset, limite=self.get_taille_resultats()
+            )
+        return queryset
+
+
+@extend_schema(
+    tags=["Offres"],
+    description="Offres recommandées au candidat connecté, classées selon la part"
+    " de leurs compétences requises couvertes par son profil, PERMISSION : candidat",
+    parameters=[
+        OpenApiParameter("taille", int, description="Nombre d'offres (max 100)")
+    ],
+    responses={200: OffreCorrespondanceSerializer(many=True)},
+)
+class OffresRecommandeesCandidatAPIView(TailleResultatsMixin, generics.ListAPIView):
+    """Vue pour lister les offres correspondant le mieux au profil d'un candidat"""
+
+    permission_classes = [IsCandidat]
+    serializer_class = OffreCorrespondanceSerializer
+
+    def get_queryset(self):
+        return meilleures_offres(
+            utilisateur_complet(self.request.user), self.get_taille_resultats()
+        )
 
 
 # vues pour les candidatures
 @extend_schema(
     tags=["Candidatures"],
-    description="Postuler à une offre, PERMISSION : candidat",
+    description="Postuler à une offre, PERMISSION : candidat. Le CV éventuel est"
+    " traité en arrière-plan: statut_cv vaut 'en traitement' dans la réponse puis"
+    " 'traité' (ou 'erreur') une fois le fichier rangé",
     request=CandidatureSerializer,
     responses={201: CandidatureSerializer},
 )
@@ -328,17 +776,38 @@ class CreerCandidatureCandidatAPIView(generics.CreateAPIView):
     parser_classes = [
         MultiPartParser,
         FormParser,
-        JSONParser,
+        RapideJSONParser,
     ]  # Pour gérer les fichiers
 
+    def initialize_request(self, request, *args, **kwargs):
+        # le CV est écrit sur disque par morceaux, jamais gardé en mémoire
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def perform_create(self, serializer):
+        # pas de lecture préalable de l'offre: voir CandidatureSerializer.create
         offre_id = self.kwargs.get("offre_id")
-        print(offre_id)
-        offre = get_object_or_404(Offre, id=offre_id)
-        serializer.save(candidat=self.request.user, offre=offre)
+        fichier = serializer.validated_data.pop("cv", None)
+        if fichier is None:
+            serializer.save(candidat_id=self.request.user.id, offre_id=offre_id)
+            return
+
+        nom_spool = mettre_en_spool(fichier)
+        try:
+            candidature = serializer.save(
+                candidat_id=self.request.user.id,
+                offre_id=offre_id,
+                cv=nom_spool,
+                statut_cv="en traitement",
+            )
+        except Exception:
+            stockage_cv.delete(nom_spool)
+            raise
+        # la réponse part sans attendre le rangement du fichier
+        soumettre(traiter_cv, candidature.pk, nom_spool)
 
     def get_queryset(self):
-        return Candidature.objects.filter(candidat=self.request.user)
+        return Candidature.objects.filter(candidat_id=self.request.user.id)
 
 
 @extend_schema(
@@ -346,14 +815,20 @@ class CreerCandidatureCandidatAPIView(generics.CreateAPIView):
     description="Liste des candidatures du candidat connecté, PERMISSION : candidat",
     responses={200: CandidatureSerializer(many=True)},
 )
-class ListerCandidatureCandidatAPIView(generics.ListAPIView):
+class ListerCandidatureCandidatAPIView(
+    ReponseConditionnelleMixin, generics.ListAPIView
+):
     """Vue pour lister les candidatures d'un candidat"""
 
     permission_classes = [IsCandidat]
     serializer_class = CandidatureSerializer
+    pagination_class = PaginationCurseur
+    champs_version = CHAMPS_VERSION_CANDIDATURE
 
     def get_queryset(self):
-        return Candidature.objects.filter(candidat=self.request.user)
+        return CandidatureSerializer.optimiser_queryset(
+            Candidature.objects.filter(candidat_id=self.request.user.id)
+        )
 
 
 @extend_schema(
@@ -361,12 +836,66 @@ class ListerCandidatureCandidatAPIView(generics.ListAPIView):
     description="Détail d'une candidature spécifique, d'un candidat connecté, PERMISSION : candidat",
     responses={200: CandidatureSerializer},
 )
-class DetailCandidatureCandidatAPIView(generics.RetrieveUpdateDestroyAPIView):
+class DetailCandidatureCandidatAPIView(
+    ReponseConditionnelleMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """Vue pour afficher, modifier et supprimer une candidature pour un candidat"""
 
     permission_classes = [IsCandidat]
     serializer_class = CandidatureSerializer
+    champs_version = CHAMPS_VERSION_CANDIDATURE
     lookup_field = "pk"
 
     def get_queryset(self):
-        return Candidature.objects.filter(candidat=self.request.user)
+        return Candidature.objects.filter(
+            candidat_id=self.request.user.id
+        ).select_related("offre", "candidat")
+
+
+@extend_schema(
+    tags=["Événements"],
+    description="Événements des candidatures de l'utilisateur connecté (reçues pour"
+    " un recruteur, envoyées pour un candidat) postérieurs au curseur, en long"
+    " polling jusqu'à attente secondes (max 25). Le flux Server-Sent Events est"
+    " servi sous ASGI par /api/evenements/flux/, PERMISSION : être connecté",
+    parameters=[
+        OpenApiParameter("curseur", int, description="Id du dernier événement reçu"),
+        OpenApiParameter("attente", int, description="Attente maximale en secondes"),
+    ],
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "curseur": {"type": "integer"},
+                "evenements": {"type": "array", "items": {"type": "object"}},
+            },
+        }
+    },
+)
+class EvenementsAPIView(generics.GenericAPIView):
+    """Vue pour suivre les changements de candidatures sans sonder les listes"""
+
+    permission_classes = [IsAuthenticated]
+
+    def lire_entier(self, valeur, nom):
+        try:
+            entier = int(valeur)
+        except (TypeError, ValueError):
+            raise ValidationError({nom: "Nombre entier attendu."})
+        if entier < 0:
+            raise ValidationError({nom: "Nombre positif attendu."})
+        return entier
+
+    def get(self, request, *args, **kwargs):
+        curseur = self.lire_entier(request.query_params.get("curseur", 0), "curseur")
+        attente = min(
+            self.lire_entier(request.query_params.get("attente", 0), "attente"),
+            ATTENTE_MAX,
+        )
+        evenements = attendre_evenements(request.user, curseur, attente)
+        return Response(
+            {
+                "curseur": evenements[-1].id if evenements else curseur,
+                "evenements": [representation(evenement) for evenement in evenements],
+            }
+        )
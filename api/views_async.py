@@ -0,0 +1,376 @@
+"""
+Vues asynchrones, servies sous ASGI (config/asgi.py).
+
+Les vues DRF sont synchrones: ces vues sont de simples vues Django async.
+L'utilisateur est reconstruit depuis les claims du token JWT, sans requête,
+et les lectures passent par l'ORM asynchrone. Les versions en lecture seule
+reprennent les serializers et la pagination des vues DRF, sans le cache de
+réponses ni les en-têtes conditionnels.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .diffusion import canal_candidat, diffuseur
+from .evenements import (
+    SSE_ATTENTE,
+    SSE_RECONNEXION,
+    flux_sse,
+    message_sse,
+    representation,
+)
+from .models import Candidature, Evenement, Offre
+from .pagination import PaginationCurseur, lire_taille
+from .recherche import rechercher_offres, utilise_postgresql
+from .renderers import RapideJSONRenderer
+from .serializers import (
+    CandidatureSerializer,
+    OffreResumeSerializer,
+    OffreSerializer,
+)
+
+# commentaire envoyé aux connexions inactives, pour les proxys et les clients
+BATTEMENT = 15
+# sondage de l'outbox, une requête par processus pour tous les flux des
+# candidats, quand le diffuseur ne relie pas les processus: un événement
+# validé par un autre processus arrive au plus tard après ce délai
+SONDAGE_OUTBOX = 5
+TAILLE_LOT_SONDAGE = 1000
+# message de réveil d'un flux: relire l'outbox depuis son curseur
+REVEIL = {"reveil": True}
+
+logger = logging.getLogger(__name__)
+
+rendu_json = RapideJSONRenderer()
+
+
+def authentifier(request):
+    """Utilisateur du token JWT de l'en-tête Authorization, ou None"""
+    try:
+        resultat = JWTStatelessUserAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return resultat[0] if resultat else None
+
+
+async def role_de(utilisateur):
+    if "role" in utilisateur.token:
+        return utilisateur.token["role"]
+    # token sans claim de rôle: lecture en base, hors de la boucle
+    return await sync_to_async(lambda: utilisateur.role)()
+
+
+def erreur(message, statut):
+    return JsonResponse({"detail": message}, status=statut)
+
+
+def reponse_json(donnees, statut=200):
+    # même rendu que les vues DRF
+    return HttpResponse(
+        rendu_json.render(donnees), status=statut, content_type="application/json"
+    )
+
+
+def vue_async(role=None):
+    """
+    Vue GET authentifiée par JWT, éventuellement réservée à un rôle. La vue
+    reçoit une Request DRF (query_params) et l'utilisateur du token
+    """
+
+    def decorateur(vue):
+        @functools.wraps(vue)
+        async def enveloppe(request, *args, **kwargs):
+            if request.method != "GET":
+                return erreur("Méthode non autorisée.", 405)
+            utilisateur = authentifier(request)
+            if utilisateur is None:
+                return erreur("Authentification requise.", 401)
+            if role is not None and await role_de(utilisateur) != role:
+                return erreur(
+                    "Vous n'avez pas la permission d'effectuer cette action.", 403
+                )
+            try:
+                return await vue(Request(request), utilisateur, *args, **kwargs)
+            except APIException as exception:
+                return reponse_json({"detail": exception.detail}, exception.status_code)
+
+        return enveloppe
+
+    return decorateur
+
+
+@vue_async()
+async def lister_offres(request, utilisateur):
+    """Liste paginée des offres, comme ListerToutesOffreAPIView"""
+    pagination = PaginationCurseur()
+    page = await pagination.apaginer(
+        OffreResumeSerializer.projection(Offre.objects.all()), request
+    )
+    return reponse_json(
+        pagination.donnees_paginees(OffreResumeSerializer(page, many=True).data)
+    )
+
+
+@vue_async()
+async def detail_offre(request, utilisateur, pk):
+    try:
+        offre = await OffreSerializer.optimiser_queryset(Offre.objects.all()).aget(
+            pk=pk
+        )
+    except Offre.DoesNotExist:
+        return erreur("Introuvable.", 404)
+    return reponse_json(OffreSerializer(offre).data)
+
+
+@vue_async()
+async def chercher_offres(request, utilisateur):
+    """
+    Recherche plein texte (q) triée par pertinence, comme ChercherOffreAPIView;
+    l'en-tête X-Total-Count donne le nombre total d'offres correspondantes
+    (au plus MAX_RESULTATS_REPLI hors PostgreSQL)
+    """
+    requete = request.query_params.get("q", "").strip()
+    if not requete:
+        return erreur("Le paramètre q est obligatoire.", 400)
+    queryset = OffreSerializer.optimiser_queryset(Offre.objects.all())
+    if utilise_postgresql():
+        queryset = rechercher_offres(requete, queryset)
+    else:
+        # l'index en mémoire peut avoir à se construire depuis la base
+        queryset = await sync_to_async(rechercher_offres)(requete, queryset)
+    total = await queryset.acount()
+    offres = [
+        offre async for offre in queryset[: lire_taille(request, 20, 100)].aiterator()
+    ]
+    reponse = reponse_json(OffreSerializer(offres, many=True).data)
+    reponse["X-Total-Count"] = total
+    return reponse
+
+
+@vue_async(role="candidat")
+async def lister_candidatures_candidat(request, utilisateur):
+    """Candidatures du candidat connecté, comme ListerCandidatureCandidatAPIView"""
+    pagination = PaginationCurseur()
+    page = await pagination.apaginer(
+        CandidatureSerializer.optimiser_queryset(
+            Candidature.objects.filter(candidat_id=utilisateur.id)
+        ),
+        request,
+    )
+    donnees = CandidatureSerializer(page, many=True, context={"request": request})
+    return reponse_json(pagination.donnees_paginees(donnees.data))
+
+
+@vue_async(role="candidat")
+async def detail_candidature_candidat(request, utilisateur, pk):
+    queryset = CandidatureSerializer.optimiser_queryset(
+        Candidature.objects.filter(candidat_id=utilisateur.id)
+    )
+    try:
+        candidature = await queryset.aget(pk=pk)
+    except Candidature.DoesNotExist:
+        return erreur("Introuvable.", 404)
+    return reponse_json(
+        CandidatureSerializer(candidature, context={"request": request}).data
+    )
+
+
+def reponse_sse(flux):
+    reponse = StreamingHttpResponse(flux, content_type="text/event-stream")
+    reponse["Cache-Control"] = "no-cache"
+    reponse["X-Accel-Buffering"] = "no"
+    return reponse
+
+
+def lire_dernier_evenement(request):
+    """Curseur de reprise d'un flux SSE (en-tête Last-Event-ID), ou None"""
+    try:
+        curseur = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        return None
+    return curseur if curseur >= 0 else None
+
+
+@vue_async()
+async def flux_evenements(request, utilisateur):
+    """
+    Flux Server-Sent Events des événements de EvenementsAPIView, servi par
+    un générateur asynchrone: entre deux sondages de l'outbox, la connexion
+    n'occupe ni thread ni connexion à la base
+    """
+    if not isinstance(request._request, ASGIRequest):
+        return erreur("Flux disponible uniquement sous ASGI.", 400)
+    curseur = lire_dernier_evenement(request)
+    if curseur is None:
+        return erreur("En-tête Last-Event-ID invalide.", 400)
+    return reponse_sse(flux_sse(await role_de(utilisateur), utilisateur.id, curseur))
+
+
+@vue_async(role="candidat")
+async def flux_candidatures_candidat(request, utilisateur):
+    """
+    Flux Server-Sent Events des changements de statut des candidatures du
+    candidat connecté. Une connexion inactive ne coûte qu'une coroutine et une
+    file: ni thread ni connexion à la base
+    """
+    if not isinstance(request._request, ASGIRequest):
+        return erreur("Flux disponible uniquement sous ASGI.", 400)
+    curseur = lire_dernier_evenement(request)
+    if curseur is None:
+        return erreur("En-tête Last-Event-ID invalide.", 400)
+    return reponse_sse(FluxCandidat(utilisateur.id, curseur))
+
+
+class SondeurOutbox:
+    """
+    Sondage de l'outbox partagé par les flux des candidats d'un processus.
+    Une tâche lit, pour tous les candidats suivis, l'id de leur dernier
+    événement et réveille (REVEIL) les flux de ceux qui en ont un nouveau:
+    chaque flux relit alors l'outbox depuis son propre curseur. La tâche
+    s'arrête avec le dernier flux
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.suivis = Counter()
+        self.derniers = {}
+        self.tache = None
+
+    def inscrire(self, candidat_id):
+        with self.verrou:
+            self.suivis[candidat_id] += 1
+        boucle = asyncio.get_running_loop()
+        if self.tache is None or self.tache.done() or self.tache.get_loop() != boucle:
+            self.tache = boucle.create_task(self.sonder())
+
+    def desinscrire(self, candidat_id):
+        # appelée aussi depuis le thread de response.close()
+        with self.verrou:
+            self.suivis[candidat_id] -= 1
+            if self.suivis[candidat_id] <= 0:
+                del self.suivis[candidat_id]
+            tache = None if self.suivis else self.tache
+        if tache is not None and not tache.done():
+            try:
+                tache.get_loop().call_soon_threadsafe(tache.cancel)
+            except RuntimeError:
+                pass  # boucle fermée
+
+    async def sonder(self):
+        while True:
+            await asyncio.sleep(SONDAGE_OUTBOX)
+            with self.verrou:
+                candidats = list(self.suivis)
+            if not candidats:
+                self.derniers = {}
+                return
+            try:
+                derniers = await self.lire_derniers(candidats)
+            except Exception:
+                logger.exception("Sondage de l'outbox impossible")
+                continue
+            for candidat_id, dernier in derniers.items():
+                if self.derniers.get(candidat_id) != dernier:
+                    diffuseur().publier(canal_candidat(candidat_id), REVEIL)
+            self.derniers = derniers
+
+    async def lire_derniers(self, candidats):
+        """{candidat_id: id de son dernier événement}, par l'index (candidat, id)"""
+        derniers = {}
+        for debut in range(0, len(candidats), TAILLE_LOT_SONDAGE):
+            lignes = (
+                Evenement.objects.filter(
+                    candidat_id__in=candidats[debut : debut + TAILLE_LOT_SONDAGE]
+                )
+                .values_list("candidat_id")
+                .annotate(dernier=Max("id"))
+                .order_by()
+            )
+            async for candidat_id, dernier in lignes:
+                derniers[candidat_id] = dernier
+        return derniers
+
+
+sondeur_outbox = SondeurOutbox()
+
+
+class FluxCandidat:
+    """
+    Messages SSE d'un candidat. close() est appelée par Django à la fin de la
+    réponse, y compris quand le client se déconnecte: l'abonnement est libéré
+    sans attendre la finalisation du générateur.
+
+    Les ids d'un même candidat suivent l'ordre de validation (voir
+    api/evenements.py): avant d'envoyer un message poussé, le flux rattrape
+    dans l'outbox les événements d'ids inférieurs validés par d'autres
+    processus, et l'id envoyé ne recule jamais
+    """
+
+    def __init__(self, candidat_id, curseur):
+        self.candidat_id = candidat_id
+        self.curseur = curseur
+        self.abonnement = None
+        self.sonde = False
+
+    def __aiter__(self):
+        return self.messages()
+
+    def close(self):
+        if self.abonnement is not None:
+            self.abonnement.fermer()
+        if self.sonde:
+            self.sonde = False
+            sondeur_outbox.desinscrire(self.candidat_id)
+
+    async def lire_outbox(self, avant=None):
+        """Messages des événements postérieurs au curseur (et antérieurs à avant)"""
+        evenements = Evenement.objects.filter(
+            candidat_id=self.candidat_id, id__gt=self.curseur
+        )
+        if avant is not None:
+            evenements = evenements.filter(id__lt=avant)
+        async for evenement in evenements.order_by("id").aiterator():
+            self.curseur = evenement.id
+            yield message_sse(representation(evenement))
+
+    async def messages(self):
+        # abonnement avant le rattrapage: aucun événement ne tombe entre les deux
+        self.abonnement = diffuseur().abonner(canal_candidat(self.candidat_id))
+        try:
+            yield SSE_RECONNEXION
+            async for message in self.lire_outbox():
+                yield message
+            # un diffuseur local ne reçoit que les événements de ce processus
+            if not getattr(diffuseur(), "inter_processus", False):
+                self.sonde = True
+                sondeur_outbox.inscrire(self.candidat_id)
+
+            # file pleine: le flux se ferme, le client se reconnecte et rattrape
+            # les événements manqués depuis l'outbox grâce à Last-Event-ID
+            while not self.abonnement.debordee:
+                message = await self.abonnement.recevoir(BATTEMENT)
+                if message is None:
+                    yield SSE_ATTENTE
+                    continue
+                identifiant = message.get("id")
+                if identifiant is not None and identifiant <= self.curseur:
+                    continue
+                async for rattrape in self.lire_outbox(avant=identifiant):
+                    yield rattrape
+                if identifiant is not None:
+                    self.curseur = identifiant
+                    yield message_sse(message)
+        finally:
+            self.close()
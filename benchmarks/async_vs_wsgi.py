@@ -0,0 +1,116 @@
+"""
+Compare les vues DRF synchrones et leurs versions asynchrones (api/views_async.py).
+
+Trois configurations, chacune dans un seul processus uvicorn:
+
+- wsgi: vues DRF via config.wsgi (uvicorn --interface wsgi)
+- asgi-sync: les mêmes vues DRF via config.asgi, exécutées dans un thread
+- asgi-async: les vues /api/async/ via config.asgi, avec l'ORM asynchrone
+
+Par défaut le cache de réponses est désactivé (DummyCache) pour comparer des
+lectures en base. La base configurée (.env) doit contenir des offres et le
+candidat dont les identifiants sont passés en option.
+
+    python benchmarks/async_vs_wsgi.py --utilisateur candidat --mot-de-passe ...
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from charge import charger  # noqa: E402
+from serveur import attendre, lancer  # noqa: E402
+
+# (nom, chemin synchrone, chemin asynchrone)
+SCENARIOS = [
+    ("offres", "/api/offres/", "/api/async/offres/"),
+    ("offre", "/api/offres/{offre}/", "/api/async/offres/{offre}/"),
+    (
+        "recherche",
+        "/api/offres/rechercher/?q={requete}",
+        "/api/async/offres/rechercher/?q={requete}",
+    ),
+    ("candidatures", "/api/candidatures/", "/api/async/candidatures/"),
+]
+
+
+def requete_json(url, donnees=None, entetes=None):
+    requete = urllib.request.Request(
+        url,
+        data=json.dumps(donnees).encode() if donnees is not None else None,
+        headers={"Content-Type": "application/json", **(entetes or {})},
+    )
+    with urllib.request.urlopen(requete, timeout=10) as reponse:
+        return json.load(reponse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--utilisateur", required=True, help="Candidat existant")
+    parser.add_argument("--mot-de-passe", required=True)
+    parser.add_argument("--requete", default="développeur")
+    parser.add_argument("--concurrence", type=int, default=50)
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--port-wsgi", type=int, default=8101)
+    parser.add_argument("--port-asgi", type=int, default=8102)
+    parser.add_argument("--avec-cache", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    options = parser.parse_args()
+
+    bases = {
+        nom: f"http://127.0.0.1:{port}"
+        for nom, port in (("wsgi", options.port_wsgi), ("asgi", options.port_asgi))
+    }
+    processus = [
+        lancer(nom, port, options.avec_cache)
+        for nom, port in (("wsgi", options.port_wsgi), ("asgi", options.port_asgi))
+    ]
+    try:
+        for base in bases.values():
+            attendre(base)
+        token = requete_json(
+            f"{bases['asgi']}/api/token-obtain/",
+            {"username": options.utilisateur, "password": options.mot_de_passe},
+        )["access"]
+        entetes = {"Authorization": f"Bearer {token}"}
+        offres = requete_json(f"{bases['asgi']}/api/offres/", entetes=entetes)
+        valeurs = {
+            "offre": offres["results"][0]["id"],
+            "requete": urllib.request.quote(options.requete),
+        }
+
+        resultats = {}
+        for nom, synchrone, asynchrone in SCENARIOS:
+            for configuration, base, chemin in (
+                ("wsgi", bases["wsgi"], synchrone),
+                ("asgi-sync", bases["asgi"], synchrone),
+                ("asgi-async", bases["asgi"], asynchrone),
+            ):
+                url = base + chemin.format(**valeurs)
+                resultat = asyncio.run(
+                    charger(url, entetes, options.concurrence, options.duree)
+                )
+                resultats[f"{nom}/{configuration}"] = resultat.resume()
+    finally:
+        for serveur in processus:
+            serveur.terminate()
+            serveur.wait()
+
+    if options.json:
+        print(json.dumps(resultats, indent=2))
+        return
+    print(f"{'scénario':<28}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'erreurs':>9}")
+    for nom, resume in resultats.items():
+        print(
+            f"{nom:<28}{resume['rps']:>10}{resume['p50_ms']:>10}"
+            f"{resume['p99_ms']:>10}{resume['erreurs']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Générateur de charge HTTP/1.1 minimal, sans dépendance: des connexions
+keep-alive concurrentes envoient des requêtes en boucle pendant une durée
+donnée et mesurent la latence de chaque réponse.
+"""
+
+import asyncio
+import itertools
+import statistics
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass
+class Resultat:
+    duree: float
+    latences: list = field(default_factory=list)
+    erreurs: int = 0
+    statuts: dict = field(default_factory=dict)
+
+    @property
+    def requetes_par_seconde(self):
+        return len(self.latences) / self.duree
+
+    def percentile(self, rang):
+        if len(self.latences) < 2:
+            return self.latences[0] if self.latences else float("nan")
+        return statistics.quantiles(self.latences, n=100, method="inclusive")[rang - 1]
+
+    def resume(self):
+        return {
+            "requetes": len(self.latences),
+            "erreurs": self.erreurs,
+            "rps": round(self.requetes_par_seconde, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+
+async def lire_reponse(lecteur):
+    """Lit une réponse complète (Content-Length ou chunked), retourne (statut, fermer)"""
+    ligne = await lecteur.readline()
+    if not ligne:
+        raise ConnectionError("connexion fermée par le serveur")
+    statut = int(ligne.split()[1])
+    entetes = {}
+    while (ligne := await lecteur.readline()) not in (b"\r\n", b""):
+        nom, _, valeur = ligne.decode("latin-1").partition(":")
+        entetes[nom.strip().lower()] = valeur.strip()
+    if entetes.get("transfer-encoding") == "chunked":
+        while taille := int((await lecteur.readline()).split(b";")[0], 16):
+            await lecteur.readexactly(taille + 2)
+        await lecteur.readline()
+    else:
+        await lecteur.readexactly(int(entetes.get("content-length", 0)))
+    return statut, entetes.get("connection", "").lower() == "close"
+
+
+def reussie(statut):
+    return 200 <= statut < 400
+
+
+def construire_requete(url, entetes=None, methode="GET", corps=None):
+    morceaux = urlsplit(url)
+    chemin = morceaux.path + (f"?{morceaux.query}" if morceaux.query else "")
+    lignes = [f"{methode} {chemin} HTTP/1.1", f"Host: {morceaux.netloc}"]
+    lignes += [f"{nom}: {valeur}" for nom, valeur in (entetes or {}).items()]
+    if corps is not None:
+        lignes.append(f"Content-Length: {len(corps)}")
+    return ("\r\n".join(lignes) + "\r\n\r\n").encode("latin-1") + (corps or b"")
+
+
+async def client(adresse, fabrique, echeance, resultat, attendus):
+    hote, port = adresse
+    lecteur = ecrivain = None
+    while time.perf_counter() < echeance:
+        requete = fabrique()
+        try:
+            if ecrivain is None:
+                lecteur, ecrivain = await asyncio.open_connection(hote, port)
+            debut = time.perf_counter()
+            ecrivain.write(requete)
+            await ecrivain.drain()
+            statut, fermer = await lire_reponse(lecteur)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            resultat.erreurs += 1
+            ecrivain = None
+            await asyncio.sleep(0.01)
+            continue
+        resultat.statuts[statut] = resultat.statuts.get(statut, 0) + 1
+        if attendus(statut):
+            resultat.latences.append(time.perf_counter() - debut)
+        else:
+            resultat.erreurs += 1
+        if fermer:
+            ecrivain.close()
+            ecrivain = None
+    if ecrivain is not None:
+        ecrivain.close()
+
+
+async def charger(
+    url,
+    entetes=None,
+    concurrence=50,
+    duree=10.0,
+    methode="GET",
+    corps=None,
+    attendus=None,
+    premier=0,
+):
+    """
+    Envoie des requêtes sur url depuis concurrence connexions pendant duree
+    secondes. url et corps peuvent être des fonctions du numéro de la requête
+    (à partir de premier), pour des écritures qui ne doivent pas se répéter;
+    attendus donne les statuts comptés comme des succès (2xx et 3xx par défaut)
+    """
+    if callable(url) or callable(corps):
+        numeros = itertools.count(premier)
+
+        def fabrique():
+            numero = next(numeros)
+            return construire_requete(
+                url(numero) if callable(url) else url,
+                entetes,
+                methode,
+                corps(numero) if callable(corps) else corps,
+            )
+
+        morceaux = urlsplit(url(premier) if callable(url) else url)
+    else:
+        requete = construire_requete(url, entetes, methode, corps)
+
+        def fabrique():
+            return requete
+
+        morceaux = urlsplit(url)
+
+    attendus = attendus.__contains__ if attendus else reussie
+    resultat = Resultat(duree=duree)
+    echeance = time.perf_counter() + duree
+    await asyncio.gather(
+        *(
+            client(
+                (morceaux.hostname, morceaux.port or 80),
+                fabrique,
+                echeance,
+                resultat,
+                attendus,
+            )
+            for _ in range(concurrence)
+        )
+    )
+    return resultat
@@ -0,0 +1,120 @@
+"""
+Temps CPU du rendu JSON des grandes listes, par route: JSONRenderer de DRF
+(module json) contre RapideJSONRenderer (orjson), et décodage du même corps
+par JSONParser et RapideJSONParser. La durée de la requête complète (avec le
+rendu configuré) situe la part du rendu.
+
+Mesuré dans le processus, sans serveur, sur la base configurée (.env),
+peuplée par python manage.py seed_data.
+
+    python benchmarks/rendu_json.py [--taille 100] [--repetitions 50]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api.donnees_synthetiques import PREFIXE  # noqa: E402
+from api.models import User  # noqa: E402
+from api.parsers import RapideJSONParser  # noqa: E402
+from api.renderers import RapideJSONRenderer, orjson  # noqa: E402
+
+# (nom de route, rôle de l'utilisateur connecté)
+ROUTES = (
+    ("candidats", "recruteur"),
+    ("offres", "candidat"),
+    ("recruteur-offres", "recruteur"),
+    ("list-candidatures", "candidat"),
+)
+
+
+def mediane(fonction, repetitions):
+    """Temps CPU médian d'un appel, en millisecondes"""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.process_time()
+        fonction()
+        durees.append(time.process_time() - debut)
+    durees.sort()
+    return durees[len(durees) // 2] * 1000
+
+
+def mesurer(client, route, taille, repetitions):
+    url = f"{reverse(route)}?taille={taille}"
+
+    def requete():
+        cache.clear()
+        reponse = client.get(url)
+        reponse.content  # rendu
+        return reponse
+
+    reponse = requete()
+    if reponse.status_code != 200:
+        raise SystemExit(f"{route}: statut {reponse.status_code}")
+    donnees = reponse.data
+    corps = JSONRenderer().render(donnees)
+    stdlib, rapide = JSONRenderer(), RapideJSONRenderer()
+    return {
+        "requete": mediane(requete, repetitions),
+        "rendu_json": mediane(lambda: stdlib.render(donnees), repetitions),
+        "rendu_rapide": mediane(lambda: rapide.render(donnees), repetitions),
+        "lecture_json": mediane(
+            lambda: JSONParser().parse(io.BytesIO(corps)), repetitions
+        ),
+        "lecture_rapide": mediane(
+            lambda: RapideJSONParser().parse(io.BytesIO(corps)), repetitions
+        ),
+        "octets": len(corps),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--taille", type=int, default=100, help="Taille de page")
+    parser.add_argument("--repetitions", type=int, default=50)
+    options = parser.parse_args()
+
+    if orjson is None:
+        parser.error("orjson n'est pas installé: les deux rendus seraient identiques")
+    clients = {}
+    for role in ("candidat", "recruteur"):
+        utilisateur = User.objects.filter(username=f"{PREFIXE}-{role}-0").first()
+        if utilisateur is None:
+            parser.error("Base vide: lancez python manage.py seed_data")
+        clients[role] = APIClient()
+        clients[role].force_authenticate(user=utilisateur)
+
+    print(
+        f"{'route':<20} {'requête ms':>10} {'json ms':>8} {'orjson ms':>9}"
+        f" {'gain':>6} {'part':>6} {'lecture json':>13} {'orjson':>7} {'octets':>8}"
+    )
+    for route, role in ROUTES:
+        mesure = mesurer(clients[role], route, options.taille, options.repetitions)
+        print(
+            f"{route:<20} {mesure['requete']:>10.2f} {mesure['rendu_json']:>8.2f}"
+            f" {mesure['rendu_rapide']:>9.2f}"
+            f" {mesure['rendu_json'] / max(mesure['rendu_rapide'], 1e-6):>5.1f}x"
+            f" {mesure['rendu_json'] / mesure['requete']:>6.0%}"
+            f" {mesure['lecture_json']:>13.2f} {mesure['lecture_rapide']:>7.2f}"
+            f" {mesure['octets']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Temps CPU pour lister des offres: lecture en base, sérialisation et rendu
+JSON, avec la représentation complète (OffreSerializer sur des instances) et
+la représentation abrégée des listes (OffreResumeSerializer sur des lignes
+de .values()).
+
+Mesuré dans le processus, sans serveur, sur la base configurée (.env), qui
+doit contenir au moins --nombre offres (python manage.py seed_data).
+
+    python benchmarks/serialisation_offres.py [--nombre 1000] [--repetitions 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.models import Offre  # noqa: E402
+from api.serializers import OffreResumeSerializer, OffreSerializer  # noqa: E402
+
+ORDRE = ("-date_creation", "-id")
+
+
+def complete(nombre):
+    offres = OffreSerializer.optimiser_queryset(Offre.objects.order_by(*ORDRE))
+    return OffreSerializer(list(offres[:nombre]), many=True).data
+
+
+def abregee(nombre):
+    lignes = OffreResumeSerializer.projection(Offre.objects.order_by(*ORDRE))
+    return OffreResumeSerializer(list(lignes[:nombre]), many=True).data
+
+
+def mesurer(fonction, nombre, repetitions):
+    """Temps CPU médian (ms) de la lecture plus sérialisation, et du rendu"""
+    renderer = JSONRenderer()
+    lectures, rendus = [], []
+    for _ in range(repetitions):
+        debut = time.process_time()
+        donnees = fonction(nombre)
+        milieu = time.process_time()
+        corps = renderer.render(donnees)
+        lectures.append(milieu - debut)
+        rendus.append(time.process_time() - milieu)
+    lectures.sort()
+    rendus.sort()
+    return (
+        lectures[len(lectures) // 2] * 1000,
+        rendus[len(rendus) // 2] * 1000,
+        len(corps),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nombre", type=int, default=1000)
+    parser.add_argument("--repetitions", type=int, default=20)
+    options = parser.parse_args()
+
+    disponibles = Offre.objects.count()
+    if disponibles < options.nombre:
+        parser.error(
+            f"{disponibles} offres en base, {options.nombre} demandées:"
+            " lancez python manage.py seed_data"
+        )
+
+    print(
+        f"{'représentation':<16} {'lecture+sérialisation ms':>25}"
+        f" {'rendu ms':>9} {'total ms':>9} {'octets':>9}"
+    )
+    resultats = {}
+    for nom, fonction in (("complète", complete), ("abrégée", abregee)):
+        lecture, rendu, taille = mesurer(fonction, options.nombre, options.repetitions)
+        resultats[nom] = lecture + rendu
+        print(
+            f"{nom:<16} {lecture:>25.1f} {rendu:>9.1f} {lecture + rendu:>9.1f}"
+            f" {taille:>9}"
+        )
+    print(
+        f"abrégée / complète: {resultats['abrégée'] / resultats['complète']:.0%}"
+        " du temps CPU"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Lancement d'un serveur uvicorn local pour les benchmarks"""
+
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+
+APPLICATIONS = {
+    "wsgi": ["config.wsgi:application", "--interface", "wsgi"],
+    "asgi": ["config.asgi:application"],
+}
+
+CACHE_DESACTIVE = "django.core.cache.backends.dummy.DummyCache"
+
+
+def lancer(interface, port, avec_cache=False):
+    """
+    Un processus uvicorn servant l'application. Sans avec_cache, le cache de
+    réponses est désactivé (DummyCache) pour mesurer des lectures en base
+    """
+    environnement = dict(os.environ)
+    if not avec_cache:
+        environnement["CACHE_BACKEND"] = CACHE_DESACTIVE
+    commande = [sys.executable, "-m", "uvicorn", *APPLICATIONS[interface]]
+    commande += ["--port", str(port), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(commande, cwd=RACINE, env=environnement)
+
+
+def attendre(base, delai=30):
+    echeance = time.monotonic() + delai
+    while time.monotonic() < echeance:
+        try:
+            urllib.request.urlopen(f"{base}/api/offres/", timeout=1)
+            return
+        except urllib.error.HTTPError:
+            # 401 sans token: le serveur répond
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{base} ne répond pas")
+
+
+def reinitialiser_pic_memoire(pid):
+    """Remet à zéro le pic de RSS du processus (Linux), sans effet ailleurs"""
+    try:
+        Path(f"/proc/{pid}/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def pic_memoire(pid):
+    """Pic de RSS du processus en Mo (VmHWM sous Linux), ou None"""
+    try:
+        lignes = Path(f"/proc/{pid}/status").read_text().splitlines()
+    except OSError:
+        return None
+    for ligne in lignes:
+        if ligne.startswith("VmHWM:"):
+            return round(int(ligne.split()[1]) / 1024, 1)
+    return None
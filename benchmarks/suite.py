@@ -0,0 +1,465 @@
+"""
+Benchmark de charge de toutes les routes de api/urls.py.
+
+Pour chaque route: débit, latences p50/p95/p99 et erreurs sous charge (serveur
+uvicorn local et générateur de benchmarks/charge.py), nombre de requêtes SQL
+d'un appel (mesuré dans ce processus avec le client de test Django) et pic de
+RSS du serveur pendant la charge. Le rapport JSON peut servir de référence à
+une exécution suivante, qui échoue si une route régresse.
+
+La base est celle des réglages Django (DJANGO_SETTINGS_MODULE, .env). --profil
+la peuple d'abord avec la commande seed_data:
+
+    python benchmarks/suite.py --profil petit --sortie reference.json
+    python benchmarks/suite.py --reference reference.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from charge import charger  # noqa: E402
+from serveur import (  # noqa: E402
+    CACHE_DESACTIVE,
+    attendre,
+    lancer,
+    pic_memoire,
+    reinitialiser_pic_memoire,
+)
+
+# routes non mesurées: une réponse qui ne se termine pas n'a pas de latence
+EXCLUES = {
+    "flux-candidatures": "flux SSE continu",
+    "flux-evenements": "flux SSE continu",
+}
+
+JSON = "application/json"
+
+
+@dataclass
+class Scenario:
+    """
+    Une route à charger. chemin et corps sont des fonctions du contexte (ids
+    et tokens des données) et du numéro de la requête
+    """
+
+    nom: str
+    role: str
+    chemin: object
+    methode: str = "GET"
+    corps: object = None
+    type_contenu: str = JSON
+    attendus: tuple = ()
+    cookies: object = None
+
+
+def en_json(donnees):
+    return json.dumps(donnees).encode()
+
+
+def fixe(chemin):
+    return lambda contexte, numero: chemin.format(**contexte)
+
+
+SCENARIOS = [
+    Scenario("offres", "candidat", fixe("/api/offres/")),
+    Scenario("offre-detail", "candidat", fixe("/api/offres/{offre}/")),
+    Scenario("recherche", "candidat", fixe("/api/offres/rechercher/?q={requete}")),
+    Scenario("offres-recommandees", "candidat", fixe("/api/offres/recommandees/")),
+    Scenario("profil", "candidat", fixe("/api/profil/")),
+    Scenario("list-candidatures", "candidat", fixe("/api/candidatures/")),
+    Scenario(
+        "candidature-detail", "candidat", fixe("/api/candidatures/{candidature}/")
+    ),
+    Scenario("evenements", "recruteur", fixe("/api/evenements/?attente=0")),
+    Scenario("candidats", "recruteur", fixe("/api/candidats/")),
+    Scenario("candidat", "recruteur", fixe("/api/candidats/{candidat}/")),
+    Scenario("statistiques", "recruteur", fixe("/api/recruteur/statistiques/")),
+    Scenario("recruteur-offres", "recruteur", fixe("/api/recruteur/offres/")),
+    Scenario(
+        "recruteur-offre-detail",
+        "recruteur",
+        fixe("/api/recruteur/offres/{offre_recruteur}/"),
+    ),
+    Scenario(
+        "recruteur-offres-export",
+        "recruteur",
+        fixe("/api/recruteur/offres/export/?type=ndjson"),
+    ),
+    Scenario(
+        "candidats-postule",
+        "recruteur",
+        fixe("/api/recruteur/offres/{offre_recruteur}/candidatures/"),
+    ),
+    Scenario(
+        "candidatures-export",
+        "recruteur",
+        fixe("/api/recruteur/offres/{offre_recruteur}/candidatures/export/"),
+    ),
+    Scenario(
+        "candidats-offre",
+        "recruteur",
+        fixe("/api/recruteur/offres/{offre_recruteur}/candidats/"),
+    ),
+    Scenario(
+        "meilleurs-candidats",
+        "recruteur",
+        fixe("/api/recruteur/offres/{offre_recruteur}/meilleurs-candidats/"),
+    ),
+    Scenario(
+        "recherche-candidatures",
+        "recruteur",
+        fixe("/api/recruteur/candidatures/rechercher/?q={requete}"),
+    ),
+    Scenario("async-offres", "candidat", fixe("/api/async/offres/")),
+    Scenario("async-offre-detail", "candidat", fixe("/api/async/offres/{offre}/")),
+    Scenario(
+        "async-recherche", "candidat", fixe("/api/async/offres/rechercher/?q={requete}")
+    ),
+    Scenario("async-candidatures", "candidat", fixe("/api/async/candidatures/")),
+    Scenario(
+        "async-candidature-detail",
+        "candidat",
+        fixe("/api/async/candidatures/{candidature}/"),
+    ),
+    # écritures, après les lectures: elles modifient les données
+    Scenario(
+        "token",
+        None,
+        fixe("/api/token-obtain/"),
+        methode="POST",
+        corps=lambda contexte, numero: en_json(
+            {"username": contexte["nom_candidat"], "password": contexte["mot_de_passe"]}
+        ),
+    ),
+    Scenario(
+        "refresh",
+        None,
+        fixe("/api/token-refresh/"),
+        methode="POST",
+        # le refresh token est lu dans le cookie
+        cookies=lambda contexte: {"refresh": contexte["refresh"]},
+    ),
+    # statut inchangé: les requêtes restent équivalentes d'un appel à l'autre
+    Scenario(
+        "mettre-a-jour-statut",
+        "recruteur",
+        fixe("/api/candidatures/{candidature_recue}/mettre-a-jour-statut/"),
+        methode="PATCH",
+        corps=lambda contexte, numero: en_json(
+            {"statut": contexte["statut_candidature_recue"]}
+        ),
+    ),
+    Scenario(
+        "mettre-a-jour-statuts",
+        "recruteur",
+        fixe("/api/recruteur/candidatures/statuts/"),
+        methode="POST",
+        corps=lambda contexte, numero: en_json(
+            {
+                "filtre": {"offre": contexte["offre_recruteur"]},
+                "statut": "en attente",
+            }
+        ),
+    ),
+    # une offre différente à chaque requête; 400 une fois les offres épuisées
+    Scenario(
+        "creer-candidature",
+        "candidat",
+        lambda contexte, numero: "/api/offres/{}/candidater/".format(
+            contexte["offres_libres"][numero % len(contexte["offres_libres"])]
+        ),
+        methode="POST",
+        corps=lambda contexte, numero: en_json({"lettre_motivation": "Bonjour"}),
+        attendus=(201, 400),
+    ),
+    Scenario(
+        "inscription",
+        None,
+        fixe("/api/inscription/"),
+        methode="POST",
+        corps=lambda contexte, numero: en_json(
+            {
+                "username": f"{contexte['execution']}-{numero}",
+                "password": contexte["mot_de_passe"],
+                "role": "candidat",
+                "competences": "python, django",
+            }
+        ),
+        attendus=(201,),
+    ),
+    Scenario(
+        "recruteur-offres-import",
+        "recruteur",
+        fixe("/api/recruteur/offres/import/"),
+        methode="POST",
+        corps=lambda contexte, numero: b"".join(
+            en_json(
+                {
+                    "titre": f"Offre importée {numero}-{rang}",
+                    "description": "Import de benchmark",
+                    "salaire": "45000.00",
+                    "competences_requises": "python, sql",
+                }
+            )
+            + b"\n"
+            for rang in range(10)
+        ),
+        type_contenu="application/x-ndjson",
+    ),
+]
+
+
+def routes_non_couvertes():
+    from api.urls import urlpatterns
+
+    couvertes = {scenario.nom for scenario in SCENARIOS} | set(EXCLUES)
+    return sorted(motif.name for motif in urlpatterns if motif.name not in couvertes)
+
+
+def preparer_contexte(requete):
+    """Ids et tokens utilisés par les chemins et les corps des scénarios"""
+    from api.donnees_synthetiques import MOT_DE_PASSE, PREFIXE
+    from api.models import Candidature, StatistiqueOffre, User
+    from api.serializers import PersonnaliseeTokenObtainPairSerializer
+
+    # l'offre la plus demandée et son recruteur
+    statistique = StatistiqueOffre.objects.order_by("-en_attente", "offre_id").first()
+    if statistique is None:
+        raise SystemExit("Base vide: lancer avec --profil pour la peupler.")
+    recruteur = User.objects.get(pk=statistique.recruteur_id)
+    candidat = User.objects.get(username=f"{PREFIXE}-candidat-0")
+    candidature = Candidature.objects.filter(candidat=candidat).order_by("id").first()
+    candidature_recue = (
+        Candidature.objects.filter(offre_id=statistique.offre_id).order_by("id").first()
+    )
+    offres_libres = list(
+        StatistiqueOffre.objects.exclude(
+            offre__candidatures__candidat=candidat
+        ).values_list("offre_id", flat=True)[:10_000]
+    )
+
+    jetons = {
+        utilisateur.role: PersonnaliseeTokenObtainPairSerializer.get_token(utilisateur)
+        for utilisateur in (candidat, recruteur)
+    }
+    return {
+        "offre": statistique.offre_id,
+        "offre_recruteur": statistique.offre_id,
+        "candidat": candidat.pk,
+        "nom_candidat": candidat.username,
+        "candidature": candidature.pk,
+        "candidature_recue": candidature_recue.pk,
+        "statut_candidature_recue": candidature_recue.statut,
+        "offres_libres": offres_libres,
+        "requete": urllib.parse.quote(requete),
+        "mot_de_passe": MOT_DE_PASSE,
+        "refresh": str(jetons["candidat"]),
+        "acces": {role: str(jeton.access_token) for role, jeton in jetons.items()},
+        "execution": f"{PREFIXE}-inscrit-{int(time.time())}",
+    }
+
+
+def entetes_pour(scenario, contexte):
+    entetes = {"Content-Type": scenario.type_contenu}
+    if scenario.role:
+        entetes["Authorization"] = f"Bearer {contexte['acces'][scenario.role]}"
+    if scenario.cookies:
+        entetes["Cookie"] = "; ".join(
+            f"{nom}={valeur}" for nom, valeur in scenario.cookies(contexte).items()
+        )
+    return entetes
+
+
+def compter_requetes(scenario, contexte):
+    """Nombre de requêtes SQL d'un appel, dans ce processus (numéro 0)"""
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    entetes = entetes_pour(scenario, contexte)
+    client = Client(
+        **(
+            {"HTTP_AUTHORIZATION": entetes["Authorization"]}
+            if "Authorization" in entetes
+            else {}
+        )
+    )
+    if scenario.cookies:
+        client.cookies.load(scenario.cookies(contexte))
+    corps = scenario.corps(contexte, 0) if scenario.corps else None
+    with CaptureQueriesContext(connection) as requetes:
+        reponse = client.generic(
+            scenario.methode,
+            scenario.chemin(contexte, 0),
+            corps or b"",
+            content_type=scenario.type_contenu,
+        )
+        if reponse.streaming:
+            for _ in reponse.streaming_content:
+                pass
+    return len(requetes), reponse.status_code
+
+
+def mesurer(scenario, contexte, base, serveur, options):
+    requetes_sql, statut = compter_requetes(scenario, contexte)
+    reinitialiser_pic_memoire(serveur.pid)
+    resultat = asyncio.run(
+        charger(
+            lambda numero: base + scenario.chemin(contexte, numero),
+            entetes_pour(scenario, contexte),
+            options.concurrence,
+            options.duree,
+            methode=scenario.methode,
+            corps=(
+                (lambda numero: scenario.corps(contexte, numero))
+                if scenario.corps
+                else None
+            ),
+            attendus=scenario.attendus,
+            premier=1,
+        )
+    )
+    return {
+        **resultat.resume(),
+        "statuts": {str(code): nombre for code, nombre in resultat.statuts.items()},
+        "requetes_sql": requetes_sql,
+        "statut_sql": statut,
+        "rss_max_mo": pic_memoire(serveur.pid),
+    }
+
+
+def comparer(routes, reference, tolerance):
+    """Régressions par rapport aux routes d'un rapport de référence"""
+    regressions = []
+    for nom, actuel in routes.items():
+        ancien = reference.get(nom)
+        if ancien is None:
+            continue
+        if actuel["erreurs"] and not ancien["erreurs"]:
+            regressions.append(f"{nom}: {actuel['erreurs']} erreurs")
+        if actuel["rps"] < ancien["rps"] * (1 - tolerance):
+            regressions.append(f"{nom}: débit {ancien['rps']} -> {actuel['rps']} rps")
+        for latence in ("p95_ms", "p99_ms"):
+            if actuel[latence] > ancien[latence] * (1 + tolerance):
+                regressions.append(
+                    f"{nom}: {latence} {ancien[latence]} -> {actuel[latence]}"
+                )
+        if actuel["requetes_sql"] > ancien["requetes_sql"]:
+            regressions.append(
+                f"{nom}: requêtes SQL {ancien['requetes_sql']}"
+                f" -> {actuel['requetes_sql']}"
+            )
+        if (
+            actuel["rss_max_mo"]
+            and ancien.get("rss_max_mo")
+            and actuel["rss_max_mo"] > ancien["rss_max_mo"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{nom}: RSS {ancien['rss_max_mo']} -> {actuel['rss_max_mo']} Mo"
+            )
+    return regressions
+
+
+def afficher(routes):
+    print(
+        f"{'route':<28}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'erreurs':>9}{'sql':>6}{'rss Mo':>9}"
+    )
+    for nom, mesure in routes.items():
+        print(
+            f"{nom:<28}{mesure['rps']:>9}{mesure['p50_ms']:>9}{mesure['p95_ms']:>9}"
+            f"{mesure['p99_ms']:>9}{mesure['erreurs']:>9}{mesure['requetes_sql']:>6}"
+            f"{mesure['rss_max_mo'] or '-':>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profil", help="Peuple d'abord la base (petit, moyen...)")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--routes", nargs="*", help="Noms des routes à mesurer")
+    parser.add_argument("--requete", default="développeur")
+    parser.add_argument("--concurrence", type=int, default=20)
+    parser.add_argument("--duree", type=float, default=5.0)
+    parser.add_argument("--interface", choices=("asgi", "wsgi"), default="asgi")
+    parser.add_argument("--port", type=int, default=8103)
+    parser.add_argument("--avec-cache", action="store_true")
+    parser.add_argument("--sortie", type=Path, help="Rapport JSON à écrire")
+    parser.add_argument("--reference", type=Path, help="Rapport de référence")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    options = parser.parse_args()
+
+    # mêmes réglages pour ce processus (requêtes SQL) et pour le serveur
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    if not options.avec_cache:
+        os.environ["CACHE_BACKEND"] = CACHE_DESACTIVE
+    import django
+
+    django.setup()
+    from django.db import connection
+
+    if manquantes := routes_non_couvertes():
+        raise SystemExit(f"Routes sans scénario ni exclusion: {', '.join(manquantes)}")
+
+    if options.profil:
+        from django.core.management import call_command
+
+        call_command("seed_data", profil=options.profil, graine=options.graine)
+
+    contexte = preparer_contexte(options.requete)
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not options.routes or scenario.nom in options.routes
+    ]
+
+    base = f"http://127.0.0.1:{options.port}"
+    serveur = lancer(options.interface, options.port, options.avec_cache)
+    routes = {}
+    try:
+        attendre(base)
+        for scenario in scenarios:
+            routes[scenario.nom] = mesurer(scenario, contexte, base, serveur, options)
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    afficher(routes)
+    rapport = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "base": connection.vendor,
+            "interface": options.interface,
+            "cache": options.avec_cache,
+            "concurrence": options.concurrence,
+            "duree": options.duree,
+        },
+        "routes": routes,
+    }
+    if options.sortie:
+        options.sortie.write_text(json.dumps(rapport, indent=2, ensure_ascii=False))
+
+    if options.reference:
+        reference = json.loads(options.reference.read_text())["routes"]
+        if regressions := comparer(routes, reference, options.tolerance):
+            print("\nRégressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nAucune régression par rapport à la référence.")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,11 +38,24 @@ CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
+    # l'utilisateur est reconstruit depuis les claims du token, sans requête
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # JSON encodé et décodé par orjson s'il est installé, par le module json
+    # sinon; rest_framework.renderers.JSONRenderer et
+    # rest_framework.parsers.JSONParser pour revenir au rendu de DRF
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.RapideJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.RapideJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -51,11 +64,19 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
+# le token d'accès est évalué sans requête en base (api/authentication.py): sa
+# durée de vie borne le délai de prise en compte d'un compte désactivé, le rôle
+# et l'état actif étant relus à chaque rafraîchissement
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
+    "TOKEN_USER_CLASS": "api.authentication.UtilisateurToken",
 }
 
+# durée de vie (secondes) du cache des utilisateurs complets chargés par les
+# vues qui en ont besoin (profil, recommandations)
+DUREE_CACHE_UTILISATEURS = 30
+
 
 # Application definition
 
@@ -74,6 +95,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # en tête: mesure la requête entière (voir api/metriques.py)
+    "api.middleware.MesureRequetesMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -120,6 +143,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# locmem par défaut, à remplacer en production par un cache partagé entre
+# les processus (redis, memcached) pour que les invalidations soient globales
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -165,3 +203,22 @@ AUTH_USER_MODEL = "api.User"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# nombre de threads qui traitent les CV en arrière-plan (0: traitement synchrone)
+CV_NOMBRE_TRAVAILLEURS = int(os.getenv("CV_NOMBRE_TRAVAILLEURS", 2))
+
+# webhook qui reçoit les événements de candidature (commande diffuser_evenements)
+EVENEMENTS_WEBHOOK_URL = os.getenv("EVENEMENTS_WEBHOOK_URL", "")
+
+# pub/sub des flux SSE asynchrones: remplaçable par un courtier partagé entre
+# processus exposant publier() et abonner() (voir api/diffusion.py)
+DIFFUSEUR_EVENEMENTS = os.getenv("DIFFUSEUR_EVENEMENTS", "api.diffusion.DiffuseurLocal")
+
+# budgets par requête au-delà desquels la requête est journalisée avec ses
+# requêtes SQL les plus lentes (voir api/middleware.py)
+METRIQUES_BUDGET_REQUETES_SQL = int(os.getenv("METRIQUES_BUDGET_REQUETES_SQL", 20))
+METRIQUES_BUDGET_DUREE = float(os.getenv("METRIQUES_BUDGET_DUREE", 1.0))
+
+# jeton (Authorization: Bearer) exigé par /metrics; s'il est vide, /metrics
+# n'est ouvert qu'en DEBUG
+METRIQUES_JETON = os.getenv("METRIQUES_JETON", "")
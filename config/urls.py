@@ -19,6 +19,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from api.metriques import vue_metriques
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -28,6 +29,8 @@ from drf_spectacular.views import (
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    # mesures par route au format Prometheus
+    path("metrics", vue_metriques, name="metriques"),
     # Documentation OpenAPI
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(